@@ -0,0 +1,26 @@
+"""Add llm_batch_sizes to matching_runs
+
+Revision ID: y1_matching_run_batch_sizes
+Revises: x2_fix_colors
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "y1_matching_run_batch_sizes"
+down_revision = "x2_fix_colors"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    columns = [c["name"] for c in sa.inspect(conn).get_columns("matching_runs")]
+    if "llm_batch_sizes" not in columns:
+        op.add_column("matching_runs", sa.Column("llm_batch_sizes", JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("matching_runs", "llm_batch_sizes")
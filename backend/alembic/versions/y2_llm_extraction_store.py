@@ -0,0 +1,46 @@
+"""Add llm_extractions table (content-addressed LLM extraction store)
+
+Revision ID: y2_llm_extraction_store
+Revises: y1_matching_run_batch_sizes
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "y2_llm_extraction_store"
+down_revision = "y1_matching_run_batch_sizes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Table may already exist if created by db.create_all()
+    if not conn.dialect.has_table(conn, "llm_extractions"):
+        op.create_table(
+            "llm_extractions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("label_hash", sa.String(64), nullable=False),
+            sa.Column("context_fingerprint", sa.String(64), nullable=False),
+            sa.Column("extracted_attributes", JSONB(), nullable=False),
+            sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("last_used_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.UniqueConstraint("label_hash", "context_fingerprint", name="uix_llm_extraction"),
+        )
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_llm_extractions_context_fingerprint
+        ON llm_extractions (context_fingerprint)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_llm_extractions_last_used_at
+        ON llm_extractions (last_used_at)
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_llm_extractions_last_used_at", table_name="llm_extractions")
+    op.drop_index("ix_llm_extractions_context_fingerprint", table_name="llm_extractions")
+    op.drop_table("llm_extractions")
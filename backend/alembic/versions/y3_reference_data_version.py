@@ -0,0 +1,35 @@
+"""Add reference_data_version table (reference snapshot invalidation)
+
+Revision ID: y3_reference_data_version
+Revises: y2_llm_extraction_store
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "y3_reference_data_version"
+down_revision = "y2_llm_extraction_store"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Table may already exist if created by db.create_all()
+    if not conn.dialect.has_table(conn, "reference_data_version"):
+        op.create_table(
+            "reference_data_version",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+    op.execute("""
+        INSERT INTO reference_data_version (id, version)
+        SELECT 1, 1
+        WHERE NOT EXISTS (SELECT 1 FROM reference_data_version WHERE id = 1)
+    """)
+
+
+def downgrade():
+    op.drop_table("reference_data_version")
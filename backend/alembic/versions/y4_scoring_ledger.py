@@ -0,0 +1,63 @@
+"""Add scored_pairs and scoring_states tables (incremental Phase 2 scoring)
+
+Revision ID: y4_scoring_ledger
+Revises: y3_reference_data_version
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "y4_scoring_ledger"
+down_revision = "y3_reference_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Tables may already exist if created by db.create_all()
+    if not conn.dialect.has_table(conn, "scored_pairs"):
+        op.create_table(
+            "scored_pairs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "product_id", sa.Integer(),
+                sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False,
+            ),
+            sa.Column(
+                "label_cache_id", sa.Integer(),
+                sa.ForeignKey("label_cache.id", ondelete="CASCADE"), nullable=False,
+            ),
+            sa.Column("feature_hash", sa.String(40), nullable=False),
+            sa.Column("score", sa.Integer(), nullable=False),
+            sa.Column("details", JSONB(), nullable=True),
+            sa.UniqueConstraint("product_id", "label_cache_id", name="uix_scored_pair"),
+        )
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_scored_pairs_product_id
+        ON scored_pairs (product_id)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_scored_pairs_label_cache_id
+        ON scored_pairs (label_cache_id)
+    """)
+
+    if not conn.dialect.has_table(conn, "scoring_states"):
+        op.create_table(
+            "scoring_states",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("entity", sa.String(10), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=False),
+            sa.Column("feature_hash", sa.String(40), nullable=False),
+            sa.Column("run_id", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("entity", "entity_id", name="uix_scoring_state"),
+        )
+
+
+def downgrade():
+    op.drop_table("scoring_states")
+    op.drop_index("ix_scored_pairs_label_cache_id", table_name="scored_pairs")
+    op.drop_index("ix_scored_pairs_product_id", table_name="scored_pairs")
+    op.drop_table("scored_pairs")
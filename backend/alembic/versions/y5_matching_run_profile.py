@@ -0,0 +1,26 @@
+"""Add profile to matching_runs
+
+Revision ID: y5_matching_run_profile
+Revises: y4_scoring_ledger
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "y5_matching_run_profile"
+down_revision = "y4_scoring_ledger"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    columns = [c["name"] for c in sa.inspect(conn).get_columns("matching_runs")]
+    if "profile" not in columns:
+        op.add_column("matching_runs", sa.Column("profile", JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("matching_runs", "profile")
@@ -0,0 +1,25 @@
+"""Add timeout_seconds to supplier_apis
+
+Revision ID: y6_supplier_api_timeout
+Revises: y5_matching_run_profile
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "y6_supplier_api_timeout"
+down_revision = "y5_matching_run_profile"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    columns = [c["name"] for c in sa.inspect(conn).get_columns("supplier_apis")]
+    if "timeout_seconds" not in columns:
+        op.add_column("supplier_apis", sa.Column("timeout_seconds", sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("supplier_apis", "timeout_seconds")
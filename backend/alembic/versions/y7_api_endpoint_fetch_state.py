@@ -0,0 +1,26 @@
+"""Add fetch_state to api_endpoints
+
+Revision ID: y7_api_endpoint_fetch_state
+Revises: y6_supplier_api_timeout
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "y7_api_endpoint_fetch_state"
+down_revision = "y6_supplier_api_timeout"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    columns = [c["name"] for c in sa.inspect(conn).get_columns("api_endpoints")]
+    if "fetch_state" not in columns:
+        op.add_column("api_endpoints", sa.Column("fetch_state", JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("api_endpoints", "fetch_state")
@@ -55,6 +55,8 @@ class SupplierAPI(db.Model):
     auth_config = db.Column(JSONB, nullable=True)
     default_headers = db.Column(JSONB, nullable=True)
     rate_limit_per_min = db.Column(db.Integer, nullable=True)
+    # Read timeout of the requests to this API (ETL_REQUEST_TIMEOUT when empty)
+    timeout_seconds = db.Column(db.Float, nullable=True)
 
 
 class ApiEndpoint(db.Model):
@@ -86,6 +88,9 @@ class ApiEndpoint(db.Model):
     )
     pagination_config = db.Column(JSONB, nullable=True)
     items_path = db.Column(db.String(200), nullable=True)
+    # Validators and per-page payload digests of the last sync that rewrote
+    # the catalog, used to skip unchanged feeds (see utils/etl.run_fetch_job)
+    fetch_state = db.Column(JSONB, nullable=True)
 
 
 class MappingVersion(db.Model):
@@ -481,6 +486,24 @@ class OdooSyncJob(db.Model):
     report_deleted = db.Column(JSONB, nullable=True)
 
 
+class ReferenceDataVersion(db.Model):
+    """Single-row counter bumped on every write to the reference tables.
+
+    Lets each process keep its reference data snapshot and reload it only
+    when the counter moved (see utils/reference_data.py).
+    """
+
+    __tablename__ = "reference_data_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
 class ModelReference(db.Model):
     __tablename__ = "model_references"
 
@@ -517,6 +540,74 @@ class LabelCache(db.Model):
     last_seen_run = db.relationship("MatchingRun")
 
 
+class LlmExtraction(db.Model):
+    """Content-addressed store of raw LLM extraction results.
+
+    Keyed by the SHA-256 of the raw supplier label and a fingerprint of the
+    extraction prompt/context, independently of the supplier, so identical
+    label strings are never sent to the LLM twice for the same references.
+    """
+
+    __tablename__ = "llm_extractions"
+    __table_args__ = (
+        db.UniqueConstraint("label_hash", "context_fingerprint", name="uix_llm_extraction"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    label_hash = db.Column(db.String(64), nullable=False)
+    context_fingerprint = db.Column(db.String(64), nullable=False, index=True)
+    extracted_attributes = db.Column(JSONB, nullable=False)
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_used_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+
+class ScoredPair(db.Model):
+    """Phase 2 scoring ledger: raw score of one product x label pair.
+
+    Only pairs that can drive an outcome are kept: the best positive scores
+    and one disqualified pair per product (score 0); ``details`` is only
+    kept for the winning and the disqualified pair. ``feature_hash``
+    identifies the product and label features the score was computed from
+    (see utils/scoring_ledger.py).
+    """
+
+    __tablename__ = "scored_pairs"
+    __table_args__ = (
+        db.UniqueConstraint("product_id", "label_cache_id", name="uix_scored_pair"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(
+        db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    label_cache_id = db.Column(
+        db.Integer, db.ForeignKey("label_cache.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    feature_hash = db.Column(db.String(40), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    details = db.Column(JSONB, nullable=True)
+
+
+class ScoringState(db.Model):
+    """Features a product or label had when the scoring ledger last saw it.
+
+    For a product, ``run_id`` is the run it was last scored in; for a label,
+    the run its features last changed in.
+    """
+
+    __tablename__ = "scoring_states"
+    __table_args__ = (
+        db.UniqueConstraint("entity", "entity_id", name="uix_scoring_state"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(10), nullable=False)  # "product" | "label"
+    entity_id = db.Column(db.Integer, nullable=False)
+    feature_hash = db.Column(db.String(40), nullable=False)
+    run_id = db.Column(db.Integer, nullable=False)
+
+
 class ActivityLog(db.Model):
     __tablename__ = "activity_logs"
 
@@ -588,6 +679,10 @@ class MatchingRun(db.Model):
     attr_share_hits = db.Column(db.Integer, nullable=True)
     total_odoo_products = db.Column(db.Integer, nullable=True)
     matched_products = db.Column(db.Integer, nullable=True)
+    # Size of each Phase 1 LLM batch, in submission order (adaptive sizing)
+    llm_batch_sizes = db.Column(JSONB, nullable=True)
+    # Per-phase timings, SQL counts, counters and histograms (utils/run_profiler.py)
+    profile = db.Column(JSONB, nullable=True)
 
 
 class NightlyEmailRecipient(db.Model):
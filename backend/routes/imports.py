@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from datetime import datetime, timezone
 from typing import Any
 
@@ -20,6 +21,7 @@ from sqlalchemy.orm import joinedload
 from utils.activity import log_activity
 from utils.auth import token_required
 from utils.etl import run_fetch_job, select_best_mapping
+from utils.supplier_http import close_session
 
 
 def _select_endpoint(
@@ -108,6 +110,7 @@ def _serialize_supplier_api(api: SupplierAPI) -> dict[str, Any]:
         "base_url": api.base_url,
         "auth_type": api.auth_type.value if api.auth_type else None,
         "rate_limit_per_min": api.rate_limit_per_min,
+        "timeout_seconds": api.timeout_seconds,
         "endpoints": [
             _serialize_endpoint(endpoint)
             for endpoint in sorted(
@@ -186,6 +189,21 @@ def _parse_auth_type(raw_value: str | None) -> AuthType:
         raise ValueError("Type d'authentification invalide.") from exc
 
 
+def _parse_timeout_seconds(raw_value: Any) -> float | None:
+    """Read timeout of an API: a positive number of seconds, or None (default)."""
+    if raw_value is None or raw_value == "":
+        return None
+    if isinstance(raw_value, bool):
+        raise ValueError("Le timeout doit être un nombre de secondes positif.")
+    try:
+        timeout = float(raw_value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Le timeout doit être un nombre de secondes positif.") from exc
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError("Le timeout doit être un nombre de secondes positif.")
+    return timeout
+
+
 @bp.route("/supplier_api/<int:supplier_id>/apis", methods=["POST"])
 @token_required("admin")
 def create_supplier_api(supplier_id: int):
@@ -212,6 +230,8 @@ def create_supplier_api(supplier_id: int):
               type: string
             rate_limit_per_min:
               type: integer
+            timeout_seconds:
+              type: number
             auth_config:
               type: object
             default_headers:
@@ -231,6 +251,7 @@ def create_supplier_api(supplier_id: int):
 
     try:
         auth_type = _parse_auth_type(payload.get("auth_type"))
+        timeout_seconds = _parse_timeout_seconds(payload.get("timeout_seconds"))
     except ValueError as err:
         return jsonify({"error": str(err)}), 400
 
@@ -239,6 +260,7 @@ def create_supplier_api(supplier_id: int):
         base_url=base_url,
         auth_type=auth_type,
         rate_limit_per_min=payload.get("rate_limit_per_min"),
+        timeout_seconds=timeout_seconds,
         auth_config=payload.get("auth_config"),
         default_headers=payload.get("default_headers"),
     )
@@ -272,6 +294,8 @@ def update_supplier_api(api_id: int):
               type: string
             rate_limit_per_min:
               type: integer
+            timeout_seconds:
+              type: number
             auth_config:
               type: object
             default_headers:
@@ -301,6 +325,12 @@ def update_supplier_api(api_id: int):
         rate_limit = payload.get("rate_limit_per_min")
         api.rate_limit_per_min = rate_limit if rate_limit is not None else None
 
+    if "timeout_seconds" in payload:
+        try:
+            api.timeout_seconds = _parse_timeout_seconds(payload.get("timeout_seconds"))
+        except ValueError as err:
+            return jsonify({"error": str(err)}), 400
+
     if "auth_config" in payload:
         api.auth_config = payload.get("auth_config")
 
@@ -309,6 +339,8 @@ def update_supplier_api(api_id: int):
 
     db.session.commit()
     db.session.refresh(api)
+    # Pooled connections were opened with the previous auth/headers
+    close_session(api.id)
 
     return jsonify(_serialize_supplier_api(api))
 
@@ -354,6 +386,7 @@ def delete_supplier_api(api_id: int):
 
     db.session.delete(api)
     db.session.commit()
+    close_session(api_id)
 
     return ("", 204)
 
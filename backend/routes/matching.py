@@ -357,9 +357,10 @@ def matching_stats():
     progress_pct = round(total_processed / total_all * 100, 1) if total_all > 0 else 0.0
 
     # Produits du catalogue fournisseur sans SupplierProductRef.
-    # _create_supplier_ref identifie un ref par (supplier_id, ean, part_number) avec NULL-safe
-    # comparison. On reproduit la même logique ici pour détecter tous les refs existants,
-    # y compris ceux créés pour des items sans EAN (ean=None, matchés par part_number).
+    # Les refs sont écrits par _upsert_supplier_refs (utils/llm_matching.py) avec l'EAN et
+    # le part number de la ligne catalogue. On les retrouve ici par (supplier_id, ean,
+    # part_number) avec une comparaison NULL-safe, y compris pour les items sans EAN
+    # (ean=None, retrouvés par part_number).
     has_product_ref = (
         db.session.query(SupplierProductRef.id)
         .filter(
@@ -612,6 +613,8 @@ def list_runs():
             "attr_share_hits": r.attr_share_hits,
             "total_odoo_products": r.total_odoo_products,
             "matched_products": r.matched_products,
+            "llm_batch_sizes": r.llm_batch_sizes,
+            "profile": r.profile,
             "nightly_job_id": r.nightly_job_id,
         }
         for r in runs
@@ -10,8 +10,6 @@ from flask import Blueprint, jsonify, request, send_file, current_app
 from models import (
     ApiFetchJob,
     Brand,
-    Color,
-    ColorTranslation,
     ImportHistory,
     InternalProduct,
     Product,
@@ -22,6 +20,7 @@ from models import (
 )
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload
+from utils import reference_data
 from utils.activity import log_activity
 from utils.auth import token_required
 from utils.calculations import recalculate_product_calculations
@@ -143,18 +142,19 @@ def list_search_catalog():
         return jsonify({"error": str(exc)}), 502
 
     color_synonyms: Dict[int, Set[str]] = {}
+    refs = reference_data.get_snapshot()
 
-    for color in Color.query.all():
-        if color.color:
-            color_synonyms.setdefault(color.id, set()).add(color.color)
+    for color in refs.colors:
+        if color.value:
+            color_synonyms.setdefault(color.id, set()).add(color.value)
 
-    for translation in ColorTranslation.query.all():
-        target_id = translation.color_target_id
+    for translation in refs.color_translations:
+        target_id = translation.target_id
         synonyms = color_synonyms.setdefault(target_id, set())
-        if translation.color_target:
-            synonyms.add(translation.color_target)
-        if translation.color_source:
-            synonyms.add(translation.color_source)
+        if translation.target:
+            synonyms.add(translation.target)
+        if translation.source:
+            synonyms.add(translation.source)
 
     entries = (
         SupplierCatalog.query.options(
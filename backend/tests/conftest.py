@@ -1,9 +1,15 @@
 import os
+import tempfile
 
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["JWT_SECRET"] = "test-secret-key-with-at-least-32-bytes!"
 os.environ["ODOO_ENCRYPTION_KEY"] = "jz_ym28yBdCGZxVwRXgvVsKrvDSa04MTQGfEuboJyfU="
 os.environ["FRONTEND_URL"] = "http://localhost:5173"
+# Persisted matching indexes and caches: never under /app/data during tests
+_DATA_DIR = tempfile.mkdtemp(prefix="test-matching-")
+os.environ["BM25_INDEX_DIR"] = os.path.join(_DATA_DIR, "bm25")
+os.environ["FAISS_INDEX_DIR"] = os.path.join(_DATA_DIR, "faiss")
+os.environ["EMBEDDING_CACHE_DIR"] = os.path.join(_DATA_DIR, "embeddings")
 
 # Map PostgreSQL JSONB to SQLite-compatible JSON before importing models
 from sqlalchemy.dialects.postgresql import JSONB
@@ -35,6 +41,7 @@ _ws.generate_password_hash = _compat_gen
 import pytest
 from app import create_app
 from models import db as _db, User
+from utils import reference_data
 
 
 @pytest.fixture(scope="session")
@@ -56,6 +63,8 @@ def _push_ctx(app):
     for table in reversed(_db.metadata.sorted_tables):
         _db.session.execute(table.delete())
     _db.session.commit()
+    # The version counter row was just deleted: drop the cached snapshot
+    reference_data.invalidate()
     ctx.pop()
 
 
@@ -0,0 +1,525 @@
+"""Tests for utils/pagination.py, utils/supplier_http.py and the paginated and
+conditional fetch of run_fetch_job."""
+
+import gc
+import json
+import weakref
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from models import (
+    ApiEndpoint,
+    ApiFetchJob,
+    AuthType,
+    FieldMap,
+    ImportHistory,
+    MappingVersion,
+    PaginationType,
+    RawIngest,
+    Supplier,
+    SupplierAPI,
+    SupplierCatalog,
+    db,
+)
+from utils.etl import _perform_request, run_fetch_job
+from utils.pagination import iter_pages
+from utils.supplier_http import (
+    close_session,
+    get_rate_limiter,
+    get_session,
+    request_timeout,
+    send_with_retry,
+)
+
+BASE_URL = "https://api.example.com/products"
+
+
+def _response(payload, url=BASE_URL, links=None, status=200, headers=None):
+    response = MagicMock()
+    response.json.return_value = payload
+    response.url = url
+    response.links = links or {}
+    response.status_code = status
+    response.headers = {"Content-Type": "application/json", **(headers or {})}
+    response.content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+def _items(start, count):
+    return [{"sku": f"SKU-{i}", "name": f"Phone {i}"} for i in range(start, start + count)]
+
+
+def _collect(pagination_type, config, responses):
+    """Run iter_pages over canned responses, returning (calls, pages)."""
+    calls = []
+
+    def fetch(url, query, body):
+        calls.append((url, dict(query), dict(body)))
+        return responses[len(calls) - 1]
+
+    pages = list(iter_pages(
+        pagination_type, config, fetch, {"q": "x"}, {},
+        lambda payload: payload.get("items", []),
+    ))
+    return calls, pages
+
+
+class TestIterPages:
+
+    def test_none_fetches_a_single_page(self):
+        calls, pages = _collect(PaginationType.NONE, None, [_response({"items": _items(0, 3)})])
+        assert calls == [(None, {"q": "x"}, {})]
+        assert [len(p.items) for p in pages] == [3]
+
+    def test_page_stops_on_short_page(self):
+        config = {"page_param": "p", "size_param": "per_page", "page_size": 2}
+        responses = [_response({"items": _items(0, 2)}), _response({"items": _items(2, 1)})]
+        calls, pages = _collect(PaginationType.PAGE, config, responses)
+        assert [c[1] for c in calls] == [
+            {"q": "x", "p": 1, "per_page": 2},
+            {"q": "x", "p": 2, "per_page": 2},
+        ]
+        assert [(p.index, p.cursor) for p in pages] == [(0, "1"), (1, "2")]
+
+    def test_page_without_size_stops_on_empty_page(self):
+        responses = [_response({"items": _items(0, 2)}), _response({"items": []})]
+        calls, pages = _collect(PaginationType.PAGE, {}, responses)
+        assert len(calls) == 2
+        assert [len(p.items) for p in pages] == [2, 0]
+
+    def test_offset_advances_by_items_received(self):
+        config = {"limit": 2, "in": "body"}
+        responses = [
+            _response({"items": _items(0, 2)}),
+            _response({"items": _items(2, 2)}),
+            _response({"items": []}),
+        ]
+        calls, _ = _collect(PaginationType.OFFSET_LIMIT, config, responses)
+        assert [c[2] for c in calls] == [
+            {"offset": 0, "limit": 2}, {"offset": 2, "limit": 2}, {"offset": 4, "limit": 2},
+        ]
+        assert all(c[1] == {"q": "x"} for c in calls)
+
+    def test_cursor_follows_response_path(self):
+        config = {"cursor_param": "after", "cursor_path": "meta.next"}
+        responses = [
+            _response({"items": _items(0, 2), "meta": {"next": "abc"}}),
+            _response({"items": _items(2, 2), "meta": {"next": None}}),
+        ]
+        calls, pages = _collect(PaginationType.CURSOR, config, responses)
+        assert [c[1] for c in calls] == [{"q": "x"}, {"q": "x", "after": "abc"}]
+        assert [p.cursor for p in pages] == [None, "abc"]
+
+    def test_link_header_is_followed_until_absent(self):
+        responses = [
+            _response({"items": _items(0, 2)}, links={"next": {"url": "/products?page=2"}}),
+            _response(
+                {"items": _items(2, 2)},
+                url="https://api.example.com/products?page=2",
+                links={"next": {"url": "https://api.example.com/products?page=2"}},
+            ),
+        ]
+        calls, pages = _collect(PaginationType.LINK_HEADER, {}, responses)
+        # Relative link resolved; a link back to the same page ends the loop
+        assert calls[1] == ("https://api.example.com/products?page=2", {}, {})
+        assert len(pages) == 2
+
+    def test_max_pages_caps_the_loop(self):
+        responses = [_response({"items": _items(i, 1)}) for i in range(5)]
+        calls, _ = _collect(PaginationType.PAGE, {"max_pages": 3}, responses)
+        assert len(calls) == 3
+
+    def test_offset_prefetch_yields_in_order(self):
+        sent = []
+
+        def fetch(url, query, body):
+            sent.append(query["offset"])
+            start = query["offset"]
+            return _response({"items": _items(start, 2 if start < 6 else 1)})
+
+        pages = list(iter_pages(
+            PaginationType.OFFSET_LIMIT, {"limit": 2}, fetch, {}, {},
+            lambda payload: payload["items"], concurrency=3,
+        ))
+
+        assert [p.cursor for p in pages] == ["0", "2", "4", "6"]
+        assert [item["sku"] for p in pages for item in p.items] == [
+            f"SKU-{i}" for i in range(7)
+        ]
+        # At most `concurrency` requests past the last page, none after max_pages
+        assert set(range(0, 8, 2)) <= set(sent) <= set(range(0, 14, 2))
+
+    def test_prefetch_respects_max_pages(self):
+        sent = []
+
+        def fetch(url, query, body):
+            sent.append(query["page"])
+            return _response({"items": _items(query["page"], 1)})
+
+        pages = list(iter_pages(
+            PaginationType.PAGE, {"max_pages": 4, "concurrency": 8}, fetch, {}, {},
+            lambda payload: payload["items"],
+        ))
+        assert [p.cursor for p in pages] == ["1", "2", "3", "4"]
+        assert sorted(sent) == [1, 2, 3, 4]
+
+    def test_invalid_json_raises(self):
+        response = _response(None)
+        response.json.side_effect = ValueError("boom")
+        with pytest.raises(RuntimeError, match="JSON invalide"):
+            _collect(PaginationType.NONE, None, [response])
+
+
+def _setup_fetch(pagination_type, config):
+    supplier = Supplier(name="PagedSupplier")
+    db.session.add(supplier)
+    db.session.flush()
+    api = SupplierAPI(supplier_id=supplier.id, base_url="https://api.example.com")
+    db.session.add(api)
+    db.session.flush()
+    endpoint = ApiEndpoint(
+        supplier_api_id=api.id, name="products", path="/products", method="GET",
+        pagination_type=pagination_type, pagination_config=config, items_path="items",
+    )
+    mapping = MappingVersion(supplier_api_id=api.id, version=1, is_active=True)
+    db.session.add_all([endpoint, mapping])
+    db.session.flush()
+    db.session.add_all([
+        FieldMap(mapping_version_id=mapping.id, target_field="supplier_sku", source_path="sku"),
+        FieldMap(mapping_version_id=mapping.id, target_field="description", source_path="name"),
+    ])
+    job = ApiFetchJob(
+        supplier_api_id=api.id, endpoint_id=endpoint.id, mapping_version_id=mapping.id,
+        status="running", started_at=datetime.now(timezone.utc),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return supplier, endpoint, mapping, job
+
+
+def _new_job(endpoint, mapping):
+    job = ApiFetchJob(
+        supplier_api_id=endpoint.supplier_api_id, endpoint_id=endpoint.id,
+        mapping_version_id=mapping.id, status="running",
+        started_at=datetime.now(timezone.utc),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_run_fetch_job_stores_one_raw_ingest_per_page(monkeypatch):
+    monkeypatch.setenv("ETL_FETCH_CONCURRENCY", "1")
+    supplier, endpoint, mapping, job = _setup_fetch(
+        PaginationType.PAGE, {"size_param": "size", "page_size": 2}
+    )
+    pages = [
+        _response({"items": _items(0, 2)}),
+        # SKU-1 again: deduplicated across pages
+        _response({"items": _items(2, 1) + _items(1, 1)}),
+        _response({"items": []}),
+    ]
+
+    with patch("utils.etl._perform_request", side_effect=pages) as request:
+        result = run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+
+    assert request.call_count == 3
+    assert result["parsed_count"] == 4
+    assert result["catalog_count"] == 3
+    raws = RawIngest.query.filter_by(job_id=job.id).order_by(RawIngest.page_index).all()
+    assert [(r.page_index, r.cursor) for r in raws] == [(0, "1"), (1, "2"), (2, "3")]
+    assert sorted(c.supplier_sku for c in SupplierCatalog.query.all()) == [
+        "SKU-0", "SKU-1", "SKU-2",
+    ]
+    params_used = db.session.get(ApiFetchJob, job.id).params_used
+    assert params_used["pages"] == 3
+    assert params_used["catalog_changes"] == {"created": 3, "updated": 0, "deleted": 0}
+
+
+def test_run_fetch_job_fails_without_items():
+    supplier, endpoint, mapping, job = _setup_fetch(PaginationType.NONE, None)
+    db.session.add(SupplierCatalog(supplier_id=supplier.id, description="Old"))
+    db.session.commit()
+
+    with patch("utils.etl._perform_request", return_value=_response({"items": []})):
+        with pytest.raises(RuntimeError, match="Aucune donnée"):
+            run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+
+    # Rolled back: the previous catalog is kept
+    assert [c.description for c in SupplierCatalog.query.all()] == ["Old"]
+    assert db.session.get(ApiFetchJob, job.id).status == "failed"
+
+
+class TestConditionalFetch:
+
+    def test_not_modified_feed_skips_the_sync(self):
+        supplier, endpoint, mapping, job = _setup_fetch(PaginationType.NONE, None)
+        first = _response(
+            {"items": _items(0, 2)},
+            headers={"ETag": '"v1"', "Last-Modified": "Mon, 12 Oct 2026 08:00:00 GMT"},
+        )
+        with patch("utils.etl._perform_request", return_value=first):
+            run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+        catalog_ids = sorted(c.id for c in SupplierCatalog.query.all())
+        assert endpoint.fetch_state["etag"] == '"v1"'
+
+        second_job = _new_job(endpoint, mapping)
+        with patch(
+            "utils.etl._perform_request", return_value=_response(None, status=304)
+        ) as request, patch("utils.etl._sync_prices_from_catalog") as sync_prices:
+            result = run_fetch_job(second_job.id, supplier.id, endpoint.id, mapping.id)
+
+        assert request.call_args.kwargs["extra_headers"] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 12 Oct 2026 08:00:00 GMT",
+        }
+        sync_prices.assert_not_called()
+        assert result["unchanged"] is True
+        assert result["catalog_count"] == 2
+        assert len(result["rows"]) == 2
+        assert sorted(c.id for c in SupplierCatalog.query.all()) == catalog_ids
+        second_job = db.session.get(ApiFetchJob, second_job.id)
+        assert second_job.status == "success"
+        assert second_job.params_used["unchanged"] is True
+
+    def test_identical_paginated_feed_writes_nothing(self, monkeypatch):
+        monkeypatch.setenv("ETL_FETCH_CONCURRENCY", "1")
+        supplier, endpoint, mapping, job = _setup_fetch(
+            PaginationType.PAGE, {"size_param": "size", "page_size": 2}
+        )
+        pages = [_items(0, 2), _items(2, 1)]
+        with patch(
+            "utils.etl._perform_request",
+            side_effect=[_response({"items": p}) for p in pages],
+        ):
+            run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+        catalog_ids = sorted(c.id for c in SupplierCatalog.query.all())
+
+        assert len(endpoint.fetch_state["page_digests"]) == 2
+
+        second_job = _new_job(endpoint, mapping)
+        with patch(
+            "utils.etl._perform_request",
+            side_effect=[_response({"items": p}) for p in pages],
+        ) as request, patch("utils.etl._parse_items") as parse:
+            result = run_fetch_job(second_job.id, supplier.id, endpoint.id, mapping.id)
+
+        # Paginated feeds send no validators
+        assert all(c.kwargs["extra_headers"] is None for c in request.call_args_list)
+        # Every page matched its stored digest: nothing parsed nor written
+        parse.assert_not_called()
+        assert result["unchanged"] is True
+        assert sorted(c.id for c in SupplierCatalog.query.all()) == catalog_ids
+        assert RawIngest.query.filter_by(job_id=second_job.id).count() == 0
+        assert db.session.get(ApiFetchJob, second_job.id).params_used["pages"] == 2
+
+    def test_changed_page_writes_the_whole_feed(self, monkeypatch):
+        monkeypatch.setenv("ETL_FETCH_CONCURRENCY", "1")
+        supplier, endpoint, mapping, job = _setup_fetch(
+            PaginationType.PAGE, {"size_param": "size", "page_size": 2}
+        )
+        with patch(
+            "utils.etl._perform_request",
+            side_effect=[_response({"items": p}) for p in (_items(0, 2), _items(2, 1))],
+        ):
+            run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+        first_digests = endpoint.fetch_state["page_digests"]
+
+        # Same first page, new last one
+        with patch(
+            "utils.etl._perform_request",
+            side_effect=[_response({"items": p}) for p in (_items(0, 2), _items(3, 1))],
+        ):
+            result = run_fetch_job(
+                _new_job(endpoint, mapping).id, supplier.id, endpoint.id, mapping.id
+            )
+
+        assert result["unchanged"] is False
+        assert result["catalog_count"] == 3
+        assert sorted(c.supplier_sku for c in SupplierCatalog.query.all()) == [
+            "SKU-0", "SKU-1", "SKU-3",
+        ]
+        page_digests = endpoint.fetch_state["page_digests"]
+        assert page_digests[0] == first_digests[0]
+        assert page_digests[1] != first_digests[1]
+
+    def test_held_pages_are_not_kept_in_memory(self, monkeypatch):
+        monkeypatch.setenv("ETL_FETCH_CONCURRENCY", "1")
+        supplier, endpoint, mapping, job = _setup_fetch(
+            PaginationType.PAGE, {"size_param": "size", "page_size": 2}
+        )
+        first = [_items(0, 2), _items(2, 2), _items(4, 2), _items(6, 1)]
+        with patch(
+            "utils.etl._perform_request",
+            side_effect=[_response({"items": p}) for p in first],
+        ):
+            run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+
+        # Same first three pages, new last one. Responses are built on
+        # request and only weakly referenced here
+        second = first[:3] + [_items(7, 1)]
+        alive_when_last_requested = []
+        sent = []
+
+        def perform(*args, **kwargs):
+            if len(sent) == len(second) - 1:
+                gc.collect()
+                alive_when_last_requested.extend(ref() is not None for ref in sent)
+            response = _response({"items": second[len(sent)]})
+            sent.append(weakref.ref(response))
+            return response
+
+        with patch("utils.etl._perform_request", side_effect=perform):
+            result = run_fetch_job(
+                _new_job(endpoint, mapping).id, supplier.id, endpoint.id, mapping.id
+            )
+
+        # The first held pages were released before the last one came in
+        assert alive_when_last_requested[:2] == [False, False]
+        # and were read back from their RawIngest rows
+        assert result["unchanged"] is False
+        assert result["parsed_count"] == 7
+        assert sorted(c.supplier_sku for c in SupplierCatalog.query.all()) == [
+            f"SKU-{i}" for i in (0, 1, 2, 3, 4, 5, 7)
+        ]
+
+    def test_new_import_or_mapping_forces_a_full_sync(self):
+        supplier, endpoint, mapping, job = _setup_fetch(PaginationType.NONE, None)
+        payload = {"items": _items(0, 2)}
+        with patch("utils.etl._perform_request", return_value=_response(payload)):
+            run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+
+        # The catalog was replaced by another import since
+        db.session.add(ImportHistory(filename="manual.csv", supplier_id=supplier.id, product_count=2))
+        db.session.commit()
+        with patch("utils.etl._perform_request", return_value=_response(payload)):
+            result = run_fetch_job(
+                _new_job(endpoint, mapping).id, supplier.id, endpoint.id, mapping.id
+            )
+        assert result["unchanged"] is False
+
+        db.session.add(FieldMap(
+            mapping_version_id=mapping.id, target_field="model", source_path="name",
+        ))
+        db.session.commit()
+        with patch("utils.etl._perform_request", return_value=_response(payload)):
+            result = run_fetch_job(
+                _new_job(endpoint, mapping).id, supplier.id, endpoint.id, mapping.id
+            )
+        assert result["unchanged"] is False
+        assert {c.model for c in SupplierCatalog.query.all()} == {"Phone 0", "Phone 1"}
+
+
+class TestSendWithRetry:
+
+    @staticmethod
+    def _error(status, retry_after=None):
+        response = MagicMock()
+        response.status_code = status
+        response.headers = {"Retry-After": retry_after} if retry_after else {}
+        return requests.HTTPError(response=response)
+
+    def test_retries_transient_errors_with_backoff(self):
+        ok = _response({"items": []})
+        send = MagicMock(side_effect=[
+            self._error(429, "5"), self._error(503), requests.ConnectionError(), ok,
+        ])
+        sleeps = []
+
+        assert send_with_retry(send, retries=3, backoff=1.0, sleep=sleeps.append) is ok
+        assert sleeps[0] == 5.0
+        assert 2.0 <= sleeps[1] <= 3.0
+        assert 4.0 <= sleeps[2] <= 6.0
+
+    def test_client_errors_are_not_retried(self):
+        send = MagicMock(side_effect=self._error(404))
+        with pytest.raises(requests.HTTPError):
+            send_with_retry(send, retries=3, sleep=lambda _: None)
+        assert send.call_count == 1
+
+    def test_gives_up_after_retries(self):
+        send = MagicMock(side_effect=self._error(500))
+        with pytest.raises(requests.HTTPError):
+            send_with_retry(send, retries=2, backoff=0.0, sleep=lambda _: None)
+        assert send.call_count == 3
+
+    def test_limiter_is_acquired_per_attempt(self):
+        limiter = MagicMock()
+        send = MagicMock(side_effect=[self._error(502), _response({})])
+        send_with_retry(send, limiter, retries=1, backoff=0.0, sleep=lambda _: None)
+        assert limiter.acquire.call_count == 2
+
+    def test_rate_limiter_is_shared_per_api(self):
+        first = get_rate_limiter(123, 60)
+        assert get_rate_limiter(123, 60) is first
+        assert get_rate_limiter(123, 30) is not first
+        assert get_rate_limiter(124, None).enabled is False
+
+
+def test_run_fetch_job_prefetches_pages_under_rate_limit(monkeypatch):
+    monkeypatch.setenv("ETL_FETCH_CONCURRENCY", "3")
+    supplier, endpoint, mapping, job = _setup_fetch(
+        PaginationType.PAGE, {"size_param": "size", "page_size": 2}
+    )
+    endpoint.supplier_api.rate_limit_per_min = 600
+    db.session.commit()
+    catalog = {1: _items(0, 2), 2: _items(2, 2), 3: _items(4, 1)}
+
+    def perform(api, endpoint_, query, body, url=None, extra_headers=None):
+        return _response({"items": catalog.get(query["page"], [])})
+
+    with patch("utils.etl._perform_request", side_effect=perform), \
+            patch("utils.rate_limit.TokenBucket.acquire", return_value=0.0) as acquire:
+        result = run_fetch_job(job.id, supplier.id, endpoint.id, mapping.id)
+
+    assert result["catalog_count"] == 5
+    assert acquire.call_count >= 3
+    assert [r.page_index for r in RawIngest.query.order_by(RawIngest.page_index)] == [0, 1, 2]
+
+
+class TestSessions:
+
+    @staticmethod
+    def _api(**overrides):
+        fields = dict(
+            id=901, base_url="https://api.example.com", auth_type=AuthType.API_KEY,
+            auth_config={"header": "X-Key", "value": "k1"}, default_headers=None,
+            timeout_seconds=None,
+        )
+        fields.update(overrides)
+        return SimpleNamespace(**fields)
+
+    def test_session_is_reused_until_auth_changes(self):
+        api = self._api()
+        first = get_session(api)
+        assert get_session(self._api()) is first
+
+        rotated = get_session(self._api(auth_config={"header": "X-Key", "value": "k2"}))
+        assert rotated is not first
+        close_session(api.id)
+        assert get_session(api) is not rotated
+        close_session(api.id)
+
+    def test_request_timeout(self, monkeypatch):
+        monkeypatch.setenv("ETL_REQUEST_TIMEOUT", "45")
+        assert request_timeout(self._api()) == (10.0, 45.0)
+        assert request_timeout(self._api(timeout_seconds=5)) == (5.0, 5.0)
+        assert request_timeout(self._api(timeout_seconds=120)) == (10.0, 120.0)
+
+    def test_perform_request_goes_through_the_pooled_session(self):
+        api = self._api(timeout_seconds=12)
+        endpoint = SimpleNamespace(path="/products", method="GET", content_type="application/json")
+        with patch("requests.Session.request", return_value=_response({})) as send:
+            _perform_request(api, endpoint, {"page": 1}, {})
+            _perform_request(api, endpoint, {"page": 2}, {})
+
+        assert send.call_count == 2
+        method, url = send.call_args.args
+        assert (method, url) == ("GET", "https://api.example.com/products")
+        assert send.call_args.kwargs["timeout"] == (10.0, 12.0)
+        assert send.call_args.kwargs["headers"] == {"X-Key": "k1"}
+        close_session(api.id)
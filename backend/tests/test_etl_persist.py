@@ -133,6 +133,72 @@ def test_persist_without_pending_matches():
     assert remaining[0].ean == "3333333333333"
 
 
+def test_persist_diffs_against_existing_catalog():
+    """Unchanged and updated rows keep their id (and pending matches); missing rows go."""
+    supplier, job = _setup_supplier_with_job()
+    kept = SupplierCatalog(
+        supplier_id=supplier.id, ean="1111111111111", description="Phone A", quantity=3,
+    )
+    changed = SupplierCatalog(
+        supplier_id=supplier.id, supplier_sku="SKU-B", description="Phone B",
+        selling_price=100.0,
+    )
+    # No identifier: keyed by its label
+    by_label = SupplierCatalog(supplier_id=supplier.id, description="Phone C")
+    removed = SupplierCatalog(supplier_id=supplier.id, ean="4444444444444", description="Gone")
+    db.session.add_all([kept, changed, by_label, removed])
+    db.session.flush()
+    pm = PendingMatch(
+        supplier_id=supplier.id,
+        temporary_import_id=kept.id,
+        source_label="Phone A",
+        extracted_attributes={},
+        candidates=[],
+        status="pending",
+    )
+    db.session.add(pm)
+    db.session.commit()
+    kept_id, changed_id, label_id = kept.id, changed.id, by_label.id
+
+    parsed_records = [
+        {"ean": "1111111111111", "description": "Phone A", "quantity": 3},
+        {"supplier_sku": "SKU-B", "description": "Phone B", "selling_price": 90.0},
+        {"description": "Phone C"},
+        {"ean": "5555555555555", "description": "Phone D"},
+    ]
+    _persist_supplier_catalog(job, supplier.id, parsed_records)
+    db.session.commit()
+    db.session.expire_all()
+
+    rows = {
+        r.description: r
+        for r in SupplierCatalog.query.filter_by(supplier_id=supplier.id).all()
+    }
+    assert set(rows) == {"Phone A", "Phone B", "Phone C", "Phone D"}
+    assert rows["Phone A"].id == kept_id
+    assert rows["Phone B"].id == changed_id
+    assert rows["Phone B"].selling_price == 90.0
+    assert rows["Phone C"].id == label_id
+    assert db.session.get(PendingMatch, pm.id).temporary_import_id == kept_id
+
+
+def test_persist_drops_duplicate_existing_rows():
+    supplier, job = _setup_supplier_with_job()
+    for _ in range(2):
+        db.session.add(SupplierCatalog(
+            supplier_id=supplier.id, ean="1111111111111", description="Phone A",
+        ))
+    db.session.commit()
+    first_id = min(r.id for r in SupplierCatalog.query.all())
+
+    _persist_supplier_catalog(
+        job, supplier.id, [{"ean": "1111111111111", "description": "Phone A"}]
+    )
+    db.session.commit()
+
+    assert [r.id for r in SupplierCatalog.query.all()] == [first_id]
+
+
 # ---------------------------------------------------------------------------
 # Tests: seen_eans removed — two entries with different EANs for same label
 # ---------------------------------------------------------------------------
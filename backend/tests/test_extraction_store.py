@@ -0,0 +1,110 @@
+"""Tests for utils/extraction_store.py — persisted LLM extraction results."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from models import Brand, LabelCache, LlmExtraction, Supplier, SupplierCatalog, db
+from utils import extraction_store
+from utils.llm_matching import build_context, extraction_context_fingerprint, run_matching_job
+
+ATTRS = {"brand": "Samsung", "model_family": "Galaxy S25", "storage": "256 Go"}
+
+
+def test_save_then_lookup():
+    extraction_store.save({"Galaxy S25 256GB": ATTRS}, "fp1")
+    db.session.commit()
+
+    found = extraction_store.lookup(["Galaxy S25 256GB", "iPhone 16"], "fp1")
+
+    assert found == {"Galaxy S25 256GB": ATTRS}
+    row = LlmExtraction.query.one()
+    assert row.label_hash == extraction_store.label_hash("Galaxy S25 256GB")
+    assert row.hit_count == 1
+
+
+def test_lookup_misses_other_fingerprint():
+    extraction_store.save({"Galaxy S25 256GB": ATTRS}, "fp1")
+    db.session.commit()
+    assert extraction_store.lookup(["Galaxy S25 256GB"], "fp2") == {}
+
+
+def test_lookup_ignores_expired_entries():
+    extraction_store.save({"Galaxy S25 256GB": ATTRS}, "fp1")
+    db.session.commit()
+    LlmExtraction.query.one().created_at = datetime.now(timezone.utc) - timedelta(days=100)
+    db.session.commit()
+
+    assert extraction_store.lookup(["Galaxy S25 256GB"], "fp1", ttl_days=90) == {}
+    assert extraction_store.lookup(["Galaxy S25 256GB"], "fp1", ttl_days=0) == {"Galaxy S25 256GB": ATTRS}
+
+
+def test_prune_other_fingerprints_expired_and_lru():
+    extraction_store.save({"old references": ATTRS}, "fp0")
+    extraction_store.save({f"label {i}": ATTRS for i in range(4)}, "fp1")
+    db.session.commit()
+    rows = {
+        r.label_hash: r for r in LlmExtraction.query.filter_by(context_fingerprint="fp1").all()
+    }
+    now = datetime.now(timezone.utc)
+    rows[extraction_store.label_hash("label 0")].created_at = now - timedelta(days=365)
+    rows[extraction_store.label_hash("label 1")].last_used_at = now - timedelta(days=5)
+    db.session.commit()
+
+    removed = extraction_store.prune("fp1", ttl_days=90, max_entries=2)
+    db.session.commit()
+
+    assert removed == 3
+    remaining = extraction_store.lookup([f"label {i}" for i in range(4)], "fp1")
+    assert set(remaining) == {"label 2", "label 3"}
+
+
+def test_fingerprint_tracks_references_not_few_shots():
+    db.session.add(Brand(brand="Samsung"))
+    db.session.commit()
+    context = build_context()
+    base = extraction_context_fingerprint(context)
+
+    with_examples = {**context, "few_shot_examples": [{"label": "x", "attributes": {"brand": "Samsung"}}]}
+    assert extraction_context_fingerprint(with_examples) == base
+
+    db.session.add(Brand(brand="Apple"))
+    db.session.commit()
+    assert extraction_context_fingerprint(build_context()) != base
+
+
+@pytest.fixture()
+def two_suppliers():
+    a, b = Supplier(name="Yukatel"), Supplier(name="Ensa")
+    db.session.add_all([a, b])
+    db.session.commit()
+    return a, b
+
+
+@patch("utils.llm_matching.call_llm_extraction")
+def test_run_reuses_extraction_across_suppliers(mock_llm, two_suppliers, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-dummy-key")
+    first, second = two_suppliers
+    mock_llm.return_value = [
+        {"brand": "Acme", "model_family": "Widget", "device_type": "Accessoire"}
+    ]
+    db.session.add(SupplierCatalog(
+        description="Acme Widget Pro", quantity=1, selling_price=10.0, supplier_id=first.id,
+    ))
+    db.session.commit()
+    run_matching_job(supplier_id=first.id)
+    assert mock_llm.call_count == 1
+
+    # The label cache entry is gone (e.g. cleaned up), so no cross-supplier hit
+    LabelCache.query.delete()
+    db.session.add(SupplierCatalog(
+        description="Acme Widget Pro", quantity=2, selling_price=11.0, supplier_id=second.id,
+    ))
+    db.session.commit()
+    report = run_matching_job(supplier_id=second.id)
+
+    assert mock_llm.call_count == 1
+    assert report["extraction_store_hits"] == 1
+    entry = LabelCache.query.filter_by(supplier_id=second.id).one()
+    assert entry.extracted_attributes["model_family"] == "Widget"
@@ -1,8 +1,10 @@
 """Tests for utils/llm_matching.py — LLM extraction, scoring, and orchestration."""
 
 import json
+import pickle
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from models import (
@@ -11,16 +13,27 @@ from models import (
     ColorTranslation,
     DeviceType,
     LabelCache,
+    MatchingRun,
     MemoryOption,
     ModelReference,
     PendingMatch,
     Product,
+    ProductEanHistory,
     Supplier,
     SupplierProductRef,
     SupplierCatalog,
     db,
 )
 from utils.llm_matching import (
+    CandidateMatrix,
+    CandidateStore,
+    CatalogLine,
+    FeatureCache,
+    LabelCacheWriter,
+    LabelFeatures,
+    LlmBatchSizer,
+    MatchOutcomeWriter,
+    ProductFeatures,
     _apply_post_processing,
     _clean_model_for_scoring,
     _find_fuzzy_cache_entry,
@@ -30,12 +43,20 @@ from utils.llm_matching import (
     _normalize_storage,
     build_context,
     build_extraction_prompt,
+    build_label_features,
+    build_product_features,
     call_llm_extraction,
     create_product_from_extraction,
     find_best_matches,
+    group_catalog_lines,
+    iter_catalog_lines,
+    iter_llm_extractions,
     normalize_label,
     run_matching_job,
     score_match,
+    score_matches_batch,
+    score_product_v1,
+    score_products_parallel,
 )
 
 
@@ -454,6 +475,150 @@ class TestCallLlmExtraction:
         assert mock_client.messages.create.call_count == 2
 
 
+class TestAnthropicClientReuse:
+    def _mock_module(self, text='[{"brand": "Samsung"}]'):
+        mock_module = TestCallLlmExtraction()._make_mock_anthropic()
+        mock_client = MagicMock()
+        mock_module.Anthropic.return_value = mock_client
+        mock_response = MagicMock()
+        mock_response.content = [MagicMock(text=text)]
+        mock_response.usage = MagicMock(
+            input_tokens=10, output_tokens=5,
+            cache_read_input_tokens=900, cache_creation_input_tokens=0,
+        )
+        mock_client.messages.create.return_value = mock_response
+        return mock_module, mock_client
+
+    def test_client_created_once_across_calls(self):
+        import sys
+
+        mock_module, mock_client = self._mock_module()
+        ctx = {"brands": [], "colors": {}, "storage_options": [], "model_references": {}, "device_types": []}
+        with patch.dict(sys.modules, {"anthropic": mock_module}):
+            call_llm_extraction(["a"], ctx)
+            result = call_llm_extraction(["b"], ctx)
+
+        assert mock_module.Anthropic.call_count == 1
+        assert mock_client.messages.create.call_count == 2
+        assert result[0]["_token_info"]["cache_read_input_tokens"] == 900
+
+    def test_client_recreated_when_api_key_changes(self, monkeypatch):
+        import sys
+
+        mock_module, _ = self._mock_module()
+        ctx = {"brands": [], "colors": {}, "storage_options": [], "model_references": {}, "device_types": []}
+        with patch.dict(sys.modules, {"anthropic": mock_module}):
+            monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-first")
+            call_llm_extraction(["a"], ctx)
+            monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-second")
+            call_llm_extraction(["b"], ctx)
+
+        assert mock_module.Anthropic.call_count == 2
+
+    def test_system_prompt_marked_cacheable(self):
+        import sys
+
+        mock_module, mock_client = self._mock_module()
+        ctx = {"brands": ["Samsung"], "colors": {}, "storage_options": [], "model_references": {}, "device_types": []}
+        with patch.dict(sys.modules, {"anthropic": mock_module}):
+            call_llm_extraction(["a"], ctx, system_prompt="PROMPT")
+
+        system = mock_client.messages.create.call_args.kwargs["system"]
+        assert system == [{"type": "text", "text": "PROMPT", "cache_control": {"type": "ephemeral"}}]
+
+    def test_prompt_rendered_once_for_all_batches(self):
+        with patch("utils.llm_matching.build_extraction_prompt", return_value="PROMPT") as mock_prompt, \
+                patch("utils.llm_matching.call_llm_extraction", return_value=[]) as mock_llm:
+            list(iter_llm_extractions([["a"], ["b"], ["c"]], {}, concurrency=2))
+
+        assert mock_prompt.call_count == 1
+        assert all(c.args[2] == "PROMPT" for c in mock_llm.call_args_list)
+
+
+class TestLlmBatchSizer:
+    @staticmethod
+    def _result(labels, output_tokens, split=False):
+        info = {"labels": len(labels), "label_chars": sum(map(len, labels)), "output_tokens": output_tokens}
+        if split:
+            info["split"] = True
+        return [{"_token_info": info} for _ in labels]
+
+    def test_initial_batches_use_configured_size(self):
+        sizer = LlmBatchSizer(25)
+        batches = list(sizer.batches(["label %d" % i for i in range(60)]))
+        assert [len(b) for b in batches] == [25, 25, 10]
+        assert sizer.sizes == [25, 25, 10]
+
+    def test_long_labels_shrink_batch_up_front(self):
+        sizer = LlmBatchSizer(25)
+        assert sizer.next_size(["x" * 600] * 25) < 25
+
+    def test_split_halves_cap(self):
+        sizer = LlmBatchSizer(20)
+        sizer.record(self._result(["a"] * 20, 4096, split=True))
+        assert sizer.cap == 10
+
+    def test_grows_back_after_success(self):
+        sizer = LlmBatchSizer(20, max_size=30)
+        sizer.record(self._result(["a"] * 20, 4096, split=True))
+        for _ in range(10):
+            sizer.record(self._result(["a"] * 10, 500))
+        assert sizer.cap == 30
+
+    def test_learns_token_cost_per_label(self):
+        sizer = LlmBatchSizer(50, max_size=50)
+        for _ in range(20):
+            sizer.record(self._result(["a"] * 10, 3000))  # ~300 tokens per label
+        assert 250 < sizer.overhead < 310
+        assert sizer.next_size(["a"] * 50) <= 4096 * 0.8 // 250
+
+    def test_batches_sized_lazily(self):
+        sizer = LlmBatchSizer(10)
+        gen = sizer.batches(list(range(40)), label=lambda item: "x")
+        assert len(next(gen)) == 10
+        sizer.record(self._result(["x"] * 10, 4096, split=True))
+        assert len(next(gen)) == 5
+
+
+class TestIterLlmExtractions:
+    CTX = {"brands": [], "colors": {}, "storage_options": [], "model_references": {}, "device_types": []}
+
+    @pytest.mark.parametrize("concurrency", [1, 4])
+    def test_results_follow_batch_order(self, concurrency):
+        import time as _time
+
+        def fake_extract(labels, context, system_prompt=None):
+            # Earlier batches finish last
+            _time.sleep(0.02 * (5 - int(labels[0])))
+            return [{"label": label} for label in labels]
+
+        batches = [[str(i)] for i in range(5)]
+        with patch("utils.llm_matching.call_llm_extraction", side_effect=fake_extract):
+            results = list(iter_llm_extractions(batches, self.CTX, concurrency=concurrency))
+
+        assert [index for index, _, _ in results] == [0, 1, 2, 3, 4]
+        assert [r[1][0]["label"] for r in results] == ["0", "1", "2", "3", "4"]
+
+    def test_errors_are_reported_per_batch(self):
+        def fake_extract(labels, context, system_prompt=None):
+            if labels == ["bad"]:
+                raise RuntimeError("boom")
+            return [{"label": labels[0]}]
+
+        with patch("utils.llm_matching.call_llm_extraction", side_effect=fake_extract):
+            results = list(iter_llm_extractions([["a"], ["bad"], ["c"]], self.CTX, concurrency=3))
+
+        assert results[0][1] == [{"label": "a"}] and results[0][2] is None
+        assert results[1][1] is None and str(results[1][2]) == "boom"
+        assert results[2][1] == [{"label": "c"}]
+
+    def test_limiter_acquired_per_batch(self):
+        limiter = MagicMock()
+        with patch("utils.llm_matching.call_llm_extraction", return_value=[]):
+            list(iter_llm_extractions([["a"], ["b"], ["c"]], self.CTX, concurrency=2, limiter=limiter))
+        assert limiter.acquire.call_count == 3
+
+
 # ---------------------------------------------------------------------------
 # Tests: score_match
 # ---------------------------------------------------------------------------
@@ -972,6 +1137,300 @@ class TestScoreMatch:
         assert score > 0
 
 
+class TestFeatureCache:
+    def test_features_match_raw_scoring(self, product_s25, product_iphone, color_translations):
+        mappings = {
+            "color_translations": {"black": "Noir", "white": "Blanc"},
+            "color_words": {"noir", "black", "blanc", "white"},
+        }
+        extractions = [
+            {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "256 Go",
+             "color": "Black", "raw_label": "Samsung Galaxy S25 Ultra 5G 256GB Black"},
+            {"brand": "Apple", "model_family": "iPhone 16 Pro", "storage": "128 Go",
+             "color": "White", "raw_label": "Apple iPhone 16 Pro 128GB White DS"},
+            {"brand": "Apple", "model_family": "iPhone 15 Pro", "storage": "128 Go",
+             "region": "US"},
+        ]
+        for extracted in extractions:
+            for product in (product_s25, product_iphone):
+                expected = score_match(extracted, product, mappings)
+                got = score_match(
+                    build_label_features(extracted, mappings),
+                    build_product_features(product, mappings),
+                    mappings,
+                )
+                assert got == expected
+
+    def test_product_features_memoized(self, product_s25):
+        cache = FeatureCache({})
+        first = cache.product(product_s25)
+        assert isinstance(first, ProductFeatures)
+        assert cache.product(product_s25) is first
+
+    def test_product_features_rebuilt_when_model_changes(self, product_s25):
+        cache = FeatureCache({})
+        first = cache.product(product_s25)
+        product_s25.model = "Galaxy S25"
+        second = cache.product(product_s25)
+        assert second is not first
+        assert "ultra" not in second.variants
+
+    def test_label_features_memoized(self, supplier):
+        entry = LabelCache(
+            supplier_id=supplier.id,
+            normalized_label="samsung galaxy s25 ultra 256go",
+            match_source="extracted",
+            extracted_attributes={"brand": "Samsung", "model_family": "Galaxy S25 Ultra"},
+        )
+        db.session.add(entry)
+        db.session.commit()
+        cache = FeatureCache({})
+        first = cache.label(entry)
+        assert isinstance(first, LabelFeatures)
+        assert first.brand == "samsung"
+        assert first.region == "EU"
+        assert cache.label(entry) is first
+        assert not hasattr(first, "__dict__")
+
+    def test_label_values_are_interned(self, supplier):
+        attrs = {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "256 Go",
+                 "color": "Noir"}
+        entries = [
+            LabelCache(id=i + 1, supplier_id=supplier.id, normalized_label=f"label {i}",
+                       match_source="extracted", extracted_attributes=dict(attrs))
+            for i in range(2)
+        ]
+        cache = FeatureCache({})
+        first, second = (cache.label(entry) for entry in entries)
+        assert first == build_label_features(attrs, {})
+        for name in ("brand", "model", "model_base", "storage", "color", "variants"):
+            assert getattr(first, name) is getattr(second, name)
+
+
+class TestScoreMatchesBatch:
+    EXTRACTIONS = [
+        {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "256 Go", "color": "Noir"},
+        {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "512 Go", "color": "Noir"},
+        {"brand": "Apple", "model_family": "Galaxy S25 Ultra", "storage": "256 Go"},
+        {"brand": "Samsung", "model_family": "Galaxy S24 Ultra", "storage": "256 Go"},
+        {"brand": "Samsung", "model_family": "Galaxy S25+", "storage": "256 Go"},
+        {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "color": "Blanc"},
+        {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "region": "US"},
+        {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "device_type": "Tablette"},
+        {"brand": None, "model_family": "Galaxy S25 Ultra", "color": "Black",
+         "raw_label": "Galaxy S25 Ultra 256GB Black"},
+    ]
+
+    def _matrix(self, mappings):
+        entries = [
+            LabelCache(id=i + 1, supplier_id=1, normalized_label=f"label {i}",
+                       match_source="extracted", extracted_attributes=attrs)
+            for i, attrs in enumerate(self.EXTRACTIONS)
+        ]
+        cache = FeatureCache(mappings)
+        return cache, CandidateMatrix.from_entries(entries, cache)
+
+    def test_matches_score_match(self, product_s25, device_type, color_translations):
+        product_s25.type_id = device_type.id
+        db.session.commit()
+        mappings = {"color_translations": {"black": "Noir"}, "color_words": {"noir", "black"}}
+        cache, matrix = self._matrix(mappings)
+
+        scored, first_disqualified = score_matches_batch(cache.product(product_s25), matrix)
+
+        expected_scored = []
+        expected_disqualified = None
+        for row, attrs in enumerate(self.EXTRACTIONS):
+            score, details = score_match(attrs, product_s25, mappings)
+            if score > 0:
+                expected_scored.append((score, details, row))
+            elif expected_disqualified is None and details.get("disqualified"):
+                expected_disqualified = (details, row)
+        assert scored == expected_scored
+        assert first_disqualified == expected_disqualified
+        assert [row for _, _, row in scored] == [0, 8]
+        assert first_disqualified[0]["disqualified"] == "storage_mismatch"
+
+    def test_counts_every_disqualified_row(self, product_s25, device_type):
+        product_s25.type_id = device_type.id
+        db.session.commit()
+        mappings = {"color_translations": {"black": "Noir"}, "color_words": {"noir", "black"}}
+        cache, matrix = self._matrix(mappings)
+
+        reasons = {}
+        score_matches_batch(cache.product(product_s25), matrix, reasons=reasons)
+
+        expected = {}
+        for attrs in self.EXTRACTIONS:
+            score, details = score_match(attrs, product_s25, mappings)
+            if details.get("disqualified"):
+                reason = details["disqualified"]
+                expected[reason] = expected.get(reason, 0) + 1
+        assert reasons == expected
+        assert sum(reasons.values()) == 7
+
+    def test_respects_row_subset(self, product_s25):
+        cache, matrix = self._matrix({})
+        scored, first_disqualified = score_matches_batch(
+            cache.product(product_s25), matrix, np.array([6, 2, 0])
+        )
+        assert [row for _, _, row in scored] == [0]
+        assert first_disqualified[1] == 6
+        assert first_disqualified[0]["disqualified"] == "region_mismatch"
+
+    def test_empty_rows(self, product_s25):
+        cache, matrix = self._matrix({})
+        assert score_matches_batch(
+            cache.product(product_s25), matrix, np.array([], dtype=np.int64)
+        ) == ([], None)
+
+    def test_score_product_v1_filters_by_brand_and_applies_ean_bonus(self, product_s25):
+        cache, matrix = self._matrix(
+            {"color_translations": {"black": "Noir"}, "color_words": {"noir", "black"}}
+        )
+        prod = cache.product(product_s25)
+        brand_to_rows = {"samsung": [6], "": [8]}
+        (score, details, row), first_disqualified, _, reasons = score_product_v1(
+            prod, "samsung", matrix, brand_to_rows, {}
+        )
+        assert row == 8 and "ean_bonus" not in details
+        assert first_disqualified[1] == 6
+        assert reasons == {"region_mismatch": 1}
+
+        top, _, ranked, _ = score_product_v1(
+            prod, "samsung", matrix, brand_to_rows, {8: frozenset({product_s25.id})},
+            keep_pairs=5,
+        )
+        assert top[0] == min(score + 20, 100)
+        assert top[1]["ean_bonus"] == 20
+        # The ledger keeps raw scores: the bonus depends on tonight's EANs
+        assert ranked == [(score, 8)]
+        assert score_product_v1(prod, "apple", matrix, {}, {}) == (None, None, [], {})
+
+    def test_score_product_v1_rescores_winning_pair_without_details(self, product_s25):
+        cache, matrix = self._matrix({})
+        prod = cache.product(product_s25)
+        brand_to_rows = {"samsung": [0, 1, 3, 4, 5, 6, 7], "": [8]}
+        expected, _, ranked, _ = score_product_v1(
+            prod, "samsung", matrix, brand_to_rows, {}, keep_pairs=2
+        )
+        assert [row for _, row in ranked][0] == expected[2]
+
+        # Nothing changed since run 1: the ledger pairs alone give the result
+        label_runs = np.ones(len(matrix), dtype=np.int64)
+        stored = [(score, None, row) for score, row in ranked]
+        top, _, again, _ = score_product_v1(
+            prod, "samsung", matrix, brand_to_rows, {}, label_runs, 1, stored, keep_pairs=2,
+        )
+        assert top == expected
+        assert again == ranked
+
+    def test_parallel_scoring_matches_sequential(self, product_s25, product_iphone):
+        cache, matrix = self._matrix({})
+        brand_to_rows = {"samsung": [0, 1, 3, 4, 5, 6, 7], "apple": [2], "": [8]}
+        items = [
+            (cache.product(product), brand, -1, [], ())
+            for product in (product_s25, product_iphone, product_s25)
+            for brand in ("samsung", "apple", "")
+        ]
+        expected = [
+            score_product_v1(prod, brand, matrix, brand_to_rows, {}, keep_pairs=3)
+            for prod, brand, _, _, _ in items
+        ]
+        results = score_products_parallel(
+            items, matrix, brand_to_rows, {}, workers=2, keep_pairs=3
+        )
+        # Lazy: nothing is scored before the results are read
+        assert not isinstance(results, list)
+        assert list(results) == expected
+
+    def test_pickled_matrix_keeps_columns_only(self):
+        cache, matrix = self._matrix({})
+        clone = pickle.loads(pickle.dumps(matrix))
+        assert clone.entries == [] and len(clone) == len(matrix)
+        assert (clone.brand == matrix.brand).all()
+
+
+class TestCandidateStore:
+    def _entries(self, supplier, product_s25):
+        entries = [
+            LabelCache(supplier_id=supplier.id, normalized_label="galaxy s25 ultra",
+                       match_source="extracted",
+                       extracted_attributes={"brand": " Samsung", "raw_label": "Galaxy S25 Ultra"}),
+            LabelCache(supplier_id=supplier.id, normalized_label="unknown thing",
+                       match_source="extracted", extracted_attributes={}),
+            LabelCache(supplier_id=supplier.id, normalized_label="already matched",
+                       match_source="auto", product_id=product_s25.id,
+                       extracted_attributes={"brand": "Samsung"}),
+        ]
+        db.session.add_all(entries)
+        db.session.commit()
+        for entry in entries:
+            db.session.expunge(entry)
+
+    def test_load_keeps_unmatched_extracted_rows_only(self, supplier, product_s25):
+        self._entries(supplier, product_s25)
+
+        store = CandidateStore.load()
+
+        assert [e.normalized_label for e in store.entries] == ["galaxy s25 ultra", "unknown thing"]
+        assert not any(isinstance(obj, LabelCache) for obj in db.session.identity_map.values())
+        entry = store.entries[0]
+        assert entry.supplier_id == supplier.id
+        assert entry.extracted_attributes == {"brand": " Samsung", "raw_label": "Galaxy S25 Ultra"}
+        # Each access decodes a fresh dict
+        entry.extracted_attributes["brand"] = "changed"
+        assert entry.extracted_attributes["brand"] == " Samsung"
+        assert store.brand_rows() == {"samsung": [0], "": [1]}
+        assert len(CandidateStore.load(supplier_id=supplier.id + 1)) == 0
+
+    def test_feeds_candidate_matrix_and_bm25(self, supplier, product_s25):
+        from utils.matching.bm25_blocker import BM25Blocker
+
+        self._entries(supplier, product_s25)
+        store = CandidateStore.load()
+
+        matrix = CandidateMatrix.from_entries(store.entries, FeatureCache({}))
+        assert matrix.row_by_id == {e.id: row for row, e in enumerate(store.entries)}
+        found = BM25Blocker(store.entries).get_candidates(product_s25, top_k=1)
+        assert [e.id for e in found] == [store.entries[0].id]
+
+
+class TestCatalogLines:
+    def test_streams_narrow_tuples_grouped_by_label(self, supplier):
+        other = Supplier(name="Other")
+        db.session.add(other)
+        db.session.commit()
+        lines = [
+            SupplierCatalog(description="Galaxy S25 Ultra", ean="111", quantity=1,
+                            selling_price=1.0, supplier_id=supplier.id),
+            SupplierCatalog(model="GALAXY  S25 ultra", supplier_sku="SKU", quantity=1,
+                            selling_price=1.0, supplier_id=supplier.id),
+            SupplierCatalog(description="Galaxy S25 Ultra", quantity=1,
+                            selling_price=1.0, supplier_id=other.id),
+            SupplierCatalog(description="", quantity=1, selling_price=1.0,
+                            supplier_id=supplier.id),
+        ]
+        db.session.add_all(lines)
+        db.session.commit()
+        ids = [line.id for line in lines]
+        for line in lines:
+            db.session.expunge(line)
+
+        streamed = list(iter_catalog_lines(supplier.id))
+        grouped = group_catalog_lines(iter_catalog_lines())
+
+        assert [line.id for line in streamed] == [ids[0], ids[1], ids[3]]
+        assert streamed[0] == CatalogLine(
+            ids[0], supplier.id, "Galaxy S25 Ultra", None, "111", None, None
+        )
+        assert not any(isinstance(obj, SupplierCatalog) for obj in db.session.identity_map.values())
+        assert {key: [line.id for line in group] for key, group in grouped.items()} == {
+            (supplier.id, "galaxy s25 ultra"): [ids[0], ids[1]],
+            (other.id, "galaxy s25 ultra"): [ids[2]],
+        }
+
+
 class TestExtractModelVersions:
     def test_iphone_15_pro(self):
         from utils.llm_matching import _extract_model_versions
@@ -1297,6 +1756,156 @@ class TestFindFuzzyCacheEntry:
 # ---------------------------------------------------------------------------
 
 
+class TestLabelCacheWriter:
+    def test_save_extraction_inserts_and_keeps_existing_match(self, supplier, product_s25):
+        existing = LabelCache(
+            supplier_id=supplier.id,
+            normalized_label="galaxy s25 ultra",
+            product_id=product_s25.id,
+            match_score=95,
+            match_source="auto",
+        )
+        db.session.add(existing)
+        db.session.commit()
+
+        writer = LabelCacheWriter(run_id=None)
+        writer.save_extraction(supplier.id, "galaxy s25 ultra", {"brand": "Samsung"})
+        writer.save_extraction(supplier.id, "iphone 16", {"brand": "Apple"})
+        writer.flush()
+        db.session.commit()
+        db.session.expire_all()
+
+        updated = LabelCache.query.filter_by(normalized_label="galaxy s25 ultra").one()
+        assert updated.extracted_attributes == {"brand": "Samsung"}
+        assert updated.product_id == product_s25.id
+        assert updated.match_source == "auto"
+        created = LabelCache.query.filter_by(normalized_label="iphone 16").one()
+        assert created.match_source == "extracted"
+        assert created.product_id is None
+        assert created.created_at is not None
+
+    def test_attr_share_and_supplier_ref_upsert(self, supplier, product_s25):
+        db.session.add(SupplierProductRef(
+            supplier_id=supplier.id, normalized_label="samsung galaxy s25 ultra", ean="OLD",
+        ))
+        ti = SupplierCatalog(
+            description="Samsung Galaxy S25 Ultra", ean="NEW", quantity=1,
+            selling_price=1.0, supplier_id=supplier.id,
+        )
+        db.session.add(ti)
+        db.session.commit()
+
+        writer = LabelCacheWriter(run_id=None)
+        writer.save_attr_share(supplier.id, "samsung galaxy s25 ultra", product_s25.id, {"brand": "Samsung"})
+        writer.save_supplier_ref(ti, product_s25.id)
+        writer.flush()
+        db.session.commit()
+        db.session.expire_all()
+
+        cache = LabelCache.query.one()
+        assert (cache.product_id, cache.match_source) == (product_s25.id, "attr_share")
+        ref = SupplierProductRef.query.one()
+        assert (ref.product_id, ref.ean) == (product_s25.id, "NEW")
+
+    @patch("utils.llm_matching.call_llm_extraction")
+    def test_phase1_label_cache_queries_do_not_grow_with_labels(
+        self, mock_llm, supplier, monkeypatch
+    ):
+        from sqlalchemy import event
+
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-dummy-key")
+        mock_llm.return_value = []
+
+        def count_label_cache_selects(n_labels):
+            for i in range(n_labels):
+                label = f"cached gadget {n_labels} {i}"
+                db.session.add(SupplierCatalog(
+                    description=label, quantity=1, selling_price=1.0, supplier_id=supplier.id,
+                ))
+                db.session.add(LabelCache(
+                    supplier_id=supplier.id, normalized_label=normalize_label(label),
+                    match_source="extracted", extracted_attributes={"brand": "Acme"},
+                ))
+            db.session.commit()
+            statements = []
+
+            def before_execute(conn, cursor, statement, *args):
+                if statement.lstrip().upper().startswith("SELECT") and "label_cache" in statement:
+                    statements.append(statement)
+
+            engine = db.engine
+            event.listen(engine, "before_cursor_execute", before_execute)
+            try:
+                run_matching_job(supplier_id=supplier.id)
+            finally:
+                event.remove(engine, "before_cursor_execute", before_execute)
+            return len(statements)
+
+        assert count_label_cache_selects(3) == count_label_cache_selects(30)
+
+
+class TestMatchOutcomeWriter:
+    def _pm(self, supplier, status="pending"):
+        pm = PendingMatch(
+            supplier_id=supplier.id, source_label="label", extracted_attributes={},
+            candidates=[{"product_id": 1, "score": 60}], status=status,
+        )
+        db.session.add(pm)
+        return pm
+
+    def test_flush_applies_every_outcome(self, supplier, product_s25):
+        kept, removed = self._pm(supplier), self._pm(supplier, "rejected")
+        entry = LabelCache(
+            supplier_id=supplier.id, normalized_label="galaxy s25", match_source="extracted",
+        )
+        ti = SupplierCatalog(
+            description="Galaxy S25", ean="123", quantity=1, selling_price=1.0,
+            supplier_id=supplier.id,
+        )
+        db.session.add_all([entry, ti])
+        db.session.commit()
+
+        writer = MatchOutcomeWriter(run_id=None)
+        writer.update_pending(kept, candidates=[{"product_id": 1, "score": 80}])
+        writer.delete_pending(removed)
+        writer.update_pending(removed, status="pending")  # ignored once deleted
+        writer.add_pending(
+            supplier_id=supplier.id, source_label="new", extracted_attributes={},
+            candidates=[], status="rejected",
+        )
+        writer.match_label(entry.id, product_id=product_s25.id, match_source="auto")
+        writer.save_supplier_ref(ti, product_s25.id)
+        writer.log_ean(product_s25.id, ti.ean, supplier.id, "auto_match")
+        writer.log_ean(product_s25.id, None, supplier.id, "auto_match")
+
+        # Loaded pending matches already reflect the outcome before the flush
+        assert kept.candidates[0]["score"] == 80
+        writer.flush()
+        db.session.commit()
+        db.session.expire_all()
+
+        statuses = sorted((pm.source_label, pm.status) for pm in PendingMatch.query.all())
+        assert statuses == [("label", "pending"), ("new", "rejected")]
+        assert PendingMatch.query.filter_by(source_label="new").one().created_at is not None
+        assert db.session.get(PendingMatch, kept.id).candidates[0]["score"] == 80
+        assert (entry.product_id, entry.match_source) == (product_s25.id, "auto")
+        assert SupplierProductRef.query.one().product_id == product_s25.id
+        assert [h.ean for h in ProductEanHistory.query.all()] == ["123"]
+
+    def test_chunked_flush(self, supplier):
+        pms = [self._pm(supplier) for _ in range(5)]
+        db.session.commit()
+
+        writer = MatchOutcomeWriter(run_id=None, chunk_size=2)
+        for pm in pms:
+            writer.update_pending(pm, status="rejected")
+        writer.flush()
+        db.session.commit()
+        db.session.expire_all()
+
+        assert {pm.status for pm in PendingMatch.query.all()} == {"rejected"}
+
+
 class TestRunMatchingJob:
     @pytest.fixture(autouse=True)
     def _set_api_key(self, monkeypatch):
@@ -1368,6 +1977,51 @@ class TestRunMatchingJob:
         assert "duration_seconds" in report
         assert "remaining" in report
 
+        profile = db.session.get(MatchingRun, report["run_id"]).profile
+        assert {
+            "catalog_load", "cache_lookup", "llm_batches", "attr_share",
+            "phase1_writes", "cleanup", "phase2_setup", "scoring", "writes",
+        } <= set(profile["phases"])
+        assert profile["counters"]["catalog_labels"] == 2
+        assert profile["counters"]["products"] == 1
+        assert profile["queries"] > 0
+
+    @patch("utils.llm_matching.call_llm_extraction")
+    def test_phase2_worker_processes(
+        self,
+        mock_llm,
+        monkeypatch,
+        supplier,
+        product_s25,
+        product_iphone,
+        brand_samsung,
+        memory_256,
+        color_noir,
+        device_type,
+        color_translations,
+    ):
+        monkeypatch.setenv("MATCHING_WORKERS", "2")
+        db.session.add(SupplierCatalog(
+            description="Samsung Galaxy S25 Ultra 256Go Noir", quantity=5,
+            selling_price=1200.0, ean="1234567890123", supplier_id=supplier.id,
+        ))
+        db.session.commit()
+        mock_llm.return_value = [{
+            "brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "256 Go",
+            "color": "Noir", "device_type": "Smartphone", "region": None,
+        }]
+
+        report = run_matching_job(supplier_id=supplier.id)
+
+        assert report["total_products"] == 2
+        assert report["auto_matched"] == 1
+        entry = LabelCache.query.one()
+        assert (entry.product_id, entry.match_source) == (product_s25.id, "auto")
+        assert SupplierProductRef.query.one().product_id == product_s25.id
+        # The pool starts while the results are read: its time lands in "scoring"
+        profile = db.session.get(MatchingRun, report["run_id"]).profile
+        assert profile["phases"]["scoring"]["wall_s"] > 0.01
+
     @patch("utils.llm_matching.call_llm_extraction")
     def test_limit_parameter(
         self,
@@ -1408,6 +2062,40 @@ class TestRunMatchingJob:
         report = run_matching_job(supplier_id=supplier.id, limit=1)
         assert report["remaining"] >= 0
 
+    @patch("utils.llm_matching.call_llm_extraction")
+    def test_concurrent_batches_saved_per_label(
+        self, mock_llm, supplier, monkeypatch
+    ):
+        """Concurrent Phase 1 batches must write each extraction to its own label."""
+        monkeypatch.setenv("LLM_BATCH_SIZE", "1")
+        monkeypatch.setenv("LLM_BATCH_SIZE_MAX", "1")
+        monkeypatch.setenv("LLM_CONCURRENCY", "3")
+        monkeypatch.setenv("LLM_REQUESTS_PER_MIN", "0")
+        for i in range(4):
+            db.session.add(SupplierCatalog(
+                description=f"Gadget {i}",
+                quantity=1,
+                selling_price=10.0,
+                ean=f"EAN-CONC-{i:05d}",
+                supplier_id=supplier.id,
+            ))
+        db.session.commit()
+
+        mock_llm.side_effect = lambda labels, context, system_prompt=None: [
+            {"brand": "Acme", "model_family": labels[0], "device_type": "Accessoire"}
+        ]
+
+        report = run_matching_job(supplier_id=supplier.id)
+
+        assert report["llm_calls"] == 4
+        assert report["errors"] == 0
+        assert report["llm_batch_sizes"] == [1, 1, 1, 1]
+        assert db.session.get(MatchingRun, report["run_id"]).llm_batch_sizes == [1, 1, 1, 1]
+        entries = LabelCache.query.filter_by(supplier_id=supplier.id).all()
+        assert len(entries) == 4
+        for entry in entries:
+            assert entry.extracted_attributes["model_family"] == entry.extracted_attributes["raw_label"]
+
     @patch("utils.llm_matching.call_llm_extraction")
     def test_cache_hit(
         self,
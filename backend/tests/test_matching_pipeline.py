@@ -104,6 +104,114 @@ class TestBM25Blocker:
         assert candidates[0].id == 1
 
 
+class TestBM25Index:
+
+    DOCS = {
+        1: "Samsung Galaxy S25 Ultra 256Go Noir",
+        2: "Samsung Galaxy S25 128Go Blanc",
+        3: "Apple iPhone 16 Pro 256Go",
+        4: "Apple iPhone 16 128Go Noir",
+        5: "Xiaomi Redmi Note 13",
+    }
+
+    def _index(self, docs=None):
+        from utils.matching.bm25_index import BM25Index
+        index = BM25Index()
+        index.sync((doc_id, text) for doc_id, text in (docs or self.DOCS).items())
+        return index
+
+    def test_same_ranking_as_rank_bm25(self):
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        from utils.matching.bm25_index import tokenize
+        ids = list(self.DOCS)
+        reference = rank_bm25.BM25Plus([tokenize(self.DOCS[i]) for i in ids])
+        index = self._index()
+        for query in ("samsung galaxy 256go", "iphone noir", "redmi", "unknown"):
+            scores = reference.get_scores(tokenize(query))
+            expected = sorted(
+                ((score, ids[i]) for i, score in enumerate(scores) if score > 0),
+                key=lambda item: item[0], reverse=True,
+            )[:4]
+            results = index.search(query, top_k=4)
+            assert [doc_id for doc_id, _ in results] == [doc_id for _, doc_id in expected]
+            assert [score for _, score in results] == pytest.approx([s for s, _ in expected])
+
+    def test_fixed_bm25plus_scores(self):
+        # Reference values computed with rank_bm25.BM25Plus on DOCS
+        index = self._index()
+        expected = {
+            "samsung galaxy 256go": [(1, 6.319540), (2, 5.493061), (3, 4.394449), (4, 3.295837)],
+            "iphone noir": [(4, 4.394449), (3, 3.295837), (1, 3.205126), (2, 2.197225)],
+            "unknown": [],
+        }
+        for query, ranking in expected.items():
+            results = index.search(query, top_k=4)
+            assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in ranking]
+            assert [score for _, score in results] == pytest.approx(
+                [score for _, score in ranking], abs=1e-5
+            )
+        results = index.search("redmi", top_k=4)
+        assert results[0][0] == 5
+        assert [score for _, score in results] == pytest.approx(
+            [3.760726, 1.791759, 1.791759, 1.791759], abs=1e-5
+        )
+
+    def test_add_remove_match_a_fresh_index(self):
+        index = self._index()
+        index.remove(2)
+        index.add(3, "Apple iPhone 17 Pro 512Go")
+        index.add(6, "Samsung Galaxy Tab S10")
+        fresh = self._index({
+            1: self.DOCS[1], 3: "Apple iPhone 17 Pro 512Go", 4: self.DOCS[4],
+            5: self.DOCS[5], 6: "Samsung Galaxy Tab S10",
+        })
+        for query in ("samsung galaxy", "iphone 17 pro", "noir"):
+            assert index.search(query, top_k=5) == pytest.approx(fresh.search(query, top_k=5))
+        index.compact()
+        assert index.search("samsung galaxy", top_k=5) == pytest.approx(
+            fresh.search("samsung galaxy", top_k=5)
+        )
+
+    def test_save_load_and_sync_changes_only(self, tmp_path, monkeypatch):
+        from utils.matching import bm25_index
+        monkeypatch.setattr(bm25_index, "_BM25_DIR", str(tmp_path))
+        index = self._index()
+        index.save()
+
+        loaded = bm25_index.BM25Index.load()
+        assert loaded.size == 5
+        assert loaded.search("iphone 16", top_k=3) == pytest.approx(index.search("iphone 16", top_k=3))
+        docs = {**self.DOCS, 3: "Apple iPhone 16e"}
+        del docs[5]
+        assert loaded.sync(docs.items()) == (1, 1)
+        assert 5 not in loaded
+        assert loaded.search("16e", top_k=1)[0][0] == 3
+
+    def test_load_ignores_missing_or_outdated_file(self, tmp_path, monkeypatch):
+        from utils.matching import bm25_index
+        monkeypatch.setattr(bm25_index, "_BM25_DIR", str(tmp_path))
+        assert bm25_index.BM25Index.load() is None
+        self._index().save()
+        monkeypatch.setattr(bm25_index, "INDEX_VERSION", bm25_index.INDEX_VERSION + 1)
+        assert bm25_index.BM25Index.load() is None
+
+    def test_persistent_blocker_reuses_saved_index(self, tmp_path, monkeypatch):
+        from utils.matching import bm25_index
+        from utils.matching.bm25_blocker import BM25Blocker
+        monkeypatch.setattr(bm25_index, "_BM25_DIR", str(tmp_path))
+        entries = [
+            _make_cache_entry(i, 10, text.lower(), {"raw_label": text})
+            for i, text in self.DOCS.items()
+        ]
+        first = BM25Blocker.persistent(entries)
+        assert (first.added, first.removed) == (5, 0)
+
+        second = BM25Blocker.persistent(entries[:4])
+        assert (second.added, second.removed) == (0, 1)
+        product = _make_product(1, brand="Samsung", model="Galaxy S25 Ultra")
+        assert second.get_candidates(product, top_k=1)[0].id == 1
+
+
 # ---------------------------------------------------------------------------
 # Embedder
 # ---------------------------------------------------------------------------
@@ -130,6 +238,107 @@ class TestEmbedder:
         assert label_cache_to_text({}) == ""
 
 
+class TestEmbeddingStore:
+
+    @staticmethod
+    def _encoder(calls):
+        def encode(texts):
+            calls.append(list(texts))
+            return np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+        return encode
+
+    def test_encodes_only_unseen_texts(self, tmp_path):
+        from utils.matching.embedding_store import EmbeddingStore
+        calls = []
+        store = EmbeddingStore("model-a", directory=str(tmp_path))
+
+        first = store.embed(["aa", "bbb", "aa"], self._encoder(calls))
+        second = store.embed(["bbb", "cccc"], self._encoder(calls))
+
+        assert calls == [["aa", "bbb"], ["cccc"]]
+        assert first[:, 0].tolist() == [2, 3, 2]
+        assert second[:, 0].tolist() == [3, 4]
+
+        # Another instance (next run, other process) reads the appended rows
+        reopened = EmbeddingStore("model-a", directory=str(tmp_path))
+        assert reopened.size == 3
+        assert reopened.embed(["cccc", "aa"], self._encoder(calls))[:, 0].tolist() == [4, 2]
+        assert len(calls) == 2
+
+    def test_fingerprints_are_isolated(self, tmp_path):
+        from utils.matching.embedding_store import EmbeddingStore
+        calls = []
+        EmbeddingStore("model-a", directory=str(tmp_path)).embed(["aa"], self._encoder(calls))
+        EmbeddingStore("model-b", directory=str(tmp_path)).embed(["aa"], self._encoder(calls))
+        assert calls == [["aa"], ["aa"]]
+
+    def test_compact_keeps_touched_rows(self, tmp_path):
+        from utils.matching.embedding_store import EmbeddingStore
+        calls = []
+        EmbeddingStore("model-old", directory=str(tmp_path)).embed(["x"], self._encoder(calls))
+        store = EmbeddingStore("model-a", directory=str(tmp_path))
+        store.embed(["a", "bb", "ccc", "dddd"], self._encoder(calls))
+        reader = EmbeddingStore("model-a", directory=str(tmp_path))
+
+        store.touched = set()
+        store.embed(["ccc"], self._encoder(calls))
+        assert store.compact() is True
+
+        assert store.size == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["model-a"]
+        # The other instance notices the new generation before appending
+        reader.embed(["eeeee"], self._encoder(calls))
+        assert store.embed(["ccc", "eeeee"], self._encoder(calls))[:, 0].tolist() == [3, 5]
+        assert calls[-1] == ["eeeee"]
+        # Every row touched since the compaction: no rewrite
+        assert store.compact() is False
+
+    def test_compact_keeps_indexed_label_keys(self, tmp_path, monkeypatch):
+        from utils.matching import embedder, embedding_store
+        calls = []
+        monkeypatch.setattr(embedding_store, "_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(embedder, "_store", None)
+        monkeypatch.setattr(embedder, "model_fingerprint", lambda: "test-model")
+        monkeypatch.setattr(embedder, "embed_texts", self._encoder(calls))
+        entries = [
+            _make_cache_entry(i, 10, f"l{i}", {"brand": brand})
+            for i, brand in enumerate(("Samsung", "Apple", "Xiaomi", "Google", "Nokia"), 1)
+        ]
+        embedder.compute_label_embeddings(entries)
+        store = embedder.get_embedding_store()
+
+        # Next run: the FAISS sync re-embeds nothing, only products are touched
+        store.touched = set()
+        embedder.compute_product_embeddings([])
+        assert embedder.compact_embedding_store(
+            embedder.label_text_keys(entries[:2]).values()
+        ) is True
+
+        assert store.size == 2
+        embedder.compute_label_embeddings(entries)
+        assert calls[-1] == ["Xiaomi", "Google", "Nokia"]
+
+    def test_compute_label_embeddings_uses_store(self, tmp_path, monkeypatch):
+        from utils.matching import embedder, embedding_store
+        calls = []
+        monkeypatch.setattr(embedding_store, "_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(embedder, "_store", None)
+        monkeypatch.setattr(embedder, "model_fingerprint", lambda: "test-model")
+        monkeypatch.setattr(embedder, "embed_texts", self._encoder(calls))
+        entries = [
+            _make_cache_entry(1, 10, "a", {"brand": "Samsung"}),
+            _make_cache_entry(2, 10, "b", {"brand": "Apple"}),
+        ]
+
+        first = embedder.compute_label_embeddings(entries)
+        entries.append(_make_cache_entry(3, 10, "c", {"brand": "Xiaomi"}))
+        second = embedder.compute_label_embeddings(entries)
+
+        assert calls == [["Samsung", "Apple"], ["Xiaomi"]]
+        assert set(second) == {1, 2, 3}
+        assert second[1].tolist() == first[1].tolist()
+
+
 # ---------------------------------------------------------------------------
 # FAISS Index
 # ---------------------------------------------------------------------------
@@ -174,6 +383,142 @@ class TestFAISSIndex:
         results = idx.search(embeddings[1], top_k=100)
         assert len(results) == 1
 
+    @staticmethod
+    def _vectors(ids, dim=32, seed=0):
+        rng = np.random.default_rng(seed)
+        vectors = rng.standard_normal((len(ids), dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return dict(zip(ids, vectors))
+
+    def test_search_batch_matches_single_searches(self, monkeypatch):
+        from utils.matching import faiss_index
+        from utils.matching.faiss_index import FAISSIndex
+        monkeypatch.setattr(faiss_index, "QUERY_BATCH", 7)
+        embeddings = self._vectors(range(1, 51))
+        idx = FAISSIndex()
+        idx.build(embeddings)
+        queries = np.vstack(list(self._vectors(range(20), seed=3).values()))
+
+        neighbours = idx.search_batch(queries, top_k=5)
+
+        assert neighbours.shape == (20, 5)
+        assert neighbours.dtype == np.int32
+        assert [row.tolist() for row in neighbours] == [
+            [label_id for label_id, _ in idx.search(q, top_k=5)] for q in queries
+        ]
+        assert FAISSIndex().search_batch(queries).shape == (20, 0)
+
+    def test_switches_to_ivf_above_threshold(self):
+        from utils.matching.faiss_index import FAISSIndex
+        embeddings = self._vectors(range(1, 2001))
+
+        idx = FAISSIndex(ivf_threshold=1000, min_recall=0.9)
+        idx.build(embeddings)
+
+        assert idx.kind == "ivf"
+        assert idx.recall >= 0.9
+        assert 1 <= idx.nprobe <= idx._index.nlist
+        assert idx.search(embeddings[7], top_k=3)[0][0] == 7
+        assert FAISSIndex(ivf_threshold=5000).needs_rebuild() is False
+
+    def test_sync_applies_changed_labels_only(self):
+        from utils.matching.faiss_index import FAISSIndex
+        embeddings = self._vectors([1, 2, 3])
+        idx = FAISSIndex()
+        idx.build(embeddings, "model-a", {1: "k1", 2: "k2", 3: "k3"})
+
+        new_vectors = self._vectors([2, 4], seed=1)
+        requested = []
+
+        def embed(ids):
+            requested.append(sorted(ids))
+            return {i: new_vectors[i] for i in ids}
+
+        # 1 unchanged, 2 re-extracted, 3 gone, 4 new
+        assert idx.sync({1: "k1", 2: "k2b", 4: "k4"}, embed) == (2, 2)
+        assert requested == [[2, 4]]
+        assert idx.size == 3
+        assert idx.search(new_vectors[2], top_k=1)[0][0] == 2
+        assert 3 not in {label_id for label_id, _ in idx.search(embeddings[3], top_k=3)}
+        assert idx.sync({1: "k1", 2: "k2b", 4: "k4"}, embed) == (0, 0)
+
+    def test_save_and_load_round_trip(self, tmp_path, monkeypatch):
+        from utils.matching import faiss_index
+        from utils.matching.faiss_index import FAISSIndex
+        monkeypatch.setattr(faiss_index, "_FAISS_DIR", str(tmp_path))
+        embeddings = self._vectors(range(1, 2001))
+        idx = FAISSIndex(ivf_threshold=1000, min_recall=0.9)
+        idx.build(embeddings, "model-a", {i: f"k{i}" for i in embeddings})
+        idx.save()
+
+        loaded = FAISSIndex.load()
+
+        assert (loaded.kind, loaded.fingerprint, loaded.size) == ("ivf", "model-a", 2000)
+        assert loaded._index.nprobe == idx.nprobe
+        assert loaded.search(embeddings[42], top_k=1)[0][0] == 42
+        assert loaded.sync({i: f"k{i}" for i in embeddings}, lambda ids: {}) == (0, 0)
+        assert FAISSIndex.load("other") is None
+
+    def test_pipeline_rebuilds_only_on_model_change(self, tmp_path, monkeypatch):
+        from utils.matching import embedder, faiss_index
+        from utils.matching.retrieval_pipeline import RetrievalPipeline
+        monkeypatch.setattr(faiss_index, "_FAISS_DIR", str(tmp_path))
+        fingerprint = ["model-a"]
+        monkeypatch.setattr(embedder, "model_fingerprint", lambda: fingerprint[0])
+        encoded = []
+
+        def compute(entries):
+            encoded.append(sorted(e.id for e in entries))
+            return self._vectors([e.id for e in entries])
+
+        monkeypatch.setattr(embedder, "compute_label_embeddings", compute)
+        entries = [
+            _make_cache_entry(1, 10, "a", {"brand": "Samsung"}),
+            _make_cache_entry(2, 10, "b", {"brand": "Apple"}),
+        ]
+
+        def pipeline():
+            with patch("utils.matching.retrieval_pipeline.is_v2_enabled", return_value=True):
+                return RetrievalPipeline(entries, None, {}, {}, {}, {})
+
+        pipeline()
+        entries.append(_make_cache_entry(3, 10, "c", {"brand": "Xiaomi"}))
+        assert pipeline()._faiss_index.size == 3
+        fingerprint[0] = "model-b"
+        pipeline()
+        assert encoded == [[1, 2], [3], [1, 2, 3]]
+
+    def test_pipeline_searches_products_in_one_batch(self, tmp_path, monkeypatch):
+        from utils.matching import embedder, faiss_index
+        from utils.matching.faiss_index import FAISSIndex
+        from utils.matching.retrieval_pipeline import RetrievalPipeline
+        monkeypatch.setattr(faiss_index, "_FAISS_DIR", str(tmp_path))
+        labels = self._vectors([1, 2, 3])
+        monkeypatch.setattr(
+            embedder, "compute_label_embeddings", lambda entries: {e.id: labels[e.id] for e in entries}
+        )
+        # Each product embedding is one label's vector
+        monkeypatch.setattr(
+            embedder, "compute_product_embeddings", lambda products: {p.id: labels[p.id] for p in products}
+        )
+        monkeypatch.setattr(embedder, "compact_embedding_store", lambda keep_keys=(): False)
+        entries = [
+            _make_cache_entry(i, 10, f"l{i}", {"brand": "Nokia", "model_family": f"N{i}"})
+            for i in (1, 2, 3)
+        ]
+        products = [_make_product(i, brand="Acme", model="Zzz", memory="", color="") for i in (1, 2)]
+
+        with patch("utils.matching.retrieval_pipeline.is_v2_enabled", return_value=True):
+            pipeline = RetrievalPipeline(entries, None, {}, {}, {}, {}, faiss_top_k=1)
+        with patch.object(FAISSIndex, "search_batch", wraps=pipeline._faiss_index.search_batch) as batch, \
+                patch.object(FAISSIndex, "search") as single:
+            pipeline.compute_product_embeddings(products)
+            candidates = [pipeline.get_candidates(p) for p in products]
+
+        assert batch.call_count == 1
+        assert single.call_count == 0
+        assert [[e.id for e in found] for found in candidates] == [[1], [2]]
+
 
 # ---------------------------------------------------------------------------
 # Cross-encoder
@@ -325,9 +325,9 @@ class TestRunMatchingStepNightly:
 
     @patch("utils.nightly_pipeline.datetime")
     @patch("utils.llm_matching.run_matching_job")
-    def test_sunday_full_rescore_resets_auto_matches(self, mock_run, mock_dt):
-        """On Sunday, auto-matched LabelCache entries and pending PendingMatches are reset."""
-        from models import Supplier
+    def test_sunday_full_rescore_clears_scoring_ledger(self, mock_run, mock_dt):
+        """On Sunday, the scoring ledger is emptied; matches and pending matches are kept."""
+        from models import Product, ScoredPair, ScoringState, Supplier
         from utils.nightly_pipeline import _run_matching_step
 
         # Simulate Sunday (weekday() == 6)
@@ -337,38 +337,35 @@ class TestRunMatchingStepNightly:
         mock_run.return_value = {"total_products": 5, "llm_calls": 1, "auto_matched": 2, "pending_review": 3}
 
         s = Supplier(name="S3")
-        db.session.add(s)
+        p = Product(description="Galaxy S25")
+        db.session.add_all([s, p])
         db.session.commit()
 
         lc_auto = LabelCache(
             supplier_id=s.id, normalized_label="auto_lbl",
-            match_source="auto", product_id=99, match_score=95,
-        )
-        lc_manual = LabelCache(
-            supplier_id=s.id, normalized_label="manual_lbl",
-            match_source="manual", product_id=100, match_score=85,
+            match_source="auto", product_id=p.id, match_score=95,
         )
+        lc_new = LabelCache(supplier_id=s.id, normalized_label="new_lbl", match_source="extracted")
         pm = PendingMatch(
             supplier_id=s.id, source_label="pending_lbl",
             extracted_attributes={}, candidates=[], status="pending",
         )
-        db.session.add_all([lc_auto, lc_manual, pm])
+        db.session.add_all([lc_auto, lc_new, pm])
+        db.session.commit()
+        db.session.add_all([
+            ScoredPair(product_id=p.id, label_cache_id=lc_new.id, feature_hash="h", score=70),
+            ScoringState(entity="product", entity_id=p.id, feature_hash="h", run_id=1),
+        ])
         db.session.commit()
         pm_id = pm.id
 
         _run_matching_step()
 
-        # Auto-matched entry should be reset
+        assert ScoredPair.query.count() == 0
+        assert ScoringState.query.count() == 0
         db.session.refresh(lc_auto)
-        assert lc_auto.product_id is None
-        assert lc_auto.match_source == "extracted"
-
-        # Manual entry should be preserved
-        db.session.refresh(lc_manual)
-        assert lc_manual.product_id == 100
-
-        # Pending match should be deleted
-        assert PendingMatch.query.get(pm_id) is None
+        assert (lc_auto.product_id, lc_auto.match_source) == (p.id, "auto")
+        assert db.session.get(PendingMatch, pm_id) is not None
 
     @patch("utils.llm_matching.run_matching_job")
     def test_applies_validation_history_after_matching(self, mock_run):
@@ -0,0 +1,74 @@
+"""Tests for utils/rate_limit.py — TokenBucket."""
+
+import threading
+
+from utils.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_burst_then_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, capacity=2, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    # Bucket empty: 60/min refills one token per second
+    assert bucket.acquire() == 1.0
+    assert clock.sleeps == [1.0]
+
+
+def test_try_acquire_does_not_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(30, clock=clock, sleep=clock.sleep)
+    assert bucket.try_acquire() is True
+    assert bucket.try_acquire() is False
+    clock.now += 2.0
+    assert bucket.try_acquire() is True
+    assert clock.sleeps == []
+
+
+def test_refill_capped_at_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(60, capacity=3, clock=clock, sleep=clock.sleep)
+    clock.now += 3600
+    for _ in range(3):
+        assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_zero_rate_disables_limiting():
+    bucket = TokenBucket(0)
+    assert not bucket.enabled
+    assert all(bucket.try_acquire() for _ in range(100))
+    assert bucket.acquire() == 0.0
+
+
+def test_thread_safe_token_accounting():
+    clock = FakeClock()
+    lock = threading.Lock()
+    bucket = TokenBucket(60, capacity=50, clock=lambda: 0.0, sleep=clock.sleep)
+    granted = []
+
+    def worker():
+        for _ in range(20):
+            if bucket.try_acquire():
+                with lock:
+                    granted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(granted) == 50
@@ -0,0 +1,76 @@
+"""Tests for utils/reference_data.py — shared reference snapshot."""
+
+from unittest.mock import patch
+
+from models import Brand, Color, ColorTranslation, db
+from utils import reference_data
+from utils.calculations import _load_mappings
+from utils.llm_matching import _build_mappings, build_context
+
+
+def _seed():
+    noir = Color(color="Noir")
+    db.session.add_all([Brand(brand="Samsung"), noir])
+    db.session.flush()
+    db.session.add(ColorTranslation(color_source="black", color_target="Noir", color_target_id=noir.id))
+    db.session.commit()
+    return noir
+
+
+def test_reference_write_bumps_version():
+    before = reference_data.current_version()
+    db.session.add(Brand(brand="Apple"))
+    db.session.commit()
+    assert reference_data.current_version() == before + 1
+
+
+def test_snapshot_reused_until_references_change():
+    _seed()
+    first = reference_data.get_snapshot()
+    with patch("utils.reference_data._load", wraps=reference_data._load) as load:
+        assert reference_data.get_snapshot() is first
+        build_context()
+        _build_mappings()
+        _load_mappings()
+        assert load.call_count == 0
+
+        db.session.add(Brand(brand="Apple"))
+        db.session.commit()
+        second = reference_data.get_snapshot()
+
+    assert load.call_count == 1
+    assert second is not first
+    assert [b.value for b in second.brands] == ["Samsung", "Apple"]
+
+
+def test_consumers_see_route_updates(client, admin_headers):
+    noir = _seed()
+    assert _build_mappings()["color_translations"] == {"black": "Noir"}
+    translation = ColorTranslation.query.one()
+
+    resp = client.put(
+        f"/references/color_translations/{translation.id}",
+        json={"color_source": "schwarz"},
+        headers=admin_headers,
+    )
+    assert resp.status_code == 200
+
+    assert _build_mappings()["color_translations"] == {"schwarz": "Noir"}
+    assert ("schwarz", noir.id) in _load_mappings()["color"]
+
+
+def test_lookup_returns_fresh_dict():
+    _seed()
+    snapshot = reference_data.get_snapshot()
+    lookup = snapshot.lookup("brands")
+    lookup["apple"] = 99
+    assert "apple" not in snapshot.lookup("brands")
+
+
+def test_rollback_drops_snapshot():
+    _seed()
+    db.session.add(Brand(brand="Ghost"))
+    db.session.flush()
+    assert "Ghost" in [b.value for b in reference_data.get_snapshot().brands]
+    db.session.rollback()
+    assert "Ghost" not in [b.value for b in reference_data.get_snapshot().brands]
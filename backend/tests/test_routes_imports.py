@@ -0,0 +1,59 @@
+"""Tests for routes/imports.py — supplier API configuration endpoints."""
+
+import pytest
+
+from models import Supplier, SupplierAPI, db
+
+
+@pytest.fixture()
+def supplier():
+    supplier = Supplier(name="Fournisseur API")
+    db.session.add(supplier)
+    db.session.commit()
+    return supplier
+
+
+# ---------------------------------------------------------------------------
+# timeout_seconds
+# ---------------------------------------------------------------------------
+
+
+class TestSupplierApiTimeout:
+    def test_create_accepts_positive_timeout(self, client, admin_headers, supplier):
+        rv = client.post(
+            f"/supplier_api/{supplier.id}/apis",
+            json={"base_url": "https://api.example.com", "timeout_seconds": "12.5"},
+            headers=admin_headers,
+        )
+        assert rv.status_code == 201
+        assert rv.get_json()["timeout_seconds"] == 12.5
+
+    @pytest.mark.parametrize("timeout", ["abc", 0, -5, True, [30]])
+    def test_create_rejects_invalid_timeout(self, client, admin_headers, supplier, timeout):
+        rv = client.post(
+            f"/supplier_api/{supplier.id}/apis",
+            json={"base_url": "https://api.example.com", "timeout_seconds": timeout},
+            headers=admin_headers,
+        )
+        assert rv.status_code == 400
+        assert "timeout" in rv.get_json()["error"]
+        assert SupplierAPI.query.count() == 0
+
+    def test_update_validates_timeout(self, client, admin_headers, supplier):
+        api = SupplierAPI(supplier=supplier, base_url="https://api.example.com",
+                          timeout_seconds=20.0)
+        db.session.add(api)
+        db.session.commit()
+
+        rv = client.patch(
+            f"/supplier_api/apis/{api.id}", json={"timeout_seconds": -1}, headers=admin_headers
+        )
+        assert rv.status_code == 400
+        db.session.expire_all()
+        assert db.session.get(SupplierAPI, api.id).timeout_seconds == 20.0
+
+        rv = client.patch(
+            f"/supplier_api/apis/{api.id}", json={"timeout_seconds": None}, headers=admin_headers
+        )
+        assert rv.status_code == 200
+        assert rv.get_json()["timeout_seconds"] is None
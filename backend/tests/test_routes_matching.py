@@ -9,6 +9,7 @@ from models import (
     Brand,
     DeviceType,
     LabelCache,
+    MatchingRun,
     MemoryOption,
     PendingMatch,
     Product,
@@ -492,6 +493,17 @@ class TestMatchingStats:
         assert data["cache_hit_rate"] == 50.0
 
 
+class TestListRuns:
+    def test_runs_expose_profile(self, client, admin_headers):
+        profile = {"version": 1, "phases": {"scoring": {"wall_s": 1.5}}, "counters": {}}
+        db.session.add(MatchingRun(status="completed", profile=profile))
+        db.session.commit()
+
+        rv = client.get("/matching/runs", headers=admin_headers)
+        assert rv.status_code == 200
+        assert rv.get_json()[0]["profile"] == profile
+
+
 # ---------------------------------------------------------------------------
 # GET /matching/cache & DELETE /matching/cache/<id>
 # ---------------------------------------------------------------------------
@@ -0,0 +1,52 @@
+"""Tests for utils/run_profiler.py — matching run profile."""
+
+from models import Brand, db
+from utils.run_profiler import RunProfiler
+
+
+def test_nested_phases_report_exclusive_figures():
+    profiler = RunProfiler(db.engine)
+    try:
+        with profiler.phase("outer"):
+            Brand.query.count()
+            for _ in range(2):
+                with profiler.phase("inner"):
+                    Brand.query.count()
+    finally:
+        profiler.close()
+
+    profile = profiler.to_dict()
+    assert profile["phases"]["outer"]["queries"] == 1
+    assert profile["phases"]["inner"] == {**profile["phases"]["inner"], "queries": 2, "calls": 2}
+    assert profile["queries"] == 3
+    phases_wall = sum(p["wall_s"] for p in profile["phases"].values())
+    assert phases_wall <= profile["wall_s"] + 1e-3
+
+
+def test_close_detaches_query_counter():
+    profiler = RunProfiler(db.engine)
+    Brand.query.count()
+    profiler.close()
+    Brand.query.count()
+    assert profiler.queries == 1
+
+
+def test_timed_iterator_counters_and_histograms():
+    profiler = RunProfiler()
+
+    items = list(profiler.timed("scoring", iter([1, 2, 3])))
+    profiler.count("pairs", 4)
+    profiler.count("pairs")
+    profiler.observe("disqualifiers", "color_mismatch")
+    profiler.observe("disqualifiers", "color_mismatch")
+    profiler.observe("disqualifiers", None)
+    profiler.observe("disqualifiers", "storage_mismatch", 3)
+
+    profile = profiler.to_dict()
+    assert items == [1, 2, 3]
+    # One call per item plus the final StopIteration
+    assert profile["phases"]["scoring"]["calls"] == 4
+    assert profile["counters"] == {"pairs": 5}
+    assert profile["histograms"] == {
+        "disqualifiers": {"color_mismatch": 2, "unknown": 1, "storage_mismatch": 3}
+    }
@@ -0,0 +1,233 @@
+"""Tests for utils/scoring_ledger.py — incremental Phase 2 scoring."""
+
+import dataclasses
+from unittest.mock import patch
+
+import pytest
+
+from models import (
+    Brand,
+    LabelCache,
+    MemoryOption,
+    PendingMatch,
+    Product,
+    ScoredPair,
+    ScoringState,
+    Supplier,
+    SupplierCatalog,
+    db,
+)
+from utils import scoring_ledger
+from utils.llm_matching import (
+    build_label_features,
+    run_matching_job,
+    score_matches_batch,
+)
+
+# Against the product fixture: review range, auto-match, storage mismatch
+S25 = {"brand": "Samsung", "model_family": "Galaxy S25 Ultra"}
+S25_256 = {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "256 Go"}
+S25_512 = {"brand": "Samsung", "model_family": "Galaxy S25 Ultra", "storage": "512 Go"}
+
+
+@pytest.fixture(autouse=True)
+def _api_key(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test-dummy-key")
+
+
+@pytest.fixture()
+def supplier():
+    s = Supplier(name="Yukatel")
+    db.session.add(s)
+    db.session.commit()
+    return s
+
+
+@pytest.fixture()
+def product():
+    brand = Brand(brand="Samsung")
+    memory = MemoryOption(memory="256 Go", tcp_value=256)
+    db.session.add_all([brand, memory])
+    db.session.commit()
+    p = Product(model="Galaxy S25 Ultra", brand_id=brand.id, memory_id=memory.id)
+    db.session.add(p)
+    db.session.commit()
+    return p
+
+
+def _add_label(supplier, label, attrs):
+    """Catalog line + already extracted LabelCache entry (no LLM call needed)."""
+    db.session.add(SupplierCatalog(
+        description=label, quantity=1, selling_price=1.0, supplier_id=supplier.id,
+    ))
+    entry = LabelCache(
+        supplier_id=supplier.id, normalized_label=label.lower(),
+        match_source="extracted", extracted_attributes=dict(attrs),
+    )
+    db.session.add(entry)
+    db.session.commit()
+    return entry
+
+
+def _run():
+    """Run the matching job, returning the number of candidate rows scored."""
+    with patch(
+        "utils.llm_matching.score_matches_batch", wraps=score_matches_batch
+    ) as scorer:
+        report = run_matching_job()
+    return report, sum(len(call.args[2]) for call in scorer.call_args_list)
+
+
+def _pending_score():
+    pm = PendingMatch.query.one()
+    return pm.candidates[0]["score"]
+
+
+def test_features_hash_is_stable_and_versioned(monkeypatch):
+    features = build_label_features(S25_256, {})
+    same = dataclasses.replace(features, variants=frozenset(sorted(features.variants)))
+    assert scoring_ledger.features_hash(features) == scoring_ledger.features_hash(same)
+    assert scoring_ledger.features_hash(features) != scoring_ledger.features_hash(
+        build_label_features(S25_512, {})
+    )
+    before = scoring_ledger.features_hash(features)
+    monkeypatch.setattr(scoring_ledger, "SCORING_VERSION", "test")
+    assert scoring_ledger.features_hash(features) != before
+
+
+def test_second_run_reuses_ledger_scores(supplier, product):
+    _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+
+    first, scored = _run()
+    assert scored == 2
+    assert first["pending_review"] == 1
+    score = _pending_score()
+    # The positive pair and the disqualified one are kept
+    assert sorted(pair.score for pair in ScoredPair.query.all()) == [0, score]
+
+    _, scored = _run()
+    assert scored == 0
+    assert _pending_score() == score
+
+
+def test_only_new_labels_are_scored(supplier, product):
+    _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+    _run()
+
+    best = _add_label(supplier, "Galaxy S25 Ultra 256Go", S25_256)
+    report, scored = _run()
+    assert scored == 1
+    assert report["auto_matched"] == 1
+    db.session.refresh(best)
+    assert best.product_id == product.id
+
+
+def test_changed_label_is_scored_again(supplier, product):
+    s25 = _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+    _run()
+
+    # Re-extracted attributes invalidate that label's pairs only
+    s25.extracted_attributes = dict(S25_512)
+    db.session.commit()
+    _, scored = _run()
+    assert scored == 1
+    assert [(pair.label_cache_id, pair.score) for pair in ScoredPair.query.all()] == [(s25.id, 0)]
+
+
+def test_only_top_pairs_are_kept(supplier, product, monkeypatch):
+    monkeypatch.setenv("SCORING_LEDGER_TOP_PAIRS", "1")
+    best = _add_label(supplier, "Galaxy S25 Ultra", S25)
+    lower = _add_label(supplier, "Galaxy S25 Ultra Noir", {**S25, "color": "Noir"})
+    disqualified = _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+
+    _, scored = _run()
+    assert scored == 3
+    pairs = {pair.label_cache_id: pair for pair in ScoredPair.query.all()}
+    # The lower pair is dropped; only the winner and the disqualified pair keep details
+    assert set(pairs) == {best.id, disqualified.id}
+    assert pairs[best.id].details and pairs[disqualified.id].details
+    score = _pending_score()
+
+    # A change below the kept pair: only that label is scored again
+    lower.extracted_attributes = {**S25, "color": "Blanc"}
+    db.session.commit()
+    _, scored = _run()
+    assert scored == 1
+    assert _pending_score() == score
+
+    # The kept pair changed: lower pairs are unknown, so everything is scored
+    best.extracted_attributes = {**S25, "color": "Rouge"}
+    db.session.commit()
+    _, scored = _run()
+    assert scored == 3
+
+
+def test_product_change_rescores_every_candidate(supplier, product):
+    _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+    _run()
+
+    product.region = "US"
+    db.session.commit()
+    _, scored = _run()
+    assert scored == 2
+
+
+def test_labels_leaving_the_pool_are_forgotten(supplier, product):
+    s25 = _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+    _run()
+
+    # Matched by hand: no longer a candidate
+    s25.match_source = "manual"
+    s25.product_id = product.id
+    db.session.commit()
+    run_matching_job()
+    assert ScoringState.query.filter_by(entity="label", entity_id=s25.id).count() == 0
+    assert ScoredPair.query.filter_by(label_cache_id=s25.id).count() == 0
+
+    # Back in the pool: scored again like a new label
+    s25.match_source = "extracted"
+    s25.product_id = None
+    db.session.commit()
+    _, scored = _run()
+    assert scored == 1
+
+
+def test_supplier_scoped_run_bypasses_ledger(supplier, product):
+    _add_label(supplier, "Galaxy S25 Ultra", S25)
+    run_matching_job(supplier_id=supplier.id)
+    assert ScoredPair.query.count() == 0
+    assert ScoringState.query.count() == 0
+
+
+def test_invalidate_forces_full_rescore(supplier, product):
+    _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+    _run()
+
+    assert scoring_ledger.invalidate() == 2
+    db.session.commit()
+    _, scored = _run()
+    assert scored == 2
+
+
+def test_worker_processes_use_ledger_scores(supplier, product, monkeypatch):
+    db.session.add(Product(model="Galaxy S25", brand_id=product.brand_id))
+    db.session.commit()
+    _add_label(supplier, "Galaxy S25 Ultra", S25)
+    _add_label(supplier, "Galaxy S25 Ultra 512Go", S25_512)
+    _run()
+    pairs = sorted((p.product_id, p.label_cache_id, p.score) for p in ScoredPair.query.all())
+
+    monkeypatch.setenv("MATCHING_WORKERS", "2")
+    report = run_matching_job()
+
+    assert report["total_products"] == 2
+    assert sorted(
+        (p.product_id, p.label_cache_id, p.score) for p in ScoredPair.query.all()
+    ) == pairs
+    assert ScoringState.query.filter_by(entity="product", run_id=report["run_id"]).count() == 2
@@ -0,0 +1,125 @@
+"""Tests for utils/similarity.py — similarity backends and extract_best."""
+
+import difflib
+import itertools
+
+import pytest
+
+from utils import similarity
+
+# Labels and model names used across the matching test fixtures
+FIXTURE_STRINGS = [
+    "samsung galaxy s25 ultra 256go noir",
+    "samsung galaxy s25 ultra 256go noire",
+    "samsung galaxy s25 ultra 256go",
+    "apple iphone 16 pro 128go blanc",
+    "apple iphone 16 pro 512go blanc",
+    "apple iphone 15 128go black",
+    "apple iphone 15 128go noir",
+    "sm s938b 256go",
+    "sm s938b ds 256go",
+    "sm s938b 256go blk",
+    "test phone 128go",
+    "Galaxy S25 Ultra",
+    "Galaxy S25",
+    "galaxy s25+",
+    "iphone 15 pro",
+    "iphone 16 pro",
+    "redmi note 13 pro",
+    "redmi note 12 pro",
+    "tab a9",
+    "tab s9",
+    "smartphone",
+    "tablette",
+    "",
+]
+
+
+@pytest.fixture()
+def restore_backend():
+    previous = similarity.get_backend()
+    yield
+    similarity.set_backend(previous)
+
+
+@pytest.mark.parametrize("backend", similarity.available_backends())
+def test_ratio_identical_to_difflib(backend, restore_backend):
+    similarity.set_backend(backend)
+    for a, b in itertools.product(FIXTURE_STRINGS, repeat=2):
+        assert similarity.ratio(a, b) == difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def test_cydifflib_backend_preferred_when_installed():
+    pytest.importorskip("cydifflib")
+    assert "cydifflib" in similarity.available_backends()
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        similarity.set_backend("levenshtein")
+
+
+def _linear_scan(query, choices, limit, cutoff):
+    scored = [
+        (i, difflib.SequenceMatcher(None, query, c).ratio())
+        for i, c in enumerate(choices)
+    ]
+    scored = [s for s in scored if s[1] >= cutoff]
+    scored.sort(key=lambda s: (-s[1], s[0]))
+    return scored[:limit]
+
+
+@pytest.mark.parametrize("backend", similarity.available_backends())
+@pytest.mark.parametrize("limit,cutoff", [(1, 0.0), (3, 0.0), (1, 0.92), (5, 0.6)])
+def test_extract_best_matches_linear_scan(backend, limit, cutoff, restore_backend):
+    similarity.set_backend(backend)
+    matcher = similarity.ChoiceMatcher(FIXTURE_STRINGS)
+    for query in FIXTURE_STRINGS:
+        expected = _linear_scan(query, FIXTURE_STRINGS, limit, cutoff)
+        assert similarity.extract_best(query, FIXTURE_STRINGS, limit, cutoff) == expected
+        assert matcher.extract_best(query, limit, cutoff) == expected
+
+
+def test_extract_best_ties_keep_choice_order():
+    choices = ["abc", "abd", "abc"]
+    assert similarity.extract_best("abc", choices, limit=2) == [(0, 1.0), (2, 1.0)]
+
+
+def test_choice_matcher_indices_subset():
+    matcher = similarity.ChoiceMatcher(FIXTURE_STRINGS)
+    result = matcher.extract_best("samsung galaxy s25 ultra 256go noir", indices=[3, 4, 2])
+    assert result[0][0] == 2
+
+
+def test_extract_best_empty():
+    assert similarity.extract_best("abc", []) == []
+    assert similarity.ChoiceMatcher([]).extract_best("abc") == []
+
+
+@pytest.mark.parametrize("cutoff", [0.0, 0.3, 0.6, 0.8, 0.92, 1.0])
+def test_qgram_index_matches_linear_scan(cutoff):
+    index = similarity.QGramIndex(FIXTURE_STRINGS)
+    queries = FIXTURE_STRINGS + ["samsung galaxy s25 ultra 512go noir", "iphone", "ab"]
+    for query in queries:
+        for limit in (1, 3):
+            expected = _linear_scan(query, FIXTURE_STRINGS, limit, cutoff)
+            assert index.extract_best(query, limit, cutoff) == expected
+
+
+def test_qgram_candidates_cover_every_hit():
+    index = similarity.QGramIndex(FIXTURE_STRINGS)
+    for query in FIXTURE_STRINGS:
+        hits = {i for i, _ in _linear_scan(query, FIXTURE_STRINGS, len(FIXTURE_STRINGS), 0.6)}
+        candidates = index.candidates(query, 0.6)
+        assert hits <= set(candidates)
+        assert candidates == sorted(candidates)
+
+
+def test_qgram_candidates_prune_unrelated_labels():
+    index = similarity.QGramIndex(FIXTURE_STRINGS)
+    candidates = index.candidates("samsung galaxy s25 ultra 256go noir", 0.92)
+    assert set(candidates) == {0, 1, 2}
+
+
+def test_qgram_index_empty():
+    assert similarity.QGramIndex([]).extract_best("abc", score_cutoff=0.9) == []
@@ -8,10 +8,6 @@ from typing import Dict, Iterable, Tuple
 logger = logging.getLogger(__name__)
 
 from models import (
-    Brand,
-    Color,
-    ColorTranslation,
-    DeviceType,
     LabelCache,
     MemoryOption,
     Product,
@@ -19,32 +15,30 @@ from models import (
     SupplierCatalog,
     db,
 )
+from utils import reference_data
 from utils.llm_matching import normalize_label
 from utils.pricing import compute_margin_prices
 
 
 def _load_mappings() -> Dict[str, Iterable[Tuple[str, int]]]:
     """Load translation mappings into memory for faster lookups."""
-    def _build_pairs(queryset, attr: str) -> list[Tuple[str, int]]:
-        pairs: list[Tuple[str, int]] = []
-        for item in queryset:
-            value = getattr(item, attr, None)
-            if value:
-                pairs.append((value.lower(), item.id))
-        return pairs
+    refs = reference_data.get_snapshot()
+
+    def _build_pairs(options) -> list[Tuple[str, int]]:
+        return [(option.value.lower(), option.id) for option in options if option.value]
 
     mappings: Dict[str, Iterable[Tuple[str, int]]] = {
-        "brand": _build_pairs(Brand.query.all(), "brand"),
-        "memory": _build_pairs(MemoryOption.query.all(), "memory"),
-        "color": _build_pairs(Color.query.all(), "color"),
-        "type": _build_pairs(DeviceType.query.all(), "type"),
+        "brand": _build_pairs(refs.brands),
+        "memory": _build_pairs(refs.memory_options),
+        "color": _build_pairs(refs.colors),
+        "type": _build_pairs(refs.device_types),
     }
 
     # Include additional color translations (e.g. synonyms) if available.
     color_translations = [
-        (t.color_source.lower(), t.color_target_id)
-        for t in ColorTranslation.query.all()
-        if t.color_source
+        (t.source.lower(), t.target_id)
+        for t in refs.color_translations
+        if t.source
     ]
     if color_translations:
         mappings["color"] = list(mappings["color"]) + color_translations
@@ -0,0 +1,109 @@
+"""Bulk write helpers for the matching jobs.
+
+``upsert`` issues ``INSERT ... ON CONFLICT DO UPDATE`` in chunks instead of
+one SELECT + INSERT/UPDATE per row. PostgreSQL targets the named unique
+constraint; SQLite (tests) targets the same columns. ``insert_rows``,
+``update_rows`` and ``delete_ids`` are executemany / ``IN`` based
+equivalents of ORM ``add`` / attribute changes / ``delete``.
+
+None of these helpers touch the session's identity map: callers keep
+loaded objects consistent themselves (e.g. ``set_committed_value``).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import update
+
+from models import db
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _chunks(rows: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def upsert(
+    model,
+    rows: Sequence[Dict[str, Any]],
+    conflict_columns: Sequence[str],
+    constraint: str,
+    update_columns: Sequence[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Insert ``rows`` into ``model``'s table, updating ``update_columns`` on conflict.
+
+    Every row must have the same keys and ``rows`` must not contain two rows
+    with the same conflict key. Python-side column defaults apply to the
+    inserted rows. Executes on the current session's transaction and
+    returns the number of rows sent.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - only PostgreSQL and SQLite are deployed
+        raise NotImplementedError(f"Bulk upsert not supported on {dialect}")
+
+    stmt = insert(table)
+    set_ = {column: stmt.excluded[column] for column in update_columns}
+    if dialect == "postgresql":
+        stmt = stmt.on_conflict_do_update(constraint=constraint, set_=set_)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_)
+
+    for chunk in _chunks(rows, max(chunk_size, 1)):
+        db.session.execute(stmt, chunk)
+    return len(rows)
+
+
+def update_by_ids(
+    model, ids: Iterable[int], values: Dict[str, Any], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """``UPDATE ... SET values WHERE id IN (...)`` in chunks. Returns rows sent."""
+    ids = list(ids)
+    for chunk in _chunks(ids, max(chunk_size, 1)):
+        db.session.execute(
+            model.__table__.update().where(model.__table__.c.id.in_(chunk)).values(**values)
+        )
+    return len(ids)
+
+
+def insert_rows(
+    model, rows: Sequence[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Plain INSERT of ``rows`` (executemany per chunk). Returns rows sent."""
+    rows = list(rows)
+    for chunk in _chunks(rows, max(chunk_size, 1)):
+        db.session.execute(model.__table__.insert(), chunk)
+    return len(rows)
+
+
+def update_rows(
+    model, rows: Sequence[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Bulk UPDATE by primary key: each row holds ``id`` plus the new values."""
+    rows = list(rows)
+    for chunk in _chunks(rows, max(chunk_size, 1)):
+        db.session.execute(
+            update(model).execution_options(synchronize_session=False), chunk
+        )
+    return len(rows)
+
+
+def delete_ids(model, ids: Iterable[int], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """``DELETE ... WHERE id IN (...)`` in chunks. Returns ids sent."""
+    ids = list(ids)
+    for chunk in _chunks(ids, max(chunk_size, 1)):
+        db.session.execute(
+            model.__table__.delete().where(model.__table__.c.id.in_(chunk))
+        )
+    return len(ids)
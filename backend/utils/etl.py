@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import re
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set, Tuple
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple
 from urllib.parse import urljoin
 
 import jmespath
@@ -15,7 +18,16 @@ from sqlalchemy.orm import joinedload
 
 logger = logging.getLogger(__name__)
 
+from utils import db_bulk
 from utils.normalize import normalize_label, normalize_ram, normalize_storage
+from utils.pagination import Page, iter_pages
+from utils.supplier_http import (
+    fetch_concurrency,
+    get_rate_limiter,
+    get_session,
+    request_timeout,
+    send_with_retry,
+)
 from models import (
     ApiEndpoint,
     ApiFetchJob,
@@ -23,6 +35,7 @@ from models import (
     LabelCache,
     MappingVersion,
     ImportHistory,
+    PaginationType,
     ParsedItem,
     PendingMatch,
     Product,
@@ -356,10 +369,16 @@ def _prepare_field_maps(mapping: MappingVersion) -> List[FieldMap]:
 
 
 def _perform_request(
-    supplier_api, endpoint: ApiEndpoint, query: Dict[str, Any], body: Dict[str, Any]
+    supplier_api,
+    endpoint: ApiEndpoint,
+    query: Dict[str, Any],
+    body: Dict[str, Any],
+    url: Optional[str] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
 ) -> requests.Response:
-    base_url = supplier_api.base_url.rstrip("/") + "/"
-    url = urljoin(base_url, endpoint.path.lstrip("/"))
+    if url is None:
+        base_url = supplier_api.base_url.rstrip("/") + "/"
+        url = urljoin(base_url, endpoint.path.lstrip("/"))
 
     headers = dict(supplier_api.default_headers or {})
     auth = None
@@ -380,12 +399,13 @@ def _perform_request(
         raise RuntimeError("L'authentification OAuth2 n'est pas encore prise en charge")
 
     method = (endpoint.method or "GET").upper()
-    timeout = 30
+    if extra_headers:
+        headers.update(extra_headers)
 
     request_kwargs: Dict[str, Any] = {
         "headers": headers,
         "params": query,
-        "timeout": timeout,
+        "timeout": request_timeout(supplier_api),
         "auth": auth,
     }
 
@@ -395,7 +415,7 @@ def _perform_request(
         else:
             request_kwargs["data"] = body or None
 
-    response = requests.request(method, url, **request_kwargs)
+    response = get_session(supplier_api).request(method, url, **request_kwargs)
     response.raise_for_status()
     return response
 
@@ -849,50 +869,163 @@ def _validate_fetch_params(
     return job, endpoint, mapping, supplier
 
 
-def _execute_api_request(
-    job: ApiFetchJob,
+class _CatalogUnchanged(Exception):
+    """The supplier feed is the one the current catalog was built from."""
+
+
+def _fetch_request_key(
     endpoint: ApiEndpoint,
     final_query: Dict[str, Any],
     final_body: Dict[str, Any],
-) -> Tuple[List[Dict[str, Any]], List[Any]]:
-    """Perform the HTTP request, store raw data, and extract items."""
-    response = _perform_request(endpoint.supplier_api, endpoint, final_query, final_body)
-    job.params_used = {
-        **(job.params_used or {}),
-        "resolved_url": response.url,
-        "status_code": response.status_code,
-    }
-    db.session.add(job)
-    content_type = response.headers.get("Content-Type", endpoint.content_type)
-    try:
-        payload = response.json()
-    except ValueError as exc:
-        raise RuntimeError("Réponse JSON invalide reçue depuis l'API fournisseur") from exc
-
-    raw_entry = RawIngest(
-        job_id=job.id,
-        http_status=response.status_code,
-        payload=response.content,
-        content_type=content_type or "application/json",
-        page_index=0,
+    field_maps: List[FieldMap],
+) -> str:
+    """Fingerprint of everything besides the payload that shapes the catalog."""
+    request = [
+        endpoint.supplier_api.base_url,
+        endpoint.path,
+        endpoint.method,
+        getattr(endpoint.pagination_type, "value", endpoint.pagination_type),
+        endpoint.pagination_config,
+        endpoint.items_path,
+        final_query,
+        final_body,
+        [(f.target_field, f.source_path, f.transform) for f in field_maps],
+    ]
+    encoded = json.dumps(request, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def _reusable_fetch_state(
+    endpoint: ApiEndpoint, supplier_id: int, request_key: str
+) -> Optional[Dict[str, Any]]:
+    """fetch_state of the endpoint if the supplier's catalog still comes from it.
+
+    The catalog must not have been rewritten since (by another endpoint or
+    import) nor emptied, and the request and mapping must be the same.
+    """
+    state = endpoint.fetch_state or {}
+    if not state.get("page_digests") or state.get("request_key") != request_key:
+        return None
+    latest_import = (
+        db.session.query(ImportHistory.id)
+        .filter_by(supplier_id=supplier_id)
+        .order_by(ImportHistory.id.desc())
+        .limit(1)
+        .scalar()
     )
-    db.session.add(raw_entry)
+    if latest_import != state.get("import_id"):
+        return None
+    has_catalog = db.session.query(
+        SupplierCatalog.query.filter_by(supplier_id=supplier_id).exists()
+    ).scalar()
+    return state if has_catalog else None
+
+
+def _held_page_items(
+    job_id: int, items_path: Optional[str], before_index: Optional[int]
+) -> Iterator[List[Dict[str, Any]]]:
+    """Items of the pages a fetch job flushed as RawIngest rows, one page at
+    a time, in page order (only those before ``before_index`` if given)."""
+    query = db.session.query(RawIngest.payload).filter(RawIngest.job_id == job_id)
+    if before_index is not None:
+        query = query.filter(RawIngest.page_index < before_index)
+    for (payload,) in query.order_by(RawIngest.page_index).yield_per(1):
+        try:
+            decoded = json.loads(payload)
+        except ValueError as exc:
+            raise RuntimeError("Réponse JSON invalide reçue depuis l'API fournisseur") from exc
+        yield _extract_items(decoded, items_path)
 
-    items = _extract_items(payload, endpoint.items_path)
-    raw_samples = _prepare_api_raw_samples(items)
-    job.report_api_raw_items = raw_samples
-    db.session.add(job)
-    if not items:
-        raise RuntimeError("Aucune donnée exploitable retournée par l'API fournisseur")
 
-    return items, raw_samples
+def _conditional_headers(state: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    if state:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+    return headers
 
 
-def _parse_and_deduplicate(
-    items: List[Dict[str, Any]],
-    mapping: MappingVersion,
-) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    """Parse raw items through field mappings and return (parsed_records, field_maps)."""
+def _fetch_pages(
+    job: ApiFetchJob,
+    endpoint: ApiEndpoint,
+    final_query: Dict[str, Any],
+    final_body: Dict[str, Any],
+    conditional_headers: Optional[Dict[str, str]] = None,
+) -> Iterator[Page]:
+    """Request the endpoint page by page, storing each raw page as it arrives.
+
+    Page and offset modes prefetch up to ETL_FETCH_CONCURRENCY pages; every
+    request goes through the SupplierAPI rate limiter and is retried on
+    429/5xx. ``conditional_headers`` (If-None-Match / If-Modified-Since,
+    unpaginated endpoints only) turn a 304 answer into _CatalogUnchanged.
+    """
+    supplier_api = endpoint.supplier_api
+    concurrency = fetch_concurrency()
+    limiter = get_rate_limiter(
+        supplier_api.id, supplier_api.rate_limit_per_min, burst=concurrency
+    )
+    # Plain copies: fetch threads must not touch the session-bound ORM objects
+    api_snapshot = SimpleNamespace(
+        id=supplier_api.id,
+        base_url=supplier_api.base_url,
+        timeout_seconds=supplier_api.timeout_seconds,
+        auth_type=supplier_api.auth_type,
+        auth_config=dict(supplier_api.auth_config or {}),
+        default_headers=dict(supplier_api.default_headers or {}),
+    )
+    endpoint_snapshot = SimpleNamespace(
+        path=endpoint.path, method=endpoint.method, content_type=endpoint.content_type
+    )
+    items_path = endpoint.items_path
+
+    def fetch(url: Optional[str], query: Dict[str, Any], body: Dict[str, Any]):
+        response = send_with_retry(
+            lambda: _perform_request(
+                api_snapshot, endpoint_snapshot, query, body, url=url,
+                extra_headers=conditional_headers,
+            ),
+            limiter,
+        )
+        if response.status_code == 304:
+            raise _CatalogUnchanged()
+        return response
+
+    pages = iter_pages(
+        endpoint.pagination_type,
+        endpoint.pagination_config,
+        fetch,
+        final_query,
+        final_body,
+        lambda payload: _extract_items(payload, items_path),
+        concurrency=concurrency,
+    )
+    for page in pages:
+        response = page.response
+        if page.index == 0:
+            job.params_used = {
+                **(job.params_used or {}),
+                "resolved_url": response.url,
+                "status_code": response.status_code,
+            }
+            db.session.add(job)
+        content_type = response.headers.get("Content-Type", endpoint.content_type)
+        db.session.add(
+            RawIngest(
+                job_id=job.id,
+                http_status=response.status_code,
+                payload=response.content,
+                content_type=(content_type or "application/json")[:50],
+                page_index=page.index,
+                cursor=page.cursor[:200] if page.cursor else None,
+            )
+        )
+        yield page
+
+
+def _checked_field_maps(mapping: MappingVersion) -> List[FieldMap]:
+    """Field maps of the mapping, which must define a supplier_sku target."""
     field_maps = _prepare_field_maps(mapping)
     if not field_maps:
         raise RuntimeError("Aucun mapping de champs n'est défini pour cet endpoint")
@@ -904,7 +1037,13 @@ def _parse_and_deduplicate(
         raise RuntimeError(
             "Le mapping doit contenir un champ 'supplier_sku' pour identifier les produits"
         )
+    return field_maps
 
+
+def _parse_items(
+    items: List[Dict[str, Any]], field_maps: List[FieldMap]
+) -> List[Dict[str, Any]]:
+    """Parse raw items through the field mappings."""
     parsed_records: List[Dict[str, Any]] = []
     for item in items:
         record: Dict[str, Any] = {}
@@ -917,7 +1056,206 @@ def _parse_and_deduplicate(
             record[target_field] = value
         parsed_records.append(record)
 
-    return parsed_records, field_maps
+    return parsed_records
+
+
+# SupplierCatalog columns written by the API sync (compared to detect updates)
+_CATALOG_FIELDS = (
+    "description",
+    "model",
+    "quantity",
+    "selling_price",
+    "ean",
+    "part_number",
+    "supplier_sku",
+)
+
+
+def _catalog_key(
+    ean: Optional[str],
+    part_number: Optional[str],
+    supplier_sku: Optional[str],
+    fallback: Optional[str],
+) -> Tuple[str, str, str]:
+    """Identity of a catalog row: (EAN, part number, SKU), else its label."""
+    key = (
+        (ean or "").strip().lower(),
+        (part_number or "").strip().lower(),
+        (supplier_sku or "").strip().lower(),
+    )
+    if not any(key):
+        key = ("", "", (fallback or "").strip().lower())
+    return key
+
+
+class _CatalogWriter:
+    """Bring a supplier's catalog in line with records added page by page.
+
+    The current rows are loaded on creation and keyed like the incoming
+    records (``_catalog_key``). ``add`` deduplicates the records across
+    pages, inserts new keys and updates rows whose values changed, so
+    unchanged rows are not rewritten and keep their id (and the pending
+    matches pointing at them). ``finish`` deletes the rows whose key was
+    not seen. Only the first ``preview_limit`` cleaned rows are kept in
+    ``rows`` (all of them when None).
+    """
+
+    def __init__(
+        self, job: ApiFetchJob, supplier_id: int, preview_limit: Optional[int] = None
+    ) -> None:
+        self.job = job
+        self.supplier_id = supplier_id
+        self.preview_limit = preview_limit
+        self.rows: List[Dict[str, Any]] = []
+        self.inserted_count = 0
+        self.duplicate_count = 0
+        self.skipped_no_identity = 0
+        self.skipped_no_description = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.deleted_count = 0
+        self._seen_keys: Set[Tuple[str, str, str]] = set()
+
+        # key -> (id, values); extra rows sharing a key are dropped by finish
+        self._existing: Dict[Tuple[str, str, str], Tuple[int, Tuple[Any, ...]]] = {}
+        self._stale_ids: List[int] = []
+        columns = [getattr(SupplierCatalog, field) for field in _CATALOG_FIELDS]
+        existing_rows = (
+            db.session.query(SupplierCatalog.id, *columns)
+            .filter(SupplierCatalog.supplier_id == supplier_id)
+            .order_by(SupplierCatalog.id)
+        )
+        for catalog_id, *values in existing_rows:
+            row = dict(zip(_CATALOG_FIELDS, values))
+            key = _catalog_key(
+                row["ean"], row["part_number"], row["supplier_sku"],
+                row["description"] or row["model"],
+            )
+            if key in self._existing:
+                self._stale_ids.append(catalog_id)
+            else:
+                self._existing[key] = (catalog_id, tuple(values))
+
+    def add(self, parsed_records: List[Dict[str, Any]]) -> None:
+        supplier_id = self.supplier_id
+        inserts: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        for record in parsed_records:
+            temp_row = _prepare_temp_row(record)
+            supplier_sku = (temp_row.get("supplier_sku") or "").strip()
+            ean_value = (temp_row.get("ean") or "").strip()
+            part_value = (temp_row.get("part_number") or "").strip()
+            description_value = (temp_row.get("description") or "").strip()
+            model_value = (temp_row.get("model") or "").strip()
+            key = _catalog_key(
+                ean_value,
+                part_value,
+                supplier_sku,
+                _first_non_empty(
+                    description_value,
+                    model_value,
+                    record.get("name"),
+                    record.get("title"),
+                    record.get("designation"),
+                    supplier_sku,
+                ) or f"row-{self.inserted_count}",
+            )
+            is_duplicate = key in self._seen_keys
+
+            quantity_value = temp_row.get("quantity") or 0
+            price_value = temp_row.get("selling_price")
+            has_identity = any(
+                [description_value, model_value, ean_value, part_value, supplier_sku]
+            )
+            has_value = bool(quantity_value) or (
+                price_value is not None and price_value != 0
+            )
+            if not has_identity and not has_value:
+                self.skipped_no_identity += 1
+                continue
+
+            if not description_value:
+                self.skipped_no_description += 1
+                continue
+
+            if is_duplicate:
+                self.duplicate_count += 1
+                continue
+
+            self._seen_keys.add(key)
+
+            cleaned_row = {
+                "description": description_value,
+                "model": model_value or None,
+                "quantity": quantity_value,
+                "selling_price": price_value,
+                "ean": ean_value or None,
+                "part_number": part_value or None,
+                "supplier_sku": supplier_sku or None,
+            }
+
+            if self.preview_limit is None or len(self.rows) < self.preview_limit:
+                self.rows.append(cleaned_row)
+            self.inserted_count += 1
+
+            parsed_item = ParsedItem(
+                job_id=self.job.id,
+                supplier_id=supplier_id,
+                ean=cleaned_row["ean"],
+                part_number=cleaned_row["part_number"],
+                supplier_sku=supplier_sku,
+                model=cleaned_row["model"],
+                description=cleaned_row["description"],
+                brand=_stringify(record.get("brand")),
+                color=_stringify(record.get("color")),
+                memory=normalize_storage(_stringify(record.get("memory"))) or _stringify(record.get("memory")),
+                ram=normalize_ram(_stringify(record.get("ram"))) or _stringify(record.get("ram")),
+                norme=_stringify(record.get("norme")),
+                device_type=_stringify(record.get("device_type")),
+                quantity=quantity_value,
+                purchase_price=_coerce_first_float(
+                    record.get("purchase_price"),
+                    record.get("buy_price"),
+                    record.get("net_price"),
+                    record.get("cost"),
+                    record.get("price"),
+                    record.get("selling_price"),
+                ),
+                currency=_stringify(record.get("currency")),
+                recommended_price=_coerce_first_float(
+                    record.get("recommended_price"),
+                    record.get("msrp"),
+                    record.get("rrp"),
+                ),
+                updated_at=_parse_datetime(record.get("updated_at")),
+            )
+            db.session.add(parsed_item)
+
+            existing = self._existing.get(key)
+            if existing is None:
+                inserts.append({"supplier_id": supplier_id, **cleaned_row})
+            elif existing[1] != tuple(cleaned_row[field] for field in _CATALOG_FIELDS):
+                updates.append({"id": existing[0], **cleaned_row})
+
+        db_bulk.insert_rows(SupplierCatalog, inserts)
+        db_bulk.update_rows(SupplierCatalog, updates)
+        self.created_count += len(inserts)
+        self.updated_count += len(updates)
+
+    def finish(self) -> None:
+        """Delete the catalog rows that were not in the feed."""
+        removed_ids = self._stale_ids + [
+            catalog_id
+            for key, (catalog_id, _) in self._existing.items()
+            if key not in self._seen_keys
+        ]
+        # Detach the pending matches of the removed rows before deleting them
+        for start in range(0, len(removed_ids), db_bulk.DEFAULT_CHUNK_SIZE):
+            chunk = removed_ids[start:start + db_bulk.DEFAULT_CHUNK_SIZE]
+            PendingMatch.query.filter(
+                PendingMatch.temporary_import_id.in_(chunk)
+            ).update({PendingMatch.temporary_import_id: None}, synchronize_session=False)
+        self.deleted_count = db_bulk.delete_ids(SupplierCatalog, removed_ids)
 
 
 def _persist_supplier_catalog(
@@ -926,126 +1264,94 @@ def _persist_supplier_catalog(
     parsed_records: List[Dict[str, Any]],
 ) -> Tuple[List[Dict[str, Any]], int, int, int, int]:
     """Deduplicate and persist supplier catalog entries and parsed items."""
-    # Detach pending_matches referencing this supplier's catalog before bulk delete
-    catalog_ids = db.session.query(SupplierCatalog.id).filter_by(supplier_id=supplier_id)
-    PendingMatch.query.filter(
-        PendingMatch.temporary_import_id.in_(catalog_ids)
-    ).update({PendingMatch.temporary_import_id: None}, synchronize_session=False)
-
-    SupplierCatalog.query.filter_by(supplier_id=supplier_id).delete(synchronize_session=False)
-
-    seen_keys: Set[Tuple[str, str, str]] = set()
-    temp_rows: List[Dict[str, Any]] = []
-    duplicate_count = 0
-    skipped_no_identity = 0
-    skipped_no_description = 0
-    inserted_count = 0
-
-    for record in parsed_records:
-        temp_row = _prepare_temp_row(record)
-        supplier_sku = (temp_row.get("supplier_sku") or "").strip()
-        ean_value = (temp_row.get("ean") or "").strip()
-        part_value = (temp_row.get("part_number") or "").strip()
-        description_value = (temp_row.get("description") or "").strip()
-        model_value = (temp_row.get("model") or "").strip()
-        key = (
-            ean_value.lower(),
-            part_value.lower(),
-            supplier_sku.lower(),
-        )
-        if not any(key):
-            fallback = _first_non_empty(
-                description_value,
-                model_value,
-                record.get("name"),
-                record.get("title"),
-                record.get("designation"),
-                supplier_sku,
-            ) or f"row-{len(temp_rows)}"
-            key = ("", "", fallback.lower())
-        is_duplicate = key in seen_keys
-
-        quantity_value = temp_row.get("quantity") or 0
-        price_value = temp_row.get("selling_price")
-        has_identity = any(
-            [description_value, model_value, ean_value, part_value, supplier_sku]
-        )
-        has_value = bool(quantity_value) or (
-            price_value is not None and price_value != 0
-        )
-        if not has_identity and not has_value:
-            skipped_no_identity += 1
-            continue
-
-        if not description_value:
-            skipped_no_description += 1
-            continue
-
-        if is_duplicate:
-            duplicate_count += 1
-            continue
+    writer = _CatalogWriter(job, supplier_id)
+    writer.add(parsed_records)
+    writer.finish()
+    return (
+        writer.rows,
+        writer.inserted_count,
+        writer.duplicate_count,
+        writer.skipped_no_identity,
+        writer.skipped_no_description,
+    )
 
-        seen_keys.add(key)
 
-        cleaned_row = {
-            "description": description_value,
-            "model": model_value or None,
-            "quantity": quantity_value,
-            "selling_price": price_value,
-            "ean": ean_value or None,
-            "part_number": part_value or None,
-            "supplier_sku": supplier_sku or None,
-        }
+def _mapping_summary(mapping: MappingVersion) -> Dict[str, Any]:
+    return {
+        "id": mapping.id,
+        "version": mapping.version,
+        "is_active": mapping.is_active,
+        "field_count": len(mapping.fields or []),
+    }
 
-        temp_rows.append(cleaned_row)
-        inserted_count += 1
 
-        parsed_item = ParsedItem(
-            job_id=job.id,
-            supplier_id=supplier_id,
-            ean=cleaned_row["ean"],
-            part_number=cleaned_row["part_number"],
-            supplier_sku=supplier_sku,
-            model=cleaned_row["model"],
-            description=cleaned_row["description"],
-            brand=_stringify(record.get("brand")),
-            color=_stringify(record.get("color")),
-            memory=normalize_storage(_stringify(record.get("memory"))) or _stringify(record.get("memory")),
-            ram=normalize_ram(_stringify(record.get("ram"))) or _stringify(record.get("ram")),
-            norme=_stringify(record.get("norme")),
-            device_type=_stringify(record.get("device_type")),
-            quantity=quantity_value,
-            purchase_price=_coerce_first_float(
-                record.get("purchase_price"),
-                record.get("buy_price"),
-                record.get("net_price"),
-                record.get("cost"),
-                record.get("price"),
-                record.get("selling_price"),
-            ),
-            currency=_stringify(record.get("currency")),
-            recommended_price=_coerce_first_float(
-                record.get("recommended_price"),
-                record.get("msrp"),
-                record.get("rrp"),
-            ),
-            updated_at=_parse_datetime(record.get("updated_at")),
-        )
-        db.session.add(parsed_item)
+def _finish_unchanged_job(
+    job_id: int,
+    supplier: Supplier,
+    endpoint: ApiEndpoint,
+    mapping: MappingVersion,
+    state: Optional[Dict[str, Any]],
+    page_count: int,
+) -> Dict[str, Any]:
+    """Close a job whose feed is the one the current catalog was built from.
 
-        catalog_entry = SupplierCatalog(
-            supplier_id=supplier_id,
-            description=cleaned_row["description"],
-            model=cleaned_row["model"],
-            quantity=quantity_value,
-            selling_price=price_value,
-            ean=cleaned_row["ean"],
-            part_number=cleaned_row["part_number"],
-            supplier_sku=cleaned_row["supplier_sku"],
-        )
-        db.session.add(catalog_entry)
+    Whatever the run staged is rolled back; the reports of the job that
+    built the catalog are carried over.
+    """
+    db.session.rollback()
+    job = db.session.get(ApiFetchJob, job_id)
+    previous_job = db.session.get(ApiFetchJob, state.get("job_id")) if state else None
+    if previous_job is not None:
+        job.report_updated_products = previous_job.report_updated_products
+        job.report_database_missing_products = previous_job.report_database_missing_products
+        job.report_api_missing_products = previous_job.report_api_missing_products
+        job.report_api_raw_items = previous_job.report_api_raw_items
+    job.params_used = {**(job.params_used or {}), "pages": page_count, "unchanged": True}
+    job.status = "success"
+    job.error_message = None
+    job.ended_at = datetime.now(timezone.utc)
+    db.session.add(job)
+    db.session.commit()
 
-    return temp_rows, inserted_count, duplicate_count, skipped_no_identity, skipped_no_description
+    catalog_query = SupplierCatalog.query.filter_by(supplier_id=supplier.id)
+    preview_rows = [
+        {
+            "description": entry.description,
+            "model": entry.model,
+            "quantity": entry.quantity,
+            "selling_price": entry.selling_price,
+            "ean": entry.ean,
+            "part_number": entry.part_number,
+            "supplier_sku": entry.supplier_sku,
+        }
+        for entry in catalog_query.order_by(SupplierCatalog.id).limit(50)
+    ]
+    logger.info(
+        "Supplier catalog unchanged job_id=%s supplier_id=%s endpoint_id=%s pages=%d",
+        job.id, supplier.id, endpoint.id, page_count,
+    )
+    report_data = {
+        "updated_products": job.report_updated_products or [],
+        "database_missing_products": job.report_database_missing_products or [],
+        "api_missing_products": job.report_api_missing_products or [],
+        "synced": 0,
+    }
+    return {
+        "job_id": job.id,
+        "supplier_id": supplier.id,
+        "supplier": supplier.name,
+        "status": job.status,
+        "parsed_count": 0,
+        "catalog_count": catalog_query.count(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "ended_at": job.ended_at.isoformat() if job.ended_at else None,
+        "items": preview_rows,
+        "rows": preview_rows,
+        "report": report_data,
+        "api_raw_items": job.report_api_raw_items or [],
+        "mapping": _mapping_summary(mapping),
+        "unchanged": True,
+    }
 
 
 def run_fetch_job(
@@ -1074,17 +1380,85 @@ def run_fetch_job(
     db.session.commit()
 
     try:
-        items, raw_samples = _execute_api_request(job, endpoint, final_query, final_body)
+        field_maps = _checked_field_maps(mapping)
+        request_key = _fetch_request_key(endpoint, final_query, final_body, field_maps)
+        previous_state = _reusable_fetch_state(endpoint, supplier_id, request_key)
+        paginated = endpoint.pagination_type not in (None, PaginationType.NONE)
+        conditional_headers = None if paginated else _conditional_headers(previous_state)
+        stored_digests: List[str] = (previous_state or {}).get("page_digests") or []
+        page_digests: List[str] = []
+        # While the pages match the previous sync, only their RawIngest rows
+        # are flushed; they are parsed from there once a page differs
+        holding = previous_state is not None
+        writer: Optional[_CatalogWriter] = None
+        raw_samples: List[Any] = []
+        raw_count = 0
+        parsed_count = 0
+        first_headers: Mapping[str, Any] = {}
+
+        def write_items(items: List[Dict[str, Any]]) -> None:
+            nonlocal writer, raw_count, parsed_count
+            if writer is None:
+                writer = _CatalogWriter(job, supplier_id, preview_limit=50)
+            raw_count += len(items)
+            if len(raw_samples) < _MAX_RAW_SAMPLE_ITEMS:
+                raw_samples.extend(
+                    _prepare_api_raw_samples(items[: _MAX_RAW_SAMPLE_ITEMS - len(raw_samples)])
+                )
+            parsed_records = _parse_items(items, field_maps)
+            parsed_count += len(parsed_records)
+            writer.add(parsed_records)
+            db.session.flush()
 
-        parsed_records, field_maps = _parse_and_deduplicate(items, mapping)
+        def write_held_pages(before_index: Optional[int]) -> None:
+            for items in _held_page_items(job.id, endpoint.items_path, before_index):
+                write_items(items)
 
-        (
-            temp_rows,
-            inserted_count,
-            duplicate_count,
-            skipped_no_identity,
-            skipped_no_description,
-        ) = _persist_supplier_catalog(job, supplier_id, parsed_records)
+        try:
+            # Each page is parsed and flushed before the next one is requested
+            for page in _fetch_pages(
+                job, endpoint, final_query, final_body, conditional_headers
+            ):
+                position = len(page_digests)
+                page_digests.append(hashlib.sha256(page.response.content).hexdigest())
+                if position == 0:
+                    first_headers = page.response.headers
+                if holding:
+                    if (
+                        position < len(stored_digests)
+                        and page_digests[position] == stored_digests[position]
+                    ):
+                        db.session.flush()
+                        continue
+                    write_held_pages(page.index)
+                    holding = False
+                write_items(page.items)
+            if holding:
+                if page_digests == stored_digests:
+                    # Nothing was parsed nor written to the catalog
+                    raise _CatalogUnchanged()
+                # The feed lost its last pages: the held ones still count
+                write_held_pages(None)
+                holding = False
+        except _CatalogUnchanged:
+            return _finish_unchanged_job(
+                job_id, supplier, endpoint, mapping, previous_state, len(page_digests)
+            )
+
+        if not raw_count:
+            raise RuntimeError("Aucune donnée exploitable retournée par l'API fournisseur")
+        writer.finish()
+        job.params_used = {
+            **(job.params_used or {}),
+            "pages": len(page_digests),
+            "catalog_changes": {
+                "created": writer.created_count,
+                "updated": writer.updated_count,
+                "deleted": writer.deleted_count,
+            },
+        }
+        job.report_api_raw_items = raw_samples
+        db.session.add(job)
 
         report_data = _sync_prices_from_catalog(supplier_id)
 
@@ -1118,45 +1492,50 @@ def run_fetch_job(
             or endpoint.name
             or f"endpoint-{endpoint.id}",
             supplier_id=supplier_id,
-            product_count=inserted_count,
+            product_count=writer.inserted_count,
         )
         db.session.add(history)
+        db.session.flush()
+
+        endpoint.fetch_state = {
+            "request_key": request_key,
+            "page_digests": page_digests,
+            # Validators only make sense for a single-request feed
+            "etag": None if paginated else first_headers.get("ETag"),
+            "last_modified": None if paginated else first_headers.get("Last-Modified"),
+            "job_id": job.id,
+            "import_id": history.id,
+        }
+        db.session.add(endpoint)
         db.session.commit()
 
-        preview_rows = temp_rows[:50]
-
-        raw_count = len(items) if isinstance(items, list) else len(parsed_records)
-        parsed_count = len(parsed_records)
+        preview_rows = writer.rows
         logger.info(
             "Supplier catalog sync job_id=%s supplier_id=%s endpoint_id=%s "
-            "raw=%d parsed=%d inserted=%d skipped_identity=%d "
-            "skipped_desc=%d duplicates=%d",
-            job.id, supplier_id, endpoint.id,
-            raw_count, parsed_count, inserted_count,
-            skipped_no_identity, skipped_no_description, duplicate_count,
+            "pages=%d raw=%d parsed=%d kept=%d created=%d updated=%d deleted=%d "
+            "skipped_identity=%d skipped_desc=%d duplicates=%d",
+            job.id, supplier_id, endpoint.id, len(page_digests),
+            raw_count, parsed_count, writer.inserted_count,
+            writer.created_count, writer.updated_count, writer.deleted_count,
+            writer.skipped_no_identity, writer.skipped_no_description,
+            writer.duplicate_count,
         )
 
-        mapping_summary = {
-            "id": mapping.id,
-            "version": mapping.version,
-            "is_active": mapping.is_active,
-            "field_count": len(mapping.fields or []),
-        }
-
         return {
             "job_id": job.id,
             "supplier_id": supplier_id,
             "supplier": supplier.name,
             "status": job.status,
-            "parsed_count": len(parsed_records),
-            "catalog_count": len(temp_rows),
+            "parsed_count": parsed_count,
+            "catalog_count": writer.inserted_count,
             "started_at": job.started_at.isoformat() if job.started_at else None,
             "ended_at": job.ended_at.isoformat() if job.ended_at else None,
             "items": preview_rows,
             "rows": preview_rows,
             "report": report_data,
             "api_raw_items": raw_samples,
-            "mapping": mapping_summary,
+            "mapping": _mapping_summary(mapping),
+            "unchanged": False,
         }
     except Exception as exc:  # pragma: no cover - defensive logging
         db.session.rollback()
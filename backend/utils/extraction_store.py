@@ -0,0 +1,127 @@
+"""Content-addressed store of LLM extraction results (``llm_extractions``).
+
+Entries are keyed by the SHA-256 of the raw supplier label and by a
+fingerprint of the extraction prompt and reference context (brands, colors,
+model references, ...). A label string already extracted with the same
+references is reused whatever the supplier, and any change to those
+references changes the fingerprint, which invalidates older entries.
+
+Eviction: entries older than ``ttl_days`` are ignored and pruned, and the
+table is capped to ``max_entries`` by dropping the least recently used rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List
+
+from models import LlmExtraction, db
+
+_CHUNK = 500
+
+
+def label_hash(label: str) -> str:
+    """SHA-256 hex digest of a raw label."""
+    return hashlib.sha256(label.encode("utf-8")).hexdigest()
+
+
+def _chunks(values: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(values), _CHUNK):
+        yield values[start:start + _CHUNK]
+
+
+def _ttl_cutoff(ttl_days: int) -> datetime | None:
+    if ttl_days <= 0:
+        return None
+    return datetime.now(timezone.utc) - timedelta(days=ttl_days)
+
+
+def lookup(
+    labels: Iterable[str], fingerprint: str, ttl_days: int = 90
+) -> Dict[str, Dict[str, Any]]:
+    """Return {raw label: stored extraction} for the labels already extracted.
+
+    Hits are marked as used (LRU). Changes are left in the session.
+    """
+    by_hash = {label_hash(label): label for label in labels}
+    if not by_hash:
+        return {}
+    cutoff = _ttl_cutoff(ttl_days)
+    now = datetime.now(timezone.utc)
+    found: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunks(list(by_hash)):
+        query = LlmExtraction.query.filter(
+            LlmExtraction.context_fingerprint == fingerprint,
+            LlmExtraction.label_hash.in_(chunk),
+        )
+        if cutoff is not None:
+            query = query.filter(LlmExtraction.created_at >= cutoff)
+        for row in query.all():
+            row.last_used_at = now
+            row.hit_count = (row.hit_count or 0) + 1
+            found[by_hash[row.label_hash]] = dict(row.extracted_attributes)
+    return found
+
+
+def save(extractions: Dict[str, Dict[str, Any]], fingerprint: str) -> None:
+    """Store {raw label: extraction} results. Changes are left in the session."""
+    by_hash = {label_hash(label): attrs for label, attrs in extractions.items()}
+    now = datetime.now(timezone.utc)
+    for chunk in _chunks(list(by_hash)):
+        existing = {
+            row.label_hash: row
+            for row in LlmExtraction.query.filter(
+                LlmExtraction.context_fingerprint == fingerprint,
+                LlmExtraction.label_hash.in_(chunk),
+            ).all()
+        }
+        for digest in chunk:
+            row = existing.get(digest)
+            if row is not None:
+                row.extracted_attributes = by_hash[digest]
+                row.created_at = now
+                row.last_used_at = now
+            else:
+                db.session.add(LlmExtraction(
+                    label_hash=digest,
+                    context_fingerprint=fingerprint,
+                    extracted_attributes=by_hash[digest],
+                    hit_count=0,
+                    created_at=now,
+                    last_used_at=now,
+                ))
+
+
+def prune(fingerprint: str, ttl_days: int = 90, max_entries: int = 200_000) -> int:
+    """Drop stale entries and return how many rows were deleted.
+
+    Removes entries from other fingerprints (references changed), entries
+    older than ``ttl_days``, then the least recently used entries above
+    ``max_entries``.
+    """
+    removed = LlmExtraction.query.filter(
+        LlmExtraction.context_fingerprint != fingerprint
+    ).delete(synchronize_session=False)
+
+    cutoff = _ttl_cutoff(ttl_days)
+    if cutoff is not None:
+        removed += LlmExtraction.query.filter(
+            LlmExtraction.created_at < cutoff
+        ).delete(synchronize_session=False)
+
+    if max_entries > 0:
+        overflow = LlmExtraction.query.count() - max_entries
+        if overflow > 0:
+            oldest_ids = [
+                row.id
+                for row in db.session.query(LlmExtraction.id)
+                .order_by(LlmExtraction.last_used_at.asc(), LlmExtraction.id.asc())
+                .limit(overflow)
+                .all()
+            ]
+            for chunk in range(0, len(oldest_ids), _CHUNK):
+                removed += LlmExtraction.query.filter(
+                    LlmExtraction.id.in_(oldest_ids[chunk:chunk + _CHUNK])
+                ).delete(synchronize_session=False)
+    return removed
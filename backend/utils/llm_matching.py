@@ -6,18 +6,29 @@ then scores them against the product referential to create matches.
 
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
+import multiprocessing
 import os
 import re
+import threading
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
-from difflib import SequenceMatcher
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
+import numpy as np
 from flask import current_app
 from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
 
+from utils import db_bulk, extraction_store, reference_data, scoring_ledger, similarity
+from utils.run_profiler import RunProfiler
 from utils.normalize import normalize_label, normalize_ram, normalize_storage
+from utils.rate_limit import TokenBucket
 from models import (
     Brand,
     Color,
@@ -26,7 +37,6 @@ from models import (
     LabelCache,
     MatchingRun,
     MemoryOption,
-    ModelReference,
     PendingMatch,
     Product,
     ProductCalculation,
@@ -60,26 +70,30 @@ def _get_env_int(key: str, default: int) -> int:
 # ---------------------------------------------------------------------------
 
 def build_context() -> Dict[str, Any]:
-    """Load reference data from the database for LLM prompt injection."""
-    brands = [b.brand for b in Brand.query.all()]
+    """Load reference data from the database for LLM prompt injection.
+
+    Reference tables come from the shared snapshot (reloaded only when they
+    changed); few-shot examples are queried fresh since they follow validations.
+    """
+    refs = reference_data.get_snapshot()
+    brands = [b.value for b in refs.brands]
 
-    colors_raw = Color.query.all()
-    translations = ColorTranslation.query.all()
     color_synonyms: Dict[str, List[str]] = {}
-    for c in colors_raw:
-        color_synonyms[c.color] = []
-    for t in translations:
-        target = t.color_target
+    for c in refs.colors:
+        color_synonyms[c.value] = []
+    for t in refs.color_translations:
+        target = t.target
         if target not in color_synonyms:
             color_synonyms[target] = []
-        color_synonyms[target].append(t.color_source)
+        color_synonyms[target].append(t.source)
 
-    storage_options = [m.memory for m in MemoryOption.query.all()]
+    storage_options = [m.value for m in refs.memory_options]
 
-    model_refs = ModelReference.query.all()
-    model_reference_map = {r.manufacturer_code: r.commercial_name for r in model_refs}
+    model_reference_map = {
+        r.manufacturer_code: r.commercial_name for r in refs.model_references
+    }
 
-    device_types = [d.type for d in DeviceType.query.all()]
+    device_types = [d.value for d in refs.device_types]
 
     # Few-shot examples: pick the highest-confidence validated extractions with brand
     # diversity (max 3 per brand) so the LLM sees a representative mix rather than
@@ -201,25 +215,79 @@ Reponds UNIQUEMENT avec un JSON array, sans markdown ni texte autour.
 Un objet par libelle, dans le meme ordre que les entrees."""
 
 
+def extraction_context_fingerprint(context: Dict[str, Any]) -> str:
+    """Fingerprint of everything that shapes an extraction except the label.
+
+    Covers the prompt template, the injected references (brands, colors,
+    storage, model references, device types) and the model. Few-shot
+    examples are left out: they change with every validation and only
+    nudge the output.
+    """
+    prompt = build_extraction_prompt({**context, "few_shot_examples": []})
+    model = os.environ.get("LLM_MODEL", "claude-haiku-4-5-20251001")
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
 def _build_user_message(labels: List[str]) -> str:
     """Build the user message listing labels to extract."""
     lines = [f"{i + 1}. {label}" for i, label in enumerate(labels)]
     return f"Extrais les attributs de ces {len(labels)} libelles :\n" + "\n".join(lines)
 
 
+# Output budget of one extraction call; batch sizing keeps responses under it
+LLM_MAX_TOKENS = 4096
+
+# One client per process: it owns the HTTP connection pool, so keep-alive
+# connections are reused across batches, recursive splits and worker threads.
+_anthropic_client: Any = None
+_anthropic_client_key: Optional[Tuple[Any, Optional[str]]] = None
+_anthropic_client_lock = threading.Lock()
+
+
+def _get_anthropic_client(anthropic_module: Any) -> Any:
+    """Return the shared Anthropic client, recreated if the API key changes."""
+    global _anthropic_client, _anthropic_client_key
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    with _anthropic_client_lock:
+        if (
+            _anthropic_client is None
+            or _anthropic_client_key[0] is not anthropic_module
+            or _anthropic_client_key[1] != api_key
+        ):
+            _anthropic_client = anthropic_module.Anthropic()
+            _anthropic_client_key = (anthropic_module, api_key)
+        return _anthropic_client
+
+
+def _system_blocks(system_prompt: str) -> List[Dict[str, Any]]:
+    """System prompt as a cacheable prefix (identical for every batch of a run)."""
+    return [
+        {
+            "type": "text",
+            "text": system_prompt,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+
 def call_llm_extraction(
-    labels: List[str], context: Dict[str, Any]
+    labels: List[str],
+    context: Dict[str, Any],
+    system_prompt: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """Call Claude Haiku to extract attributes from supplier labels.
 
     Retries up to 2 times on failure. Falls back to splitting the batch
-    if JSON parsing fails.
+    if JSON parsing fails. ``system_prompt`` is the already rendered
+    build_extraction_prompt(context), passed by callers running many
+    batches so it is built once.
     """
     import anthropic
 
-    client = anthropic.Anthropic()
+    client = _get_anthropic_client(anthropic)
     model = os.environ.get("LLM_MODEL", "claude-haiku-4-5-20251001")
-    system_prompt = build_extraction_prompt(context)
+    if system_prompt is None:
+        system_prompt = build_extraction_prompt(context)
     user_message = _build_user_message(labels)
 
     max_retries = 2
@@ -227,8 +295,8 @@ def call_llm_extraction(
         try:
             response = client.messages.create(
                 model=model,
-                max_tokens=4096,
-                system=system_prompt,
+                max_tokens=LLM_MAX_TOKENS,
+                system=_system_blocks(system_prompt),
                 messages=[{"role": "user", "content": user_message}],
             )
             raw_text = response.content[0].text.strip()
@@ -242,11 +310,15 @@ def call_llm_extraction(
                 raise ValueError("LLM response is not a JSON array")
 
             usage = getattr(response, "usage", None)
-            token_info = {}
+            token_info = {"labels": len(labels)}
             if usage:
                 token_info = {
+                    "labels": len(labels),
+                    "label_chars": sum(len(label) for label in labels),
                     "input_tokens": getattr(usage, "input_tokens", 0),
                     "output_tokens": getattr(usage, "output_tokens", 0),
+                    "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+                    "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
                 }
 
             for item in results:
@@ -257,8 +329,11 @@ def call_llm_extraction(
         except json.JSONDecodeError:
             if attempt < max_retries and len(labels) > 1:
                 mid = len(labels) // 2
-                left = call_llm_extraction(labels[:mid], context)
-                right = call_llm_extraction(labels[mid:], context)
+                left = call_llm_extraction(labels[:mid], context, system_prompt)
+                right = call_llm_extraction(labels[mid:], context, system_prompt)
+                # Flag the split so batch sizing learns the batch was too large
+                for item in left + right:
+                    item["_token_info"] = {**item.get("_token_info", {}), "split": True}
                 return left + right
             raise
         except anthropic.AuthenticationError:
@@ -295,6 +370,140 @@ def call_llm_extraction(
             raise
 
 
+class LlmBatchSizer:
+    """Adaptive Phase 1 batch sizing.
+
+    Each label is expected to cost ``overhead + len(label) / 4`` output
+    tokens; ``overhead`` is learned from the ``output_tokens`` of completed
+    calls. Batches are filled until the estimate reaches ``headroom`` of
+    ``max_tokens`` (so long labels give smaller batches up front), and never
+    exceed a size cap that halves when a response had to be split and grows
+    back after clean batches, up to ``max_size``.
+    """
+
+    CHARS_PER_TOKEN = 4
+    SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        initial_size: int,
+        max_size: Optional[int] = None,
+        max_tokens: int = LLM_MAX_TOKENS,
+        headroom: float = 0.8,
+        overhead: float = 100.0,
+    ) -> None:
+        self.cap = max(initial_size, 1)
+        self.max_size = max(max_size or self.cap, self.cap)
+        self.budget = max_tokens * headroom
+        self.overhead = overhead
+        self.sizes: List[int] = []
+
+    def estimate(self, label: str) -> float:
+        return self.overhead + len(label) / self.CHARS_PER_TOKEN
+
+    def next_size(self, labels: List[str]) -> int:
+        """Number of ``labels`` (taken from the front) to send in the next batch."""
+        size, total = 0, 0.0
+        for label in labels[:self.cap]:
+            total += self.estimate(label)
+            if size and total > self.budget:
+                break
+            size += 1
+        return size
+
+    def batches(self, items: List[Any], label=lambda item: item) -> Iterator[List[Any]]:
+        """Split ``items`` lazily, sizing each batch when it is requested."""
+        position = 0
+        while position < len(items):
+            window = items[position:position + self.cap]
+            size = self.next_size([label(item) for item in window])
+            self.sizes.append(size)
+            yield window[:size]
+            position += size
+
+    def record(self, extractions: List[Dict[str, Any]]) -> None:
+        """Learn from the results of one batch (before _token_info is popped)."""
+        infos = [item.get("_token_info") or {} for item in extractions]
+        if any(info.get("split") for info in infos):
+            self.cap = max(self.cap // 2, 1)
+            return
+        observed = [
+            (info["output_tokens"] - info.get("label_chars", 0) / self.CHARS_PER_TOKEN)
+            / info["labels"]
+            for info in infos
+            if info.get("labels") and info.get("output_tokens")
+        ]
+        if observed:
+            sample = max(sum(observed) / len(observed), 1.0)
+            self.overhead += self.SMOOTHING * (sample - self.overhead)
+        if self.cap < self.max_size:
+            self.cap = min(self.cap + max(self.cap // 4, 1), self.max_size)
+
+
+def iter_llm_extractions(
+    batches: Iterable[List[str]],
+    context: Dict[str, Any],
+    concurrency: int = 1,
+    limiter: Optional[TokenBucket] = None,
+) -> Iterator[Tuple[int, Optional[List[Dict[str, Any]]], Optional[Exception]]]:
+    """Run call_llm_extraction over several batches, up to ``concurrency`` at once.
+
+    Yields ``(batch_index, extractions, error)`` strictly in batch order,
+    whatever the completion order, so callers can write results to the
+    database sequentially on their own session. Exactly one of
+    ``extractions`` / ``error`` is set. ``limiter`` is acquired before each
+    API request to keep the aggregate rate under the provider limit. The
+    system prompt is rendered once for all batches.
+
+    ``batches`` is consumed lazily: the next batch is only requested once a
+    result has been handed to the caller, so a generator can size it from
+    the results seen so far.
+    """
+    system_prompt = build_extraction_prompt(context)
+
+    def _extract(labels: List[str]) -> List[Dict[str, Any]]:
+        if limiter is not None:
+            limiter.acquire()
+        return call_llm_extraction(labels, context, system_prompt)
+
+    batch_iter = iter(batches)
+
+    if concurrency <= 1:
+        for index, labels in enumerate(batch_iter):
+            try:
+                yield index, _extract(labels), None
+            except Exception as exc:
+                yield index, None, exc
+        return
+
+    in_flight: deque = deque()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="llm-extract"
+    ) as executor:
+
+        def _submit_next() -> None:
+            labels = next(batch_iter, None)
+            if labels is not None:
+                in_flight.append(executor.submit(_extract, labels))
+
+        try:
+            for _ in range(concurrency):
+                _submit_next()
+            index = 0
+            while in_flight:
+                future = in_flight.popleft()
+                try:
+                    yield index, future.result(), None
+                except Exception as exc:
+                    yield index, None, exc
+                index += 1
+                _submit_next()
+        finally:
+            # Consumer stopped early (or raised): drop batches not started yet
+            for future in in_flight:
+                future.cancel()
+
+
 # ---------------------------------------------------------------------------
 # Function 4: score_match
 # ---------------------------------------------------------------------------
@@ -317,7 +526,7 @@ def _normalize_storage(value: Optional[str]) -> Optional[str]:
 
 def _fuzzy_ratio(a: str, b: str) -> float:
     """Return similarity ratio between two strings (0.0 to 1.0)."""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    return similarity.ratio(a.lower(), b.lower())
 
 
 # Device types that carry no category information — skip disqualification
@@ -559,24 +768,270 @@ def _apply_post_processing(
     return extraction
 
 
+_EE_FULL_RE = re.compile(r'\benterprise\s+edition\b')
+_EE_SUFFIX_RE = re.compile(r'(?<![a-z])ee(?![a-z])')
+_DS_RE = re.compile(r'\b(?:dual\s*sim|ds)\b')
+_5G_RE = re.compile(r'\b5G\b')
+_4G_RE = re.compile(r'\b4G\b')
+
+
+@dataclass(frozen=True, slots=True)
+class ProductFeatures:
+    """Product-side scoring inputs, derived once from a Product row.
+
+    Everything score_match needs from the product is computed here so the
+    per-pair loop only compares precomputed values.
+    """
+
+    id: Optional[int]
+    brand: str
+    device_type: str
+    storage: Optional[str]
+    variants: frozenset
+    model: str
+    model_base: str
+    model_versions: Tuple[str, ...]
+    color: str
+    has_ee: bool
+    has_ds: bool
+    connectivity: str
+    region: str
+    label_model: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class LabelFeatures:
+    """Label-side scoring inputs, derived once from extracted_attributes."""
+
+    brand: str
+    device_type: str
+    storage: Optional[str]
+    variants: frozenset
+    model: str
+    model_base: str
+    model_versions: Tuple[str, ...]
+    color: str
+    color_normalized: str
+    ee: Any
+    ds: Any
+    connectivity: str
+    region: str
+    label_norm: Optional[str]
+
+
+def build_product_features(product: Product, mappings: Dict[str, Any]) -> ProductFeatures:
+    """Derive the scoring features of a product (see ProductFeatures)."""
+    prod_brand = (product.brand.brand if product.brand else "").lower()
+
+    prod_type_raw = (product.type.type if product.type else "").strip().lower()
+    prod_type = (
+        "" if prod_type_raw in _DEVICE_TYPE_SKIP
+        else _normalize_device_type(prod_type_raw)
+    )
+
+    # Use official memory field first, fall back to model name
+    prod_storage = _normalize_storage(product.memory.memory if product.memory else None)
+    if prod_storage is None and product.model:
+        prod_storage = _normalize_storage(product.model)
+
+    prod_model_raw = (product.model or "").strip().lower()
+    # Remove brand from product model for comparison
+    if prod_brand and prod_model_raw.startswith(prod_brand):
+        prod_model_raw = prod_model_raw[len(prod_brand):].strip()
+    # Extract variants BEFORE cleaning — _clean_model_for_scoring strips "+"
+    variants = _extract_model_variants(prod_model_raw)
+    prod_model = _clean_model_for_scoring(prod_model_raw)
+    color_words = mappings.get("color_words", set())
+    if color_words:
+        prod_model = _strip_color_words(prod_model, color_words)
+    base, versions = _extract_model_versions(prod_model)
+
+    prod_model_lower = (product.model or "").lower()
+    prod_model_upper = (product.model or "").upper()
+    if _5G_RE.search(prod_model_upper):
+        connectivity = "5G"
+    elif _4G_RE.search(prod_model_upper):
+        connectivity = "4G"
+    else:
+        connectivity = ""
+
+    # Infer product region from model/description if not explicitly set
+    prod_region = product.region
+    if not prod_region:
+        inferred = _infer_region_from_text(product.model or "")
+        if not inferred:
+            inferred = _infer_region_from_text(product.description or "")
+        prod_region = inferred or "EU"
+
+    return ProductFeatures(
+        id=product.id,
+        brand=prod_brand,
+        device_type=prod_type,
+        storage=prod_storage,
+        variants=variants,
+        model=prod_model,
+        model_base=base,
+        model_versions=tuple(versions),
+        color=(product.color.color if product.color else "").lower(),
+        has_ee=bool(
+            _EE_FULL_RE.search(prod_model_lower) or _EE_SUFFIX_RE.search(prod_model_lower)
+        ),
+        has_ds=bool(_DS_RE.search(prod_model_lower)),
+        connectivity=connectivity,
+        region=prod_region.strip().upper(),
+        label_model=normalize_label(product.model) if product.model else None,
+    )
+
+
+def build_label_features(extracted: Dict[str, Any], mappings: Dict[str, Any]) -> LabelFeatures:
+    """Derive the scoring features of extracted label attributes."""
+    ext_model_raw = (extracted.get("model_family") or "").strip().lower()
+    variants = _extract_model_variants(ext_model_raw)
+    ext_model = _clean_model_for_scoring(ext_model_raw)
+    color_words = mappings.get("color_words", set())
+    if color_words:
+        ext_model = _strip_color_words(ext_model, color_words)
+    base, versions = _extract_model_versions(ext_model)
+
+    ext_color = (extracted.get("color") or "").strip().lower()
+    color_translations = mappings.get("color_translations", {})
+
+    # Fallback to raw_label inference if LLM extraction predates EE / dual_sim fields.
+    raw = extracted.get("raw_label") or ""
+    ext_ee = extracted.get("enterprise_edition")
+    if ext_ee is None:
+        raw_lower = raw.lower()
+        ext_ee = bool(_EE_FULL_RE.search(raw_lower) or _EE_SUFFIX_RE.search(raw_lower))
+    ext_ds = extracted.get("dual_sim")
+    if ext_ds is None:
+        ext_ds = bool(_DS_RE.search(raw.lower()))
+
+    ext_connectivity = (extracted.get("connectivity") or "").strip().upper()
+    if not ext_connectivity:
+        raw_upper = raw.upper()
+        if _5G_RE.search(raw_upper):
+            ext_connectivity = "5G"
+        elif _4G_RE.search(raw_upper):
+            ext_connectivity = "4G"
+
+    # Raw label stripped of already-scored attributes (brand, 5G, RAM)
+    # to avoid double-counting in the label similarity bonus.
+    label_norm = None
+    raw_label = raw.strip()
+    if raw_label:
+        label_norm = normalize_label(raw_label)
+        brand = (extracted.get("brand") or "").strip().lower()
+        if brand:
+            label_norm = re.sub(r"\b" + re.escape(brand) + r"\b", "", label_norm)
+        label_norm = re.sub(r"\b5g\b", "", label_norm)
+        label_norm = re.sub(r"\b\d+go\s*ram\b", "", label_norm)
+        label_norm = re.sub(r"\bram\b", "", label_norm)
+        label_norm = re.sub(r"\s+", " ", label_norm).strip()
+
+    return LabelFeatures(
+        brand=(extracted.get("brand") or "").strip().lower(),
+        device_type=_normalize_device_type(extracted.get("device_type") or ""),
+        storage=_normalize_storage(extracted.get("storage")),
+        variants=variants,
+        model=ext_model,
+        model_base=base,
+        model_versions=tuple(versions),
+        color=ext_color,
+        color_normalized=color_translations.get(ext_color, ext_color).lower(),
+        ee=ext_ee,
+        ds=ext_ds,
+        connectivity=ext_connectivity,
+        region=(extracted.get("region") or "EU").strip().upper(),
+        label_norm=label_norm,
+    )
+
+
+# LabelFeatures fields shared by many labels (brand, "256go", "noir", ...):
+# FeatureCache keeps one object per distinct value.
+_INTERNED_LABEL_FIELDS = (
+    "brand", "device_type", "storage", "variants", "model", "model_base",
+    "model_versions", "color", "color_normalized", "connectivity", "region",
+)
+
+
+class FeatureCache:
+    """Per-run memo of ProductFeatures and LabelFeatures.
+
+    Products are keyed by id plus a hash of every field that feeds scoring,
+    labels by LabelCache id plus normalized_label, so the regex-heavy
+    feature derivation runs once per entity instead of once per pair.
+    Repeated label values (brand, model family, storage, color, ...) are
+    interned so the cached labels share them.
+    """
+
+    def __init__(self, mappings: Dict[str, Any]) -> None:
+        self.mappings = mappings
+        self._products: Dict[Tuple[Any, int], ProductFeatures] = {}
+        self._labels: Dict[Tuple[Any, str], LabelFeatures] = {}
+        self._interned: Dict[Any, Any] = {}
+
+    def product(self, product: Product) -> ProductFeatures:
+        fingerprint = hash((
+            product.model,
+            product.description,
+            product.region,
+            product.brand.brand if product.brand else None,
+            product.memory.memory if product.memory else None,
+            product.color.color if product.color else None,
+            product.type.type if product.type else None,
+        ))
+        key = (product.id, fingerprint)
+        features = self._products.get(key)
+        if features is None:
+            features = build_product_features(product, self.mappings)
+            self._products[key] = features
+        return features
+
+    def label(self, cache_entry: LabelCache) -> LabelFeatures:
+        key = (cache_entry.id, cache_entry.normalized_label)
+        features = self._labels.get(key)
+        if features is None:
+            features = build_label_features(
+                cache_entry.extracted_attributes or {}, self.mappings
+            )
+            interned = self._interned
+            features = replace(features, **{
+                name: interned.setdefault(value, value)
+                for name in _INTERNED_LABEL_FIELDS
+                if (value := getattr(features, name)) is not None
+            })
+            self._labels[key] = features
+        return features
+
+
 def score_match(
-    extracted: Dict[str, Any],
-    product: Product,
+    extracted: Dict[str, Any] | LabelFeatures,
+    product: Product | ProductFeatures,
     mappings: Dict[str, Any],
 ) -> Tuple[int, Dict[str, Any]]:
     """Score a match between extracted attributes and a product.
 
+    Both sides accept precomputed features (see FeatureCache); raw
+    extracted_attributes dicts and Product rows are converted on the fly.
+
     Returns (score, details) where score is 0-100.
     Brand or storage mismatch -> 0.
     """
+    if not isinstance(extracted, LabelFeatures):
+        extracted = build_label_features(extracted, mappings)
+    if not isinstance(product, ProductFeatures):
+        product = build_product_features(product, mappings)
+    return _score_features(extracted, product)
+
+
+def _score_features(ext: LabelFeatures, prod: ProductFeatures) -> Tuple[int, Dict[str, Any]]:
+    """Score precomputed label features against precomputed product features."""
     details: Dict[str, Any] = {}
     score = 0
 
     # --- Brand (hard disqualifier if both sides have a brand and they differ) ---
-    ext_brand = (extracted.get("brand") or "").strip().lower()
-    prod_brand = (product.brand.brand if product.brand else "").lower()
-    if ext_brand and prod_brand:
-        if ext_brand != prod_brand:
+    if ext.brand and prod.brand:
+        if ext.brand != prod.brand:
             details["brand"] = 0
             details["disqualified"] = "brand_mismatch"
             return 0, details
@@ -586,32 +1041,22 @@ def score_match(
         details["brand"] = 0
 
     # --- Device type (hard disqualifier if both sides have a meaningful type) ---
-    ext_type = _normalize_device_type(extracted.get("device_type") or "")
-    prod_type_raw = (product.type.type if product.type else "").strip().lower()
-    if prod_type_raw not in _DEVICE_TYPE_SKIP:
-        prod_type = _normalize_device_type(prod_type_raw)
-        if ext_type and prod_type and _fuzzy_ratio(ext_type, prod_type) < 0.6:
-            details["device_type"] = 0
-            details["disqualified"] = "device_type_mismatch"
-            return 0, details
+    if ext.device_type and prod.device_type and _fuzzy_ratio(ext.device_type, prod.device_type) < 0.6:
+        details["device_type"] = 0
+        details["disqualified"] = "device_type_mismatch"
+        return 0, details
 
     # --- Storage (25 pts) ---
-    ext_storage = _normalize_storage(extracted.get("storage"))
-    # Use official memory field first, fall back to model name
-    prod_storage = _normalize_storage(product.memory.memory if product.memory else None)
-    if prod_storage is None and product.model:
-        prod_storage = _normalize_storage(product.model)
-
-    if ext_storage and prod_storage:
+    if ext.storage and prod.storage:
         # Both sides have storage → hard disqualifier on mismatch
-        if ext_storage == prod_storage:
+        if ext.storage == prod.storage:
             details["storage"] = 25
             score += 25
         else:
             details["storage"] = 0
             details["disqualified"] = "storage_mismatch"
             return 0, details
-    elif ext_storage or prod_storage:
+    elif ext.storage or prod.storage:
         # Only one side has storage → 0 pts, no disqualify
         details["storage"] = 0
     else:
@@ -620,48 +1065,28 @@ def score_match(
         score += 25
 
     # --- Model family (45 pts) ---
-    ext_model_raw = (extracted.get("model_family") or "").strip().lower()
-    prod_model_raw = (product.model or "").strip().lower()
-    # Remove brand from product model for comparison
-    if prod_brand and prod_model_raw.startswith(prod_brand):
-        prod_model_raw = prod_model_raw[len(prod_brand):].strip()
-
-    # Extract variants BEFORE cleaning — _clean_model_for_scoring strips "+"
-    # which is needed to distinguish S26 from S26+, FE from FE+, etc.
-    ext_variants = _extract_model_variants(ext_model_raw)
-    prod_variants = _extract_model_variants(prod_model_raw)
-
-    # Clean both sides with the same function for symmetric comparison
-    ext_model = _clean_model_for_scoring(ext_model_raw)
-    prod_model = _clean_model_for_scoring(prod_model_raw)
-    # Strip color words from product model (color often embedded in model field)
-    color_words = mappings.get("color_words", set())
-    if color_words:
-        prod_model = _strip_color_words(prod_model, color_words)
-        ext_model = _strip_color_words(ext_model, color_words)
-
-    if ext_model and prod_model:
+    if ext.model and prod.model:
         # Hard disqualifier: same model base but different version numbers.
         # Tokenize into (text_base, version_numbers) so that:
         #   "iphone 15 pro" vs "iphone 16 pro" → base similar, versions [15] vs [16] → disqualify
         #   "tab a9" vs "tab s9" → base differs ("tab a" vs "tab s") → let fuzzy ratio handle it
         #   "redmi note 13 pro" vs "redmi note 12 pro" → same base, [13] vs [12] → disqualify
-        ext_base, ext_versions = _extract_model_versions(ext_model)
-        prod_base, prod_versions = _extract_model_versions(prod_model)
-
-        if ext_versions and prod_versions and _fuzzy_ratio(ext_base, prod_base) >= 0.8:
-            if ext_versions != prod_versions:
+        if (
+            ext.model_versions and prod.model_versions
+            and _fuzzy_ratio(ext.model_base, prod.model_base) >= 0.8
+        ):
+            if ext.model_versions != prod.model_versions:
                 details["model_family"] = 0
                 details["disqualified"] = "model_version_mismatch"
                 return 0, details
 
         # Hard disqualifier: different variant suffixes.
-        if ext_variants != prod_variants:
+        if ext.variants != prod.variants:
             details["model_family"] = 0
             details["disqualified"] = "model_variant_mismatch"
             return 0, details
 
-        ratio = _fuzzy_ratio(ext_model, prod_model)
+        ratio = _fuzzy_ratio(ext.model, prod.model)
         if ratio >= 0.95:
             details["model_family"] = 45
             score += 45
@@ -674,76 +1099,40 @@ def score_match(
             score += details["model_family"]
         else:
             details["model_family"] = 0
-    elif not ext_model:
-        details["model_family"] = 0
     else:
         details["model_family"] = 0
 
     # --- Color (hard disqualifier if both sides have a color and they differ) ---
-    ext_color = (extracted.get("color") or "").strip().lower()
-    prod_color = (product.color.color if product.color else "").lower()
-    color_translations = mappings.get("color_translations", {})
-
-    if ext_color and prod_color:
-        normalized_ext = color_translations.get(ext_color, ext_color).lower()
-        if normalized_ext == prod_color or ext_color == prod_color:
+    if ext.color and prod.color:
+        if ext.color_normalized == prod.color or ext.color == prod.color:
             details["color"] = 15
             score += 15
         else:
             details["color"] = 0
             details["disqualified"] = "color_mismatch"
             return 0, details
-    elif not ext_color and not prod_color:
+    elif not ext.color and not prod.color:
         details["color"] = 15
         score += 15
     else:
         details["color"] = 0
 
     # --- Enterprise Edition (soft discriminator, -20 on mismatch) ---
-    # Fallback to raw_label inference if LLM extraction predates EE field.
-    ext_ee = extracted.get("enterprise_edition")
-    if ext_ee is None:
-        raw = (extracted.get("raw_label") or "").lower()
-        ext_ee = bool(re.search(r'\benterprise\s+edition\b', raw)
-                       or re.search(r'(?<![a-z])ee(?![a-z])', raw))
-    prod_model_lower = (product.model or "").lower()
-    prod_has_ee = bool(
-        re.search(r'\benterprise\s+edition\b', prod_model_lower)
-        or re.search(r'(?<![a-z])ee(?![a-z])', prod_model_lower)
-    )
-    if ext_ee != prod_has_ee:
+    if ext.ee != prod.has_ee:
         score = max(score - 20, 0)
         details["enterprise_edition"] = -20
     else:
         details["enterprise_edition"] = 0
 
     # --- Dual SIM (soft discriminator, -10 on mismatch) ---
-    # Fallback to raw_label inference if LLM extraction predates dual_sim field.
-    ext_ds = extracted.get("dual_sim")
-    if ext_ds is None:
-        raw = (extracted.get("raw_label") or "").lower()
-        ext_ds = bool(re.search(r'\b(?:dual\s*sim|ds)\b', raw))
-    prod_has_ds = bool(re.search(r'\b(?:dual\s*sim|ds)\b', prod_model_lower))
-    if ext_ds != prod_has_ds:
+    if ext.ds != prod.has_ds:
         score = max(score - 10, 0)
         details["dual_sim"] = -10
     else:
         details["dual_sim"] = 0
 
     # --- Connectivity 4G/5G (soft discriminator, -15 on mismatch) ---
-    ext_connectivity = (extracted.get("connectivity") or "").strip().upper()
-    if not ext_connectivity:
-        raw = (extracted.get("raw_label") or "").upper()
-        if re.search(r'\b5G\b', raw):
-            ext_connectivity = "5G"
-        elif re.search(r'\b4G\b', raw):
-            ext_connectivity = "4G"
-    prod_connectivity = ""
-    if re.search(r'\b5G\b', (product.model or "").upper()):
-        prod_connectivity = "5G"
-    elif re.search(r'\b4G\b', (product.model or "").upper()):
-        prod_connectivity = "4G"
-    if ext_connectivity and prod_connectivity and ext_connectivity != prod_connectivity:
+    if ext.connectivity and prod.connectivity and ext.connectivity != prod.connectivity:
         score = max(score - 15, 0)
         details["connectivity"] = -15
     else:
@@ -752,19 +1141,7 @@ def score_match(
     # --- Region (multiplier ×0 or ×1; null = EU) ---
     # Region is not additive — it gates the entire score.
     # Mismatch → score = 0. Match → score passes through unchanged.
-    ext_region = (extracted.get("region") or "EU").strip().upper()
-
-    # Infer product region from model/description if not explicitly set
-    prod_region = product.region
-    if not prod_region:
-        # Try to infer from model name or description
-        inferred = _infer_region_from_text(product.model or "")
-        if not inferred:
-            inferred = _infer_region_from_text(product.description or "")
-        prod_region = inferred or "EU"
-    prod_region = prod_region.strip().upper()
-
-    if ext_region != prod_region:
+    if ext.region != prod.region:
         details["region"] = 0
         details["disqualified"] = "region_mismatch"
         return 0, details
@@ -773,17 +1150,8 @@ def score_match(
     # Compares raw supplier label against Odoo model name after stripping
     # already-scored attributes (brand, 5G, RAM) to avoid double-counting.
     # Key role: distinguish near-identical models (iPhone 15 vs iPhone 15 Plus).
-    raw_label = (extracted.get("raw_label") or "").strip()
-    if raw_label and product.model:
-        label_norm = normalize_label(raw_label)
-        brand = (extracted.get("brand") or "").strip().lower()
-        if brand:
-            label_norm = re.sub(r"\b" + re.escape(brand) + r"\b", "", label_norm)
-        label_norm = re.sub(r"\b5g\b", "", label_norm)
-        label_norm = re.sub(r"\b\d+go\s*ram\b", "", label_norm)
-        label_norm = re.sub(r"\bram\b", "", label_norm)
-        label_norm = re.sub(r"\s+", " ", label_norm).strip()
-        ratio = _fuzzy_ratio(label_norm, normalize_label(product.model))
+    if ext.label_norm is not None and prod.label_model is not None:
+        ratio = _fuzzy_ratio(ext.label_norm, prod.label_model)
         if ratio >= 0.85:
             details["label_similarity"] = 15
             score += 15
@@ -804,22 +1172,544 @@ def score_match(
     return min(max(score, 0), 100), details
 
 
+# ---------------------------------------------------------------------------
+# Function 4b: score_matches_batch
+# ---------------------------------------------------------------------------
+
+def _encode_column(values: List[Any], table: Dict[Any, int]) -> np.ndarray:
+    """Intern values into integer codes, extending ``table`` in place."""
+    return np.fromiter(
+        (table.setdefault(v, len(table)) for v in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+
+
+class CatalogLine(NamedTuple):
+    """The SupplierCatalog columns the matching job reads."""
+
+    id: int
+    supplier_id: Optional[int]
+    description: Optional[str]
+    model: Optional[str]
+    ean: Optional[str]
+    part_number: Optional[str]
+    supplier_sku: Optional[str]
+
+
+CATALOG_FETCH_SIZE = 2000
+
+
+def iter_catalog_lines(supplier_id: Optional[int] = None) -> Iterator[CatalogLine]:
+    """Stream the catalog as CatalogLine tuples, ``CATALOG_FETCH_SIZE`` rows at a time.
+
+    Column query with ``yield_per``: no SupplierCatalog instance enters the
+    session and PostgreSQL fetches the rows through a server-side cursor.
+    """
+    query = db.session.query(
+        SupplierCatalog.id,
+        SupplierCatalog.supplier_id,
+        SupplierCatalog.description,
+        SupplierCatalog.model,
+        SupplierCatalog.ean,
+        SupplierCatalog.part_number,
+        SupplierCatalog.supplier_sku,
+    )
+    if supplier_id:
+        query = query.filter(SupplierCatalog.supplier_id == supplier_id)
+    for row in query.order_by(SupplierCatalog.id).yield_per(CATALOG_FETCH_SIZE):
+        yield CatalogLine(*row)
+
+
+def group_catalog_lines(
+    lines: Iterable[CatalogLine],
+) -> Dict[Tuple[int, str], List[CatalogLine]]:
+    """Group catalog lines by (supplier_id, normalized label), in input order."""
+    grouped: Dict[Tuple[int, str], List[CatalogLine]] = {}
+    for line in lines:
+        normalized = normalize_label(line.description or line.model or "")
+        if normalized and line.supplier_id:
+            grouped.setdefault((line.supplier_id, normalized), []).append(line)
+    return grouped
+
+
+class LabelCandidate:
+    """One row of a CandidateStore, read like a LabelCache entry.
+
+    Exposes the attributes Phase 2, BM25Blocker and the embedder read (id,
+    supplier_id, normalized_label, extracted_attributes) without an ORM
+    instance. ``extracted_attributes`` returns a fresh dict on each access.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "CandidateStore", row: int) -> None:
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self) -> int:
+        return int(self._store.ids[self._row])
+
+    @property
+    def supplier_id(self) -> int:
+        return int(self._store.supplier_ids[self._row])
+
+    @property
+    def normalized_label(self) -> str:
+        return self._store.normalized_labels[self._row]
+
+    @property
+    def extracted_attributes(self) -> Optional[Dict[str, Any]]:
+        return self._store.attributes(self._row)
+
+    def __repr__(self) -> str:
+        return f"<LabelCandidate {self.id} {self.normalized_label!r}>"
+
+
+class CandidateStore:
+    """Compact snapshot of the LabelCache rows Phase 2 scores against.
+
+    Built from a narrow column query, so no LabelCache instance enters the
+    session: ids and supplier ids live in NumPy arrays, brands are interned
+    (one string per distinct brand) and extracted_attributes is kept as
+    compact JSON text, decoded only when a row is read. Scoring columns
+    (color, region, storage codes, ...) are in the CandidateMatrix built
+    from the same rows. ``entries[i]`` is the LabelCandidate of row ``i``.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, int, str, Optional[Dict[str, Any]]]]) -> None:
+        ids: List[int] = []
+        supplier_ids: List[int] = []
+        self.normalized_labels: List[str] = []
+        self.brands: List[str] = []
+        self._attributes: List[Optional[str]] = []
+        interned: Dict[str, str] = {}
+        for label_id, supplier_id, normalized_label, attrs in rows:
+            ids.append(label_id)
+            supplier_ids.append(supplier_id)
+            self.normalized_labels.append(normalized_label)
+            brand = ((attrs or {}).get("brand") or "").strip().lower()
+            self.brands.append(interned.setdefault(brand, brand))
+            self._attributes.append(
+                None if attrs is None
+                else json.dumps(attrs, ensure_ascii=False, separators=(",", ":"))
+            )
+        self.ids = np.array(ids, dtype=np.int64)
+        self.supplier_ids = np.array(supplier_ids, dtype=np.int64)
+        self.entries: List[LabelCandidate] = [LabelCandidate(self, row) for row in range(len(ids))]
+
+    @classmethod
+    def load(cls, supplier_id: Optional[int] = None) -> "CandidateStore":
+        """Extracted LabelCache entries awaiting a match (product_id=None)."""
+        query = db.session.query(
+            LabelCache.id,
+            LabelCache.supplier_id,
+            LabelCache.normalized_label,
+            LabelCache.extracted_attributes,
+        ).filter(
+            LabelCache.match_source == "extracted",
+            LabelCache.product_id.is_(None),
+        )
+        if supplier_id:
+            query = query.filter(LabelCache.supplier_id == supplier_id)
+        return cls(query.order_by(LabelCache.id))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def attributes(self, row: int) -> Optional[Dict[str, Any]]:
+        raw = self._attributes[row]
+        return None if raw is None else json.loads(raw)
+
+    def brand_rows(self) -> Dict[str, List[int]]:
+        """{lowercase brand: rows}, "" for labels without a brand."""
+        out: Dict[str, List[int]] = {}
+        for row, brand in enumerate(self.brands):
+            out.setdefault(brand, []).append(row)
+        return out
+
+
+class CandidateMatrix:
+    """Columnar view of LabelCache candidates for batch scoring.
+
+    Each hard-disqualifier attribute of LabelFeatures is interned into an
+    integer column so score_matches_batch can reject candidates with NumPy
+    comparisons instead of one score_match call per candidate.
+    Row ``i`` describes ``entries[i]``.
+    """
+
+    def __init__(self, entries: list, features: List[LabelFeatures]) -> None:
+        self.entries = list(entries)
+        self.features = list(features)
+        self.row_by_id: Dict[int, int] = {e.id: i for i, e in enumerate(self.entries)}
+
+        self._brands: Dict[Any, int] = {}
+        self._types: Dict[Any, int] = {}
+        self._storages: Dict[Any, int] = {}
+        self._versions: Dict[Any, int] = {}
+        self._bases: Dict[Any, int] = {}
+        self._variants: Dict[Any, int] = {}
+        self._colors: Dict[Any, int] = {}
+        self._regions: Dict[Any, int] = {}
+
+        feats = self.features
+        self.brand = _encode_column([f.brand for f in feats], self._brands)
+        self.device_type = _encode_column([f.device_type for f in feats], self._types)
+        self.storage = _encode_column([f.storage for f in feats], self._storages)
+        self.versions = _encode_column([f.model_versions for f in feats], self._versions)
+        self.base = _encode_column([f.model_base for f in feats], self._bases)
+        self.variants = _encode_column([f.variants for f in feats], self._variants)
+        # Raw and translated colors share one table so their codes are comparable
+        self.color = _encode_column([f.color for f in feats], self._colors)
+        self.color_normalized = _encode_column(
+            [f.color_normalized for f in feats], self._colors
+        )
+        self.region = _encode_column([f.region for f in feats], self._regions)
+
+        self.has_brand = np.array([bool(f.brand) for f in feats], dtype=bool)
+        self.has_type = np.array([bool(f.device_type) for f in feats], dtype=bool)
+        self.has_storage = np.array([bool(f.storage) for f in feats], dtype=bool)
+        self.has_model = np.array([bool(f.model) for f in feats], dtype=bool)
+        self.has_versions = np.array([bool(f.model_versions) for f in feats], dtype=bool)
+        self.has_color = np.array([bool(f.color) for f in feats], dtype=bool)
+
+        # Fuzzy gates depend only on (label value, product value): memoized per pair of values
+        self._type_ratio: Dict[Tuple[int, str], bool] = {}
+        self._base_ratio: Dict[Tuple[int, str], bool] = {}
+
+    @classmethod
+    def from_entries(cls, entries: list, feature_cache: "FeatureCache") -> "CandidateMatrix":
+        return cls(entries, [feature_cache.label(e) for e in entries])
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # ORM rows stay in the parent process: a pickled matrix (scoring
+        # worker) only knows row numbers.
+        state = self.__dict__.copy()
+        state["entries"] = []
+        state["row_by_id"] = {}
+        return state
+
+    def _value_mask(
+        self,
+        table: Dict[Any, int],
+        memo: Dict[Tuple[int, str], bool],
+        prod_value: str,
+        predicate,
+    ) -> np.ndarray:
+        """Evaluate ``predicate(label_value, prod_value)`` once per distinct label value."""
+        out = np.zeros(len(table), dtype=bool)
+        for value, code in table.items():
+            key = (code, prod_value)
+            hit = memo.get(key)
+            if hit is None:
+                hit = bool(predicate(value, prod_value))
+                memo[key] = hit
+            out[code] = hit
+        return out
+
+    def disqualified(
+        self,
+        prod: ProductFeatures,
+        rows: np.ndarray,
+        reasons: Optional[Dict[str, int]] = None,
+    ) -> np.ndarray:
+        """Boolean mask over ``rows``: True where a hard disqualifier fires.
+
+        Mirrors the brand, device type, storage, version, variant, color and
+        region gates of score_match. When ``reasons`` is given, each rejected
+        row adds 1 to the reason score_match would report for it (the first
+        gate that fires).
+        """
+        mask = np.zeros(len(rows), dtype=bool)
+
+        def gate(reason: str, hit: np.ndarray) -> None:
+            nonlocal mask
+            if reasons is not None:
+                fresh = int(np.count_nonzero(hit & ~mask))
+                if fresh:
+                    reasons[reason] = reasons.get(reason, 0) + fresh
+            mask |= hit
+
+        if prod.brand:
+            gate("brand_mismatch", self.has_brand[rows] & (
+                self.brand[rows] != self._brands.get(prod.brand, -1)
+            ))
+
+        if prod.device_type:
+            type_bad = self._value_mask(
+                self._types, self._type_ratio, prod.device_type,
+                lambda v, p: _fuzzy_ratio(v, p) < 0.6,
+            )
+            gate("device_type_mismatch", self.has_type[rows] & type_bad[self.device_type[rows]])
+
+        if prod.storage:
+            gate("storage_mismatch", self.has_storage[rows] & (
+                self.storage[rows] != self._storages.get(prod.storage, -1)
+            ))
+
+        if prod.model:
+            model_rows = self.has_model[rows]
+            if prod.model_versions:
+                base_close = self._value_mask(
+                    self._bases, self._base_ratio, prod.model_base,
+                    lambda v, p: _fuzzy_ratio(v, p) >= 0.8,
+                )
+                gate(
+                    "model_version_mismatch",
+                    model_rows
+                    & self.has_versions[rows]
+                    & base_close[self.base[rows]]
+                    & (self.versions[rows] != self._versions.get(prod.model_versions, -1)),
+                )
+            gate("model_variant_mismatch", model_rows & (
+                self.variants[rows] != self._variants.get(prod.variants, -1)
+            ))
+
+        if prod.color:
+            color_code = self._colors.get(prod.color, -1)
+            gate("color_mismatch", self.has_color[rows] & (
+                (self.color_normalized[rows] != color_code)
+                & (self.color[rows] != color_code)
+            ))
+
+        gate("region_mismatch", self.region[rows] != self._regions.get(prod.region, -1))
+        return mask
+
+
+def score_matches_batch(
+    product_features: ProductFeatures,
+    candidate_matrix: CandidateMatrix,
+    rows: Optional[np.ndarray] = None,
+    reasons: Optional[Dict[str, int]] = None,
+) -> Tuple[List[Tuple[int, Dict[str, Any], int]], Optional[Tuple[Dict[str, Any], int]]]:
+    """Score one product against many candidates in a single call.
+
+    Hard disqualifiers are decided in bulk on the candidate matrix; the fuzzy
+    model and label ratios only run on the rows that survive them.
+
+    Args:
+        rows: candidate row indices to score, in order (all rows if None).
+        reasons: if given, counts the disqualified rows per reason.
+
+    Returns (scored, first_disqualified) where scored lists
+    (score, details, row) for every row with score > 0 in ``rows`` order, and
+    first_disqualified is (details, row) for the first rejected row, or None.
+    Scores and details are identical to score_match.
+    """
+    if rows is None:
+        rows = np.arange(len(candidate_matrix))
+    if len(rows) == 0:
+        return [], None
+
+    disqualified = candidate_matrix.disqualified(product_features, rows, reasons)
+
+    first_disqualified: Optional[Tuple[Dict[str, Any], int]] = None
+    rejected = np.flatnonzero(disqualified)
+    if len(rejected):
+        row = int(rows[rejected[0]])
+        _, details = _score_features(candidate_matrix.features[row], product_features)
+        first_disqualified = (details, row)
+
+    scored: List[Tuple[int, Dict[str, Any], int]] = []
+    for row in rows[~disqualified].tolist():
+        score, details = _score_features(candidate_matrix.features[row], product_features)
+        if score > 0:
+            scored.append((score, details, row))
+    return scored, first_disqualified
+
+
+def ean_products_by_row(
+    matrix: CandidateMatrix,
+    label_eans: Dict[Tuple[int, str], set],
+    ean_to_product_ids: Dict[str, set],
+) -> Dict[int, frozenset]:
+    """Map each candidate row to the product ids sharing one of its EANs."""
+    out: Dict[int, frozenset] = {}
+    for row, entry in enumerate(matrix.entries):
+        product_ids: set = set()
+        for ean in label_eans.get((entry.supplier_id, entry.normalized_label), ()):
+            product_ids |= ean_to_product_ids.get(ean, set())
+        if product_ids:
+            out[row] = frozenset(product_ids)
+    return out
+
+
+def score_product_v1(
+    product_features: ProductFeatures,
+    brand: str,
+    candidate_matrix: CandidateMatrix,
+    brand_to_rows: Dict[str, List[int]],
+    ean_products: Dict[int, frozenset],
+    label_runs: Optional[np.ndarray] = None,
+    since: int = -1,
+    stored: Sequence[Tuple[int, Optional[Dict[str, Any]], int]] = (),
+    ean_rows: Sequence[int] = (),
+    keep_pairs: int = 0,
+) -> Tuple[
+    Optional[Tuple[int, Dict[str, Any], int]],
+    Optional[Tuple[Dict[str, Any], int]],
+    List[Tuple[int, int]],
+    Dict[str, int],
+]:
+    """Phase 2 V1 scoring of one product: brand-filtered scan + EAN bonus.
+
+    Only reads its arguments, so it runs unchanged in a scoring worker.
+
+    Incremental mode (see utils/scoring_ledger.py): with ``label_runs`` and
+    ``since`` >= 0, only the rows whose label changed after run ``since``
+    and the product's ``ean_rows`` (which may earn the EAN bonus) are
+    scored; ``stored`` holds the ledger's raw (score, details, row) of the
+    best other rows (score 0 = their disqualified pair, details None when
+    not kept).
+
+    Returns (top, first_disqualified, ranked, reasons): top is (score,
+    details, row) of the best candidate (the first one in row order on equal
+    scores) or None, first_disqualified is (details, row) or None, ranked
+    lists the (raw score, row) of the ``keep_pairs`` best candidates, for the
+    ledger, and reasons counts the rows scored here per disqualifier.
+    """
+    if brand:
+        rows = np.array(
+            brand_to_rows.get(brand, []) + brand_to_rows.get("", []), dtype=np.int64
+        )
+    else:
+        rows = np.arange(len(candidate_matrix))
+    if not len(rows):
+        return None, None, [], {}
+
+    incremental = label_runs is not None and since >= 0
+    if incremental:
+        rescored = label_runs[rows] > since
+        if len(ean_rows):
+            rescored |= np.isin(rows, np.asarray(ean_rows, dtype=np.int64))
+        score_rows = rows[rescored]
+    else:
+        score_rows = rows
+    reasons: Dict[str, int] = {}
+    candidates, first_disqualified = score_matches_batch(
+        product_features, candidate_matrix, score_rows, reasons
+    )
+
+    if incremental and stored:
+        position = {row: i for i, row in enumerate(rows.tolist())}
+        fresh_rows = set(score_rows.tolist())
+        carried = [item for item in stored if item[2] not in fresh_rows]
+        candidates = sorted(
+            candidates + [item for item in carried if item[0] > 0],
+            key=lambda item: position[item[2]],
+        )
+        for score, details, row in carried:
+            if score == 0 and (
+                first_disqualified is None or position[row] < position[first_disqualified[1]]
+            ):
+                first_disqualified = (details, row)
+
+    top: Optional[Tuple[int, Optional[Dict[str, Any]], int]] = None
+    for score, details, row in candidates:
+        if product_features.id in ean_products.get(row, ()):
+            score = min(score + 20, 100)
+        if top is None or score > top[0]:
+            top = (score, details, row)
+    if top is not None:
+        score, details, row = top
+        if details is None:
+            # The ledger keeps no details for this pair: score it again
+            details = _score_features(candidate_matrix.features[row], product_features)[1]
+        if product_features.id in ean_products.get(row, ()):
+            details = {**details, "ean_bonus": 20}
+        top = (score, details, row)
+
+    ranked: List[Tuple[int, int]] = []
+    if keep_pairs > 0:
+        # Stable: equal scores stay in row order, as for ``top``
+        ranked = [
+            (score, row)
+            for score, _, row in heapq.nsmallest(keep_pairs, candidates, key=lambda c: -c[0])
+        ]
+    return top, first_disqualified, ranked, reasons
+
+
+_scoring_worker_state: Optional[tuple] = None
+
+
+def _init_scoring_worker(
+    candidate_matrix: CandidateMatrix,
+    brand_to_rows: Dict[str, List[int]],
+    ean_products: Dict[int, frozenset],
+    label_runs: Optional[np.ndarray] = None,
+    keep_pairs: int = 0,
+) -> None:
+    global _scoring_worker_state
+    _scoring_worker_state = (
+        candidate_matrix, brand_to_rows, ean_products, label_runs, keep_pairs
+    )
+
+
+def _score_in_worker(item: tuple):
+    product_features, brand, since, stored, ean_rows = item
+    candidate_matrix, brand_to_rows, ean_products, label_runs, keep_pairs = (
+        _scoring_worker_state
+    )
+    return score_product_v1(
+        product_features, brand, candidate_matrix, brand_to_rows, ean_products,
+        label_runs, since, stored, ean_rows, keep_pairs,
+    )
+
+
+def score_products_parallel(
+    items: List[tuple],
+    candidate_matrix: CandidateMatrix,
+    brand_to_rows: Dict[str, List[int]],
+    ean_products: Dict[int, frozenset],
+    workers: int,
+    label_runs: Optional[np.ndarray] = None,
+    keep_pairs: int = 0,
+) -> Iterator[tuple]:
+    """score_product_v1 of every item on ``workers`` processes.
+
+    Items are (features, brand, since, stored, ean_rows). The candidate
+    matrix and lookups are sent once per worker (pool initializer); each
+    item ships only its ProductFeatures (and ledger scores) and each result
+    only the winning rows, their details, the ``keep_pairs`` best
+    (score, row) and the disqualifier counts. Results are yielded in
+    ``items`` order as they arrive; the pool starts on the first ``next()``.
+    """
+    # spawn, not fork: the matching job runs next to other threads
+    # (Flask, scheduler) whose locks a forked child would inherit.
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_scoring_worker,
+        initargs=(candidate_matrix, brand_to_rows, ean_products, label_runs, keep_pairs),
+    )
+    try:
+        chunksize = max(1, len(items) // (workers * 8))
+        yield from pool.map(_score_in_worker, items, chunksize=chunksize)
+    finally:
+        # Consumer stopped early (error): drop the chunks not started yet
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
 # ---------------------------------------------------------------------------
 # Function 5: find_best_matches
 # ---------------------------------------------------------------------------
 
 def _build_mappings() -> Dict[str, Any]:
     """Build lookup mappings for scoring."""
-    translations = ColorTranslation.query.all()
-    color_map = {t.color_source.lower(): t.color_target for t in translations}
+    refs = reference_data.get_snapshot()
+    color_map = {t.source.lower(): t.target for t in refs.color_translations}
     # Build a set of all known color words for stripping from product model names.
     # Includes: color table names, translation sources, and translation targets.
     color_words: set[str] = set()
-    for c in Color.query.all():
-        color_words.add(c.color.lower())
-    for t in translations:
-        color_words.add(t.color_source.lower())
-        color_words.add(t.color_target.lower())
+    for c in refs.colors:
+        color_words.add(c.value.lower())
+    for t in refs.color_translations:
+        color_words.add(t.source.lower())
+        color_words.add(t.target.lower())
     return {"color_translations": color_map, "color_words": color_words}
 
 
@@ -843,9 +1733,10 @@ def find_best_matches(
     else:
         candidates = products
 
+    label_features = build_label_features(extracted, mappings)
     scored: List[Tuple[int, Dict[str, Any], Product]] = []
     for product in candidates:
-        match_score, details = score_match(extracted, product, mappings)
+        match_score, details = score_match(label_features, product, mappings)
         if match_score > 0:
             scored.append((match_score, details, product))
 
@@ -987,11 +1878,12 @@ def run_matching_job(
     threshold_auto = _get_env_int("MATCH_THRESHOLD_AUTO", 90)
     threshold_review = _get_env_int("MATCH_THRESHOLD_REVIEW", 50)
     batch_size = _get_env_int("LLM_BATCH_SIZE", 25)
+    profiler = RunProfiler(db.engine)
 
     try:
         return _run_matching_job_inner(
             run_id, matching_run, supplier_id, limit, skip_already_matched,
-            start_time, threshold_auto, threshold_review, batch_size,
+            start_time, threshold_auto, threshold_review, batch_size, profiler,
         )
     except Exception as exc:
         # Ensure MatchingRun is marked failed on any unhandled exception
@@ -1002,10 +1894,13 @@ def run_matching_job(
                 mr.status = "failed"
                 mr.error_message = str(exc)[:500]
                 mr.duration_seconds = round(time.time() - start_time, 2)
+                mr.profile = profiler.to_dict()
                 db.session.commit()
         except Exception:
             current_app.logger.exception("Failed to mark MatchingRun #%d as failed", run_id)
         raise
+    finally:
+        profiler.close()
 
 
 def _run_matching_job_inner(
@@ -1018,8 +1913,13 @@ def _run_matching_job_inner(
     threshold_auto: int,
     threshold_review: int,
     batch_size: int,
+    profiler: RunProfiler,
 ) -> Dict[str, Any]:
-    """Core matching logic, wrapped by run_matching_job for error safety."""
+    """Core matching logic, wrapped by run_matching_job for error safety.
+
+    Each step runs in a ``profiler`` phase; the profile is stored on the
+    MatchingRun (see utils/run_profiler.py).
+    """
     from_cache = 0
     llm_calls = 0
     errors = 0
@@ -1030,9 +1930,12 @@ def _run_matching_job_inner(
     not_found = 0
     total_input_tokens = 0
     total_output_tokens = 0
+    total_cache_read_tokens = 0
+    total_cache_write_tokens = 0
     cross_supplier_hits = 0
     fuzzy_hits = 0
     attr_share_hits = 0
+    extraction_store_hits = 0
     brands_with_new_labels: set[str] = set()
     products_to_process: list = []
     remaining = 0
@@ -1042,321 +1945,482 @@ def _run_matching_job_inner(
     # -----------------------------------------------------------------------
     # Phase 1: Extract unextracted SupplierCatalog labels → LabelCache
     # -----------------------------------------------------------------------
-    catalog_query = SupplierCatalog.query
-    if supplier_id:
-        catalog_query = catalog_query.filter_by(supplier_id=supplier_id)
-    all_catalogs = catalog_query.all()
-
-    # Build (supplier_id, normalized_label) → [SupplierCatalog entries]
-    label_to_catalogs: Dict[Tuple[int, str], List[SupplierCatalog]] = {}
-    for ti in all_catalogs:
-        label = ti.description or ti.model or ""
-        normalized = normalize_label(label)
-        if normalized and ti.supplier_id:
-            key = (ti.supplier_id, normalized)
-            label_to_catalogs.setdefault(key, []).append(ti)
-
-    # Preload all LabelCache entries that have extracted_attributes, for:
-    # 1. Cross-supplier sharing: reuse same normalized_label from another supplier
-    # 2. Fuzzy fallback: reuse a similar label from the same supplier (ratio > 0.92)
-    all_extracted_entries = LabelCache.query.filter(
-        LabelCache.extracted_attributes.isnot(None)
-    ).all()
-
-    # First valid entry (with extracted_attributes) for each normalized_label (any supplier)
-    cross_supplier_map: Dict[str, LabelCache] = {}
-    for entry in all_extracted_entries:
-        if entry.normalized_label not in cross_supplier_map:
-            cross_supplier_map[entry.normalized_label] = entry
-
-    # Per-supplier list of entries for fuzzy matching
-    supplier_fuzzy_map: Dict[int, List[LabelCache]] = {}
-    for entry in all_extracted_entries:
-        supplier_fuzzy_map.setdefault(entry.supplier_id, []).append(entry)
-
-    # Determine which labels need LLM extraction.
-    # Also re-extract entries where product_id=None AND extracted_attributes=None:
-    # these were created by an older code path that didn't save LLM output, leaving
-    # Phase 2 with no attributes to score against (score=0 → all products not_found).
-    labels_to_extract: List[Tuple[int, str, str]] = []  # (supplier_id, normalized, original)
-    cross_supplier_hits = 0
-    fuzzy_hits = 0
-
-    for (sid, normalized), catalogs in label_to_catalogs.items():
-        original_label = catalogs[0].description or catalogs[0].model or ""
-
-        # Step 1: Exact cache match for this supplier
-        cached = LabelCache.query.filter_by(
-            supplier_id=sid, normalized_label=normalized
-        ).first()
-        needs_extraction = (
-            not cached
-            or (cached.product_id is None and not cached.extracted_attributes)
-        )
-        if not needs_extraction:
-            cached.last_seen_run_id = run_id
-            continue
+    # Build (supplier_id, normalized_label) → [CatalogLine], streamed as
+    # narrow tuples (no SupplierCatalog instance held by the session)
+    with profiler.phase("catalog_load"):
+        label_to_catalogs = group_catalog_lines(iter_catalog_lines(supplier_id))
+    profiler.count("catalog_labels", len(label_to_catalogs))
+    profiler.count("catalog_lines", sum(len(lines) for lines in label_to_catalogs.values()))
+
+    with profiler.phase("cache_lookup"):
+        # Preload LabelCache in one query: every entry of the suppliers in scope
+        # (exact lookups below) plus all entries with extracted_attributes for:
+        # 1. Cross-supplier sharing: reuse same normalized_label from another supplier
+        # 2. Fuzzy fallback: reuse a similar label from the same supplier (ratio > 0.92)
+        has_attributes = LabelCache.extracted_attributes.isnot(None)
+        preload_query = db.session.query(LabelCache, has_attributes)
+        if supplier_id:
+            preload_query = preload_query.filter(
+                db.or_(has_attributes, LabelCache.supplier_id == supplier_id)
+            )
+        preloaded = preload_query.all()
+        cache_by_key: Dict[Tuple[int, str], LabelCache] = {
+            (entry.supplier_id, entry.normalized_label): entry for entry, _ in preloaded
+        }
+        all_extracted_entries = [entry for entry, extracted in preloaded if extracted]
+        # Phase 1 cache writes are collected and flushed as bulk upserts
+        writer = LabelCacheWriter(run_id)
+
+        # First valid entry (with extracted_attributes) for each normalized_label (any supplier)
+        cross_supplier_map: Dict[str, LabelCache] = {}
+        for entry in all_extracted_entries:
+            if entry.normalized_label not in cross_supplier_map:
+                cross_supplier_map[entry.normalized_label] = entry
+
+        # Per-supplier list of entries for fuzzy matching
+        supplier_fuzzy_map: Dict[int, List[LabelCache]] = {}
+        for entry in all_extracted_entries:
+            supplier_fuzzy_map.setdefault(entry.supplier_id, []).append(entry)
+        # Per-supplier trigram indexes, built on first use and reused for every new
+        # label: only labels sharing enough trigrams get an exact ratio computed
+        supplier_fuzzy_matchers: Dict[int, similarity.QGramIndex] = {}
+
+        # Determine which labels need LLM extraction.
+        # Also re-extract entries where product_id=None AND extracted_attributes=None:
+        # these were created by an older code path that didn't save LLM output, leaving
+        # Phase 2 with no attributes to score against (score=0 → all products not_found).
+        labels_to_extract: List[Tuple[int, str, str]] = []  # (supplier_id, normalized, original)
+        cross_supplier_hits = 0
+        fuzzy_hits = 0
+
+        for (sid, normalized), catalogs in label_to_catalogs.items():
+            original_label = catalogs[0].description or catalogs[0].model or ""
+
+            # Step 1: Exact cache match for this supplier
+            cached = cache_by_key.get((sid, normalized))
+            needs_extraction = (
+                not cached
+                or (cached.product_id is None and not cached.extracted_attributes)
+            )
+            if not needs_extraction:
+                writer.touch(cached)
+                continue
 
-        # Step 2: Cross-supplier sharing — same normalized_label, different supplier
-        cross_entry = cross_supplier_map.get(normalized)
-        if cross_entry and cross_entry.supplier_id != sid:
-            attrs = dict(cross_entry.extracted_attributes)
-            attrs["raw_label"] = original_label
-            _save_extraction_cache(sid, normalized, attrs, run_id=run_id)
-            _brand = (attrs.get("brand") or "").strip().lower()
-            if _brand:
-                brands_with_new_labels.add(_brand)
-            cross_supplier_hits += 1
-            continue
+            # Step 2: Cross-supplier sharing — same normalized_label, different supplier
+            cross_entry = cross_supplier_map.get(normalized)
+            if cross_entry and cross_entry.supplier_id != sid:
+                attrs = dict(cross_entry.extracted_attributes)
+                attrs["raw_label"] = original_label
+                writer.save_extraction(sid, normalized, attrs)
+                _brand = (attrs.get("brand") or "").strip().lower()
+                if _brand:
+                    brands_with_new_labels.add(_brand)
+                cross_supplier_hits += 1
+                continue
 
-        # Step 3: Fuzzy fallback — similar label from same supplier (ratio > 0.92)
-        fuzzy_entry = _find_fuzzy_cache_entry(
-            normalized, supplier_fuzzy_map.get(sid, [])
-        )
-        if fuzzy_entry:
-            attrs = dict(fuzzy_entry.extracted_attributes)
-            attrs["raw_label"] = original_label
-            _save_extraction_cache(sid, normalized, attrs, run_id=run_id)
-            _brand = (attrs.get("brand") or "").strip().lower()
-            if _brand:
-                brands_with_new_labels.add(_brand)
-            fuzzy_hits += 1
-            continue
+            # Step 3: Fuzzy fallback — similar label from same supplier (ratio > 0.92)
+            with profiler.phase("fuzzy_fallback"):
+                supplier_entries = supplier_fuzzy_map.get(sid, [])
+                if sid not in supplier_fuzzy_matchers:
+                    supplier_fuzzy_matchers[sid] = similarity.QGramIndex(
+                        e.normalized_label for e in supplier_entries
+                    )
+                fuzzy_entry = _find_fuzzy_cache_entry(
+                    normalized, supplier_entries, matcher=supplier_fuzzy_matchers[sid]
+                )
+                if fuzzy_entry:
+                    attrs = dict(fuzzy_entry.extracted_attributes)
+                    attrs["raw_label"] = original_label
+                    writer.save_extraction(sid, normalized, attrs)
+                    _brand = (attrs.get("brand") or "").strip().lower()
+                    if _brand:
+                        brands_with_new_labels.add(_brand)
+                    fuzzy_hits += 1
+                    continue
 
-        # Step 4: Needs LLM extraction
-        labels_to_extract.append((sid, normalized, original_label))
+            # Step 4: Needs LLM extraction
+            labels_to_extract.append((sid, normalized, original_label))
 
     from_cache = len(label_to_catalogs) - len(labels_to_extract)
+    profiler.count("labels_to_extract", len(labels_to_extract))
 
-    context = build_context()
+    with profiler.phase("llm_batches"):
+        context = build_context()
 
     # Build attr → product_id index from already-matched LabelCache entries.
     # After LLM extraction, if the new label's attributes match an existing validated
     # entry (any supplier), we assign product_id directly and skip Phase 2 scoring.
     # Color translations normalize colors so "black"/"noir" produce the same key.
-    _color_trans = {
-        t.color_source.lower(): t.color_target
-        for t in ColorTranslation.query.all()
-        if t.color_source
-    }
-    attr_product_index: Dict[str, int] = {}
-    for entry in LabelCache.query.filter(
-        LabelCache.product_id.isnot(None),
-        LabelCache.extracted_attributes.isnot(None),
-    ).all():
-        key = _make_attr_key(entry.extracted_attributes, _color_trans)
-        if key:
-            attr_product_index[key] = entry.product_id
-
-    # Batch LLM extraction for Phase 1
-    for batch_start in range(0, len(labels_to_extract), batch_size):
-        batch_items = labels_to_extract[batch_start:batch_start + batch_size]
-        batch_labels = [item[2] for item in batch_items]
-
-        try:
-            extractions = call_llm_extraction(batch_labels, context)
-            llm_calls += 1
-        except Exception as exc:
-            current_app.logger.error("LLM extraction Phase 1 failed: %s", exc)
-            errors += len(batch_labels)
-            if error_message is None:
-                error_message = str(exc)
-            continue
-
-        for idx, extraction in enumerate(extractions):
-            if idx >= len(batch_items):
-                break
-            sid, normalized, original_label = batch_items[idx]
-            token_info = extraction.pop("_token_info", {})
-            total_input_tokens += token_info.get("input_tokens", 0) // max(len(batch_labels), 1)
-            total_output_tokens += token_info.get("output_tokens", 0) // max(len(batch_labels), 1)
-            extraction["raw_label"] = original_label
-            extraction["region"] = (extraction.get("region") or "EU").strip().upper()
-            extraction = _apply_post_processing(extraction, original_label)
-
-            # Track brand for Option A re-evaluation
-            _brand = (extraction.get("brand") or "").strip().lower()
-            if _brand:
-                brands_with_new_labels.add(_brand)
-
-            # Attribute-based cross-supplier sharing: if the same (brand, model, storage,
-            # color, region) tuple is already matched in another supplier's cache, assign
-            # product_id directly without going through Phase 2 scoring.
-            attr_key = _make_attr_key(extraction, _color_trans)
-            if attr_key and attr_key in attr_product_index:
+    with profiler.phase("attr_share"):
+        _color_trans = {
+            t.source.lower(): t.target
+            for t in reference_data.get_snapshot().color_translations
+            if t.source
+        }
+        attr_product_index: Dict[str, int] = {}
+        for entry in LabelCache.query.filter(
+            LabelCache.product_id.isnot(None),
+            LabelCache.extracted_attributes.isnot(None),
+        ).all():
+            key = _make_attr_key(entry.extracted_attributes, _color_trans)
+            if key:
+                attr_product_index[key] = entry.product_id
+
+    def _apply_extraction(
+        sid: int, normalized: str, original_label: str, extraction: Dict[str, Any]
+    ) -> None:
+        nonlocal attr_share_hits
+        extraction["raw_label"] = original_label
+        extraction["region"] = (extraction.get("region") or "EU").strip().upper()
+        extraction = _apply_post_processing(extraction, original_label)
+
+        # Track brand for Option A re-evaluation
+        _brand = (extraction.get("brand") or "").strip().lower()
+        if _brand:
+            brands_with_new_labels.add(_brand)
+
+        # Attribute-based cross-supplier sharing: if the same (brand, model, storage,
+        # color, region) tuple is already matched in another supplier's cache, assign
+        # product_id directly without going through Phase 2 scoring.
+        attr_key = _make_attr_key(extraction, _color_trans)
+        if attr_key and attr_key in attr_product_index:
+            with profiler.phase("attr_share"):
                 matched_product_id = attr_product_index[attr_key]
-                _save_attr_share_cache(sid, normalized, matched_product_id, extraction, run_id=run_id)
+                writer.save_attr_share(sid, normalized, matched_product_id, extraction)
                 catalog_entries = label_to_catalogs.get((sid, normalized), [])
                 for ti in catalog_entries:
-                    _create_supplier_ref(ti.supplier_id, ti, matched_product_id)
-                attr_share_hits += 1
+                    writer.save_supplier_ref(ti, matched_product_id)
+            attr_share_hits += 1
+        else:
+            writer.save_extraction(sid, normalized, extraction)
+
+    # Extraction store: raw label strings already extracted with the same
+    # prompt/references (any supplier) are reused instead of re-sent to the LLM.
+    with profiler.phase("extraction_store"):
+        fingerprint = extraction_context_fingerprint(context)
+        stored = extraction_store.lookup(
+            (item[2] for item in labels_to_extract),
+            fingerprint,
+            ttl_days=_get_env_int("EXTRACTION_STORE_TTL_DAYS", 90),
+        )
+        if stored:
+            remaining_labels = []
+            for sid, normalized, original_label in labels_to_extract:
+                if original_label in stored:
+                    _apply_extraction(sid, normalized, original_label, dict(stored[original_label]))
+                    extraction_store_hits += 1
+                else:
+                    remaining_labels.append((sid, normalized, original_label))
+            labels_to_extract = remaining_labels
+    new_extractions: Dict[str, Dict[str, Any]] = {}
+
+    # Batch LLM extraction for Phase 1. Batches run concurrently (network-bound)
+    # but results are consumed in batch order, so DB writes stay sequential on
+    # this session and the outcome does not depend on API response order.
+    # Each batch is sized when it is submitted, from the token usage so far.
+    sizer = LlmBatchSizer(
+        batch_size, max_size=max(_get_env_int("LLM_BATCH_SIZE_MAX", 50), batch_size)
+    )
+    batches: List[List[Tuple[int, str, str]]] = []
+
+    def _label_batches() -> Iterator[List[str]]:
+        for batch in sizer.batches(labels_to_extract, label=lambda item: item[2]):
+            batches.append(batch)
+            yield [item[2] for item in batch]
+
+    llm_concurrency = max(_get_env_int("LLM_CONCURRENCY", 4), 1)
+    limiter = TokenBucket(
+        _get_env_int("LLM_REQUESTS_PER_MIN", 50), capacity=llm_concurrency
+    )
+    with profiler.phase("llm_batches"):
+        for batch_index, extractions, exc in iter_llm_extractions(
+            _label_batches(),
+            context,
+            concurrency=llm_concurrency,
+            limiter=limiter,
+        ):
+            batch_items = batches[batch_index]
+            batch_labels = [item[2] for item in batch_items]
+
+            if exc is None:
+                llm_calls += 1
+                sizer.record(extractions)
             else:
-                _save_extraction_cache(sid, normalized, extraction, run_id=run_id)
+                current_app.logger.error("LLM extraction Phase 1 failed: %s", exc)
+                errors += len(batch_labels)
+                if error_message is None:
+                    error_message = str(exc)
+                continue
 
-    db.session.flush()
+            for idx, extraction in enumerate(extractions):
+                if idx >= len(batch_items):
+                    break
+                sid, normalized, original_label = batch_items[idx]
+                token_info = extraction.pop("_token_info", {})
+                # Usage is per API response; split batches have several responses
+                share = max(token_info.get("labels", len(batch_labels)), 1)
+                total_input_tokens += token_info.get("input_tokens", 0) // share
+                total_output_tokens += token_info.get("output_tokens", 0) // share
+                total_cache_read_tokens += token_info.get("cache_read_input_tokens", 0) // share
+                total_cache_write_tokens += token_info.get("cache_creation_input_tokens", 0) // share
+                new_extractions[original_label] = dict(extraction)
+                _apply_extraction(sid, normalized, original_label, extraction)
+
+    with profiler.phase("phase1_writes"):
+        writer.flush()
+        # The upserts bypassed the ORM: preloaded entries must be reloaded if used
+        for entry, _ in preloaded:
+            db.session.expire(entry)
+        # Phase 2 reads its own candidate store: release the Phase 1 instances
+        preloaded.clear()
+        cache_by_key.clear()
+        all_extracted_entries.clear()
+        cross_supplier_map.clear()
+        supplier_fuzzy_map.clear()
+        supplier_fuzzy_matchers.clear()
+
+        if new_extractions:
+            extraction_store.save(new_extractions, fingerprint)
+        extraction_store.prune(
+            fingerprint,
+            ttl_days=_get_env_int("EXTRACTION_STORE_TTL_DAYS", 90),
+            max_entries=_get_env_int("EXTRACTION_STORE_MAX_ENTRIES", 200_000),
+        )
+
+        db.session.flush()
 
     # -----------------------------------------------------------------------
     # Selective cleanup: reset matches for labels no longer in supplier catalog
     # -----------------------------------------------------------------------
-    _cleanup_orphaned_labels(run_id, supplier_id)
-    db.session.flush()
+    with profiler.phase("cleanup"):
+        _cleanup_orphaned_labels(run_id, supplier_id)
+        db.session.flush()
 
     # -----------------------------------------------------------------------
     # Phase 2: Match Odoo Products against extracted cache entries
     # -----------------------------------------------------------------------
-    if skip_already_matched:
-        # Nightly mode: re-evaluate every product against tonight's updated catalog.
-        matched_product_ids: set[int] = set()
-        existing_pm_by_product: dict[int, PendingMatch] = {}
-    else:
-        # Normal mode: exclude products already matched — either via ETL
-        # (ProductCalculation exists) or via previous LLM auto-match
-        # (LabelCache has a product_id, ETL not yet re-run).
-        matched_product_ids = {
-            row[0]
-            for row in db.session.query(ProductCalculation.product_id)
-            .filter(ProductCalculation.product_id.isnot(None))
-            .distinct()
-            .all()
-        } | {
-            row[0]
-            for row in db.session.query(LabelCache.product_id)
-            .filter(LabelCache.product_id.isnot(None))
-            .distinct()
-            .all()
-        }
-
-        # Build a map of existing PendingMatches by product_id so we can
-        # re-evaluate them and update if a better score is found.
-        existing_pm_by_product: dict[int, PendingMatch] = {}
-        for pm in PendingMatch.query.filter(
-            PendingMatch.status.in_(["pending", "rejected"])
-        ).all():
-            for c in pm.candidates or []:
-                pid = c.get("product_id")
-                if pid:
-                    existing_pm_by_product[pid] = pm
-
-    all_products_list = Product.query.all()
-    products_to_process = [
-        p for p in all_products_list
-        if p.id not in matched_product_ids
-    ]
-
-    total_unmatched = len(products_to_process)
-    if limit is not None and limit > 0:
-        products_to_process = products_to_process[:limit]
-    remaining = total_unmatched - len(products_to_process)
-
-    # Load extracted cache entries awaiting matching (product_id=None)
-    cache_filter_args = [
-        LabelCache.match_source == "extracted",
-        LabelCache.product_id.is_(None),
-    ]
-    if supplier_id:
-        cache_filter_args.append(LabelCache.supplier_id == supplier_id)
-    all_cache_entries = LabelCache.query.filter(*cache_filter_args).all()
-
-    # Pre-build brand → cache entries index for fast filtering
-    brand_to_entries: Dict[str, List[LabelCache]] = {}
-    for entry in all_cache_entries:
-        attrs = entry.extracted_attributes or {}
-        brand = (attrs.get("brand") or "").strip().lower()
-        brand_to_entries.setdefault(brand, []).append(entry)
-
-    # Build EAN → set of product IDs from both Product.ean and ProductEanHistory.
-    # Used as a scoring bonus: if a supplier catalog EAN matches a known product EAN,
-    # the score gets a +20 boost (but not an auto-match — name verification still needed).
-    ean_to_product_ids: Dict[str, set] = {}
-    for p in all_products_list:
-        if p.ean:
-            ean_to_product_ids.setdefault(p.ean.strip(), set()).add(p.id)
-    for hist in ProductEanHistory.query.all():
-        if hist.ean:
-            ean_to_product_ids.setdefault(hist.ean.strip(), set()).add(hist.product_id)
-
-    # Build (supplier_id, normalized_label) → set of EANs from SupplierCatalog
-    label_eans: Dict[Tuple[int, str], set] = {}
-    for key, catalogs in label_to_catalogs.items():
-        eans = {c.ean.strip() for c in catalogs if c.ean}
-        if eans:
-            label_eans[key] = eans
-
-    mappings = _build_mappings()
-
-    # --- V2 retrieval pipeline (BM25 + optional FAISS + cross-encoder) ---
-    retrieval = None
-    try:
-        from utils.matching.retrieval_pipeline import RetrievalPipeline, is_v2_enabled
-
-        if is_v2_enabled():
-            retrieval = RetrievalPipeline(
-                cache_entries=all_cache_entries,
-                score_match_fn=score_match,
-                mappings=mappings,
-                label_to_catalogs=label_to_catalogs,
-                label_eans=label_eans,
-                ean_to_product_ids=ean_to_product_ids,
-                threshold_auto=threshold_auto,
-                threshold_review=threshold_review,
-            )
-            retrieval.compute_product_embeddings(products_to_process)
-            current_app.logger.info("Matching V2 pipeline active")
-    except ImportError:
-        pass
-
-    batch_counter = 0
-    BATCH_SIZE = 50
-
-    for product in products_to_process:
+    with profiler.phase("phase2_setup"):
+        if skip_already_matched:
+            # Nightly mode: re-evaluate every product against tonight's updated catalog.
+            matched_product_ids: set[int] = set()
+            existing_pm_by_product: dict[int, PendingMatch] = {}
+        else:
+            # Normal mode: exclude products already matched — either via ETL
+            # (ProductCalculation exists) or via previous LLM auto-match
+            # (LabelCache has a product_id, ETL not yet re-run).
+            matched_product_ids = {
+                row[0]
+                for row in db.session.query(ProductCalculation.product_id)
+                .filter(ProductCalculation.product_id.isnot(None))
+                .distinct()
+                .all()
+            } | {
+                row[0]
+                for row in db.session.query(LabelCache.product_id)
+                .filter(LabelCache.product_id.isnot(None))
+                .distinct()
+                .all()
+            }
+
+            # Build a map of existing PendingMatches by product_id so we can
+            # re-evaluate them and update if a better score is found.
+            existing_pm_by_product: dict[int, PendingMatch] = {}
+            for pm in PendingMatch.query.filter(
+                PendingMatch.status.in_(["pending", "rejected"])
+            ).all():
+                for c in pm.candidates or []:
+                    pid = c.get("product_id")
+                    if pid:
+                        existing_pm_by_product[pid] = pm
+
+        all_products_list = Product.query.all()
+        products_to_process = [
+            p for p in all_products_list
+            if p.id not in matched_product_ids
+        ]
 
-        # --- V2 path: multi-stage retrieval ---
+        total_unmatched = len(products_to_process)
+        if limit is not None and limit > 0:
+            products_to_process = products_to_process[:limit]
+        remaining = total_unmatched - len(products_to_process)
+
+        # Load extracted cache entries awaiting matching (product_id=None) as a
+        # compact column store: no LabelCache instance is kept for the run
+        candidate_store = CandidateStore.load(supplier_id)
+        all_cache_entries = candidate_store.entries
+
+        # Pre-build brand → candidate rows index for fast filtering
+        brand_to_rows = candidate_store.brand_rows()
+
+        # Build EAN → set of product IDs from both Product.ean and ProductEanHistory.
+        # Used as a scoring bonus: if a supplier catalog EAN matches a known product EAN,
+        # the score gets a +20 boost (but not an auto-match — name verification still needed).
+        ean_to_product_ids: Dict[str, set] = {}
+        for p in all_products_list:
+            if p.ean:
+                ean_to_product_ids.setdefault(p.ean.strip(), set()).add(p.id)
+        for hist in ProductEanHistory.query.all():
+            if hist.ean:
+                ean_to_product_ids.setdefault(hist.ean.strip(), set()).add(hist.product_id)
+
+        # Build (supplier_id, normalized_label) → set of EANs from SupplierCatalog
+        label_eans: Dict[Tuple[int, str], set] = {}
+        for key, catalogs in label_to_catalogs.items():
+            eans = {c.ean.strip() for c in catalogs if c.ean}
+            if eans:
+                label_eans[key] = eans
+
+        mappings = _build_mappings()
+        # Product and label features are derived once per run, not once per pair
+        features = FeatureCache(mappings)
+        candidate_matrix = CandidateMatrix.from_entries(all_cache_entries, features)
+
+        # --- V2 retrieval pipeline (BM25 + optional FAISS + cross-encoder) ---
+        retrieval = None
+        try:
+            from utils.matching.retrieval_pipeline import RetrievalPipeline, is_v2_enabled
+
+            if is_v2_enabled():
+                retrieval = RetrievalPipeline(
+                    cache_entries=all_cache_entries,
+                    score_match_fn=score_match,
+                    mappings=mappings,
+                    label_to_catalogs=label_to_catalogs,
+                    label_eans=label_eans,
+                    ean_to_product_ids=ean_to_product_ids,
+                    threshold_auto=threshold_auto,
+                    threshold_review=threshold_review,
+                    feature_cache=features,
+                    candidate_matrix=candidate_matrix,
+                )
+                retrieval.compute_product_embeddings(products_to_process)
+                current_app.logger.info("Matching V2 pipeline active")
+        except ImportError:
+            pass
+
+        # Scoring: one (top, best_disqualified, disqualifier counts) per product,
+        # with cache entries.
+        # V1 can spread products over MATCHING_WORKERS processes; the DB writes
+        # below always happen here.
+        ledger = None
         if retrieval is not None:
-            candidates_list = retrieval.get_candidates(product)
-            if not candidates_list:
-                not_found += 1
-                continue
-            scored, best_disqualified = retrieval.score_product(product, candidates_list)
+            results = (
+                _score_product_v2(retrieval, product, profiler) for product in products_to_process
+            )
         else:
-            # --- V1 path: brand-filtered linear scan ---
-            prod_brand = (product.brand.brand if product.brand else "").strip().lower()
+            ean_products = ean_products_by_row(candidate_matrix, label_eans, ean_to_product_ids)
+            product_features = [features.product(product) for product in products_to_process]
+            brands = [
+                (product.brand.brand if product.brand else "").strip().lower()
+                for product in products_to_process
+            ]
+
+            # Unscoped runs keep the scoring ledger: only pairs whose product or
+            # label features changed since the product was last scored are scored.
+            label_runs = None
+            plans: List[Tuple[int, list]] = [(-1, [])] * len(products_to_process)
+            product_hashes: List[str] = []
+            if supplier_id is None:
+                ledger = scoring_ledger.ScoringLedger(
+                    run_id,
+                    [entry.id for entry in all_cache_entries],
+                    [scoring_ledger.features_hash(f) for f in candidate_matrix.features],
+                )
+                label_runs = ledger.label_runs
+                product_hashes = [scoring_ledger.features_hash(f) for f in product_features]
+                ledger.load_products(f.id for f in product_features)
+                plans = [
+                    ledger.plan(f.id, digest) for f, digest in zip(product_features, product_hashes)
+                ]
+                current_app.logger.info(
+                    "Scoring ledger: %d/%d labels changed, %d/%d products scored in full",
+                    ledger.changed_labels, len(all_cache_entries),
+                    sum(1 for since, _ in plans if since < 0), len(plans),
+                )
 
-            if prod_brand:
-                candidates_list = (
-                    brand_to_entries.get(prod_brand, [])
-                    + brand_to_entries.get("", [])
+            # Pair counts for the profile: brand-filtered candidates, and the
+            # ones actually scored (the ledger covers the others)
+            brand_rows_cache: Dict[str, np.ndarray] = {}
+            for brand, (since, _) in zip(brands, plans):
+                if brand not in brand_rows_cache:
+                    brand_rows_cache[brand] = (
+                        np.array(
+                            brand_to_rows.get(brand, []) + brand_to_rows.get("", []),
+                            dtype=np.int64,
+                        )
+                        if brand else np.arange(len(candidate_matrix))
+                    )
+                rows = brand_rows_cache[brand]
+                profiler.count("pairs_candidate", len(rows))
+                if label_runs is not None and since >= 0:
+                    profiler.count("pairs_scored", np.count_nonzero(label_runs[rows] > since))
+                else:
+                    profiler.count("pairs_scored", len(rows))
+            brand_rows_cache.clear()
+
+            # Incremental products rescore the rows that may earn them the EAN bonus
+            ean_rows_by_product: Dict[int, List[int]] = {}
+            if ledger is not None:
+                for row, ean_product_ids in ean_products.items():
+                    for product_id in ean_product_ids:
+                        ean_rows_by_product.setdefault(product_id, []).append(row)
+            items = [
+                (prod_features, brand, since, stored, ean_rows_by_product.get(prod_features.id, ()))
+                for prod_features, brand, (since, stored) in zip(product_features, brands, plans)
+            ]
+            keep_pairs = ledger.top_pairs if ledger is not None else 0
+            workers = _get_env_int("MATCHING_WORKERS", 1)
+            if workers > 1 and len(items) > 1:
+                current_app.logger.info("Phase 2 scoring on %d worker processes", workers)
+                # Lazy: scoring runs while the results are consumed below
+                raw_results = score_products_parallel(
+                    items, candidate_matrix, brand_to_rows, ean_products, workers,
+                    label_runs, keep_pairs,
                 )
             else:
-                candidates_list = all_cache_entries
-
-            if not candidates_list:
-                not_found += 1
-                continue
+                raw_results = (
+                    score_product_v1(
+                        prod_features, brand, candidate_matrix, brand_to_rows, ean_products,
+                        label_runs, since, stored, ean_rows, keep_pairs,
+                    )
+                    for prod_features, brand, since, stored, ean_rows in items
+                )
 
-            scored: List[Tuple[int, Dict, LabelCache]] = []
-            best_disqualified: Optional[Tuple[Dict, LabelCache]] = None
+            def _v1_results():
+                for index, (top, first_disqualified, ranked, reasons) in enumerate(raw_results):
+                    if ledger is not None:
+                        ledger.record(
+                            product_features[index].id,
+                            product_hashes[index],
+                            ranked,
+                            top,
+                            first_disqualified,
+                        )
+                    yield (*_rows_to_entries(candidate_matrix, top, first_disqualified), reasons)
+
+            results = _v1_results()
+
+    # Outcomes are buffered and written with bulk statements, one
+    # transaction per chunk of products.
+    write_chunk = max(_get_env_int("MATCHING_WRITE_CHUNK", 500), 1)
+    outcomes = MatchOutcomeWriter(run_id, chunk_size=write_chunk)
+    profiler.count("products", len(products_to_process))
+    profiler.count("candidates", len(all_cache_entries))
+
+    for index, (product, (top, best_disqualified, reasons)) in enumerate(
+        zip(products_to_process, profiler.timed("scoring", results))
+    ):
+        if index and index % write_chunk == 0:
+            with profiler.phase("writes"):
+                outcomes.flush()
+                if ledger is not None:
+                    ledger.flush()
+                db.session.commit()
 
-            for cache_entry in candidates_list:
-                attrs = dict(cache_entry.extracted_attributes or {})
-                score, details = score_match(attrs, product, mappings)
+        for reason, reason_count in reasons.items():
+            profiler.observe("disqualifiers", reason, reason_count)
 
-                if score > 0:
-                    entry_eans = label_eans.get(
-                        (cache_entry.supplier_id, cache_entry.normalized_label), set()
-                    )
-                    if entry_eans:
-                        for ean in entry_eans:
-                            if product.id in ean_to_product_ids.get(ean, set()):
-                                details["ean_bonus"] = 20
-                                score = min(score + 20, 100)
-                                break
-
-                if score > 0:
-                    scored.append((score, details, cache_entry))
-                elif best_disqualified is None and details.get("disqualified"):
-                    best_disqualified = (details, cache_entry)
-
-        if not scored:
+        if top is None:
             if best_disqualified is not None:
                 # All candidates triggered a hard disqualifier → auto-reject
                 # But don't overwrite an existing pending match with a real score
@@ -1373,58 +2437,50 @@ def _run_matching_job_inner(
                 )
                 product_name = product.description or product.model or f"Product #{product.id}"
 
-                if old_pm:
-                    # Update existing rejected match
-                    old_pm.supplier_id = disq_entry.supplier_id
-                    old_pm.source_label = original_label
-                    old_pm.extracted_attributes = disq_entry.extracted_attributes or {}
-                    old_pm.candidates = [{
+                rejected_values = dict(
+                    supplier_id=disq_entry.supplier_id,
+                    source_label=original_label,
+                    extracted_attributes=disq_entry.extracted_attributes or {},
+                    candidates=[{
                         "product_id": product.id,
                         "score": 0,
                         "product_name": product_name,
                         "details": disq_details,
-                    }]
-                    old_pm.status = "rejected"
+                    }],
+                    status="rejected",
+                )
+                if old_pm:
+                    # Update existing rejected match
+                    outcomes.update_pending(old_pm, **rejected_values)
                 else:
-                    pm = PendingMatch(
-                        supplier_id=disq_entry.supplier_id,
-                        temporary_import_id=None,
-                        source_label=original_label,
-                        extracted_attributes=disq_entry.extracted_attributes or {},
-                        candidates=[{
-                            "product_id": product.id,
-                            "score": 0,
-                            "product_name": product_name,
-                            "details": disq_details,
-                        }],
-                        status="rejected",
-                    )
-                    db.session.add(pm)
+                    outcomes.add_pending(temporary_import_id=None, **rejected_values)
                 auto_rejected += 1
             else:
                 not_found += 1
             continue
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top_score, top_details, top_cache = scored[0]
+        top_score, top_details, top_cache = top
 
         if top_score >= threshold_auto:
             catalog_entries = label_to_catalogs.get(
                 (top_cache.supplier_id, top_cache.normalized_label), []
             )
             for ti in catalog_entries:
-                _create_supplier_ref(ti.supplier_id, ti, product.id)
-                _log_ean_history(product.id, ti.ean, ti.supplier_id, run_id, "auto_match")
+                outcomes.save_supplier_ref(ti, product.id)
+                outcomes.log_ean(product.id, ti.ean, ti.supplier_id, "auto_match")
             # If product had a pending/rejected match, remove it — now auto-matched
             old_pm = existing_pm_by_product.get(product.id)
             if old_pm:
-                db.session.delete(old_pm)
-
-            top_cache.product_id = product.id
-            top_cache.match_score = top_score
-            top_cache.match_source = "auto"
-            top_cache.match_reasoning = top_details
-            top_cache.last_used_at = datetime.now(timezone.utc)
+                outcomes.delete_pending(old_pm)
+
+            outcomes.match_label(
+                top_cache.id,
+                product_id=product.id,
+                match_score=top_score,
+                match_source="auto",
+                match_reasoning=top_details,
+                last_used_at=datetime.now(timezone.utc),
+            )
             auto_matched += 1
 
         elif top_score >= threshold_review:
@@ -1449,48 +2505,45 @@ def _run_matching_job_inner(
             )
             product_name = product.description or product.model or f"Product #{product.id}"
 
-            if old_pm:
-                # Update existing PendingMatch with better score
-                old_pm.supplier_id = top_cache.supplier_id
-                old_pm.temporary_import_id = first_catalog.id if first_catalog else None
-                old_pm.source_label = original_label
-                old_pm.extracted_attributes = top_cache.extracted_attributes or {}
-                old_pm.candidates = [{
+            pending_values = dict(
+                supplier_id=top_cache.supplier_id,
+                temporary_import_id=first_catalog.id if first_catalog else None,
+                source_label=original_label,
+                extracted_attributes=top_cache.extracted_attributes or {},
+                candidates=[{
                     "product_id": product.id,
                     "score": top_score,
                     "product_name": product_name,
                     "details": top_details,
-                }]
-                old_pm.status = "pending"
+                }],
+                status="pending",
+            )
+            if old_pm:
+                # Update existing PendingMatch with better score
+                outcomes.update_pending(old_pm, **pending_values)
             else:
-                pm = PendingMatch(
-                    supplier_id=top_cache.supplier_id,
-                    temporary_import_id=first_catalog.id if first_catalog else None,
-                    source_label=original_label,
-                    extracted_attributes=top_cache.extracted_attributes or {},
-                    candidates=[{
-                        "product_id": product.id,
-                        "score": top_score,
-                        "product_name": product_name,
-                        "details": top_details,
-                    }],
-                    status="pending",
-                )
-                db.session.add(pm)
+                outcomes.add_pending(**pending_values)
             pending_review += 1
 
         else:
             not_found += 1
 
-        batch_counter += 1
-        if batch_counter % BATCH_SIZE == 0:
-            db.session.commit()
-
-    db.session.commit()
+    with profiler.phase("writes"):
+        outcomes.flush()
+        if ledger is not None:
+            ledger.flush()
+        db.session.commit()
 
-    # Cost estimation (Haiku pricing: ~$0.25/MTok input, ~$1.25/MTok output)
+    # Cost estimation (Haiku pricing: ~$0.25/MTok input, ~$1.25/MTok output;
+    # cached system prompt: reads at 0.1x, writes at 1.25x the input price)
     cost_estimate = round(
-        (total_input_tokens * 0.25 + total_output_tokens * 1.25) / 1_000_000, 4
+        (
+            total_input_tokens * 0.25
+            + total_output_tokens * 1.25
+            + total_cache_read_tokens * 0.025
+            + total_cache_write_tokens * 0.3125
+        ) / 1_000_000,
+        4,
     )
 
     duration = round(time.time() - start_time, 2)
@@ -1514,6 +2567,8 @@ def _run_matching_job_inner(
             mr.cross_supplier_hits = cross_supplier_hits
             mr.fuzzy_hits = fuzzy_hits
             mr.attr_share_hits = attr_share_hits
+            mr.llm_batch_sizes = sizer.sizes or None
+            mr.profile = profiler.to_dict()
             mr.total_odoo_products = Product.query.count()
             mr.matched_products = db.session.query(
                 db.func.count(db.func.distinct(ProductCalculation.product_id))
@@ -1529,7 +2584,9 @@ def _run_matching_job_inner(
         "cross_supplier_hits": cross_supplier_hits,
         "fuzzy_hits": fuzzy_hits,
         "attr_share_hits": attr_share_hits,
+        "extraction_store_hits": extraction_store_hits,
         "llm_calls": llm_calls,
+        "llm_batch_sizes": sizer.sizes,
         "auto_matched": auto_matched,
         "pending_review": pending_review,
         "auto_rejected": auto_rejected,
@@ -1546,6 +2603,31 @@ def _run_matching_job_inner(
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _score_product_v2(retrieval: Any, product: Product, profiler: Optional[RunProfiler] = None):
+    """(top, best_disqualified, reasons) of one product through the V2 retrieval pipeline."""
+    candidates_list = retrieval.get_candidates(product)
+    if profiler is not None:
+        profiler.count("pairs_candidate", len(candidates_list))
+        profiler.count("pairs_scored", len(candidates_list))
+    if not candidates_list:
+        return None, None, {}
+    reasons: Dict[str, int] = {}
+    scored, best_disqualified = retrieval.score_product(product, candidates_list, reasons)
+    return (scored[0] if scored else None), best_disqualified, reasons
+
+
+def _rows_to_entries(candidate_matrix: CandidateMatrix, top, first_disqualified):
+    """Replace the candidate row numbers of score_product_v1 with their LabelCache."""
+    entries = candidate_matrix.entries
+    if top is not None:
+        score, details, row = top
+        top = (score, details, entries[row])
+    if first_disqualified is not None:
+        details, row = first_disqualified
+        first_disqualified = (details, entries[row])
+    return top, first_disqualified
+
+
 def _extract_model_versions(model: str) -> Tuple[str, List[str]]:
     """Split a model name into (text_base, version_numbers).
 
@@ -1601,83 +2683,240 @@ def _find_fuzzy_cache_entry(
     normalized: str,
     candidates: List["LabelCache"],
     threshold: float = 0.92,
+    matcher: Optional[similarity.ChoiceMatcher] = None,
 ) -> Optional["LabelCache"]:
     """Find the most similar LabelCache entry using fuzzy string matching.
 
     Returns the best matching entry if its similarity ratio exceeds the threshold,
     None otherwise. Used as a fallback when exact cache lookup fails.
+
+    ``matcher`` is an optional ChoiceMatcher (typically a QGramIndex) over the
+    candidates' normalized labels (same order), reused across calls to avoid
+    re-indexing them.
     """
-    best_ratio = 0.0
-    best_entry = None
-    for entry in candidates:
-        ratio = SequenceMatcher(None, normalized, entry.normalized_label).ratio()
-        if ratio > best_ratio:
-            best_ratio = ratio
-            best_entry = entry
-    return best_entry if best_ratio >= threshold else None
+    if not candidates:
+        return None
+    if matcher is None:
+        best = similarity.extract_best(
+            normalized, [e.normalized_label for e in candidates], score_cutoff=threshold
+        )
+    else:
+        best = matcher.extract_best(normalized, score_cutoff=threshold)
+    if not best or best[0][1] <= 0.0:
+        return None
+    return candidates[best[0][0]]
 
 
-def _save_attr_share_cache(
-    supplier_id: int,
-    normalized_label: str,
-    product_id: int,
-    extracted: Dict[str, Any],
-    run_id: int | None = None,
-) -> None:
-    """Save a cache entry that was directly matched via attribute-based cross-supplier sharing.
+class LabelCacheWriter:
+    """Phase 1 LabelCache / SupplierProductRef writes, flushed as bulk upserts.
 
-    The extracted attributes matched an already-validated entry from another supplier,
-    so product_id is assigned immediately without Phase 2 scoring.
+    Replaces one SELECT + INSERT/UPDATE per label with a few
+    ``INSERT ... ON CONFLICT`` statements on ``uix_label_cache`` and
+    ``uix_supplier_ref_label``. Rows are keyed like the constraints, so a
+    later write for the same key replaces an earlier one.
     """
-    existing = LabelCache.query.filter_by(
-        supplier_id=supplier_id, normalized_label=normalized_label
-    ).first()
-    now = datetime.now(timezone.utc)
-    if existing:
-        existing.product_id = product_id
-        existing.match_source = "attr_share"
-        existing.extracted_attributes = extracted
-        existing.last_used_at = now
-        existing.last_seen_run_id = run_id
-    else:
-        cache = LabelCache(
-            supplier_id=supplier_id,
-            normalized_label=normalized_label,
-            product_id=product_id,
-            match_score=None,
-            match_source="attr_share",
-            extracted_attributes=extracted,
-            last_used_at=now,
-            last_seen_run_id=run_id,
+
+    def __init__(self, run_id: int | None) -> None:
+        self.run_id = run_id
+        self._seen_ids: set[int] = set()
+        self._extracted: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._attr_share: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._refs: Dict[Tuple[int, str], Dict[str, Any]] = {}
+
+    def touch(self, entry: LabelCache) -> None:
+        """Mark an existing cache entry as seen in this run."""
+        self._seen_ids.add(entry.id)
+
+    def save_extraction(
+        self, supplier_id: int, normalized_label: str, extracted: Dict[str, Any]
+    ) -> None:
+        """Save extracted attributes without product_id (pre-matching phase)."""
+        key = (supplier_id, normalized_label)
+        self._attr_share.pop(key, None)
+        self._extracted[key] = {
+            "supplier_id": supplier_id,
+            "normalized_label": normalized_label,
+            "product_id": None,
+            "match_score": None,
+            "match_source": "extracted",
+            "extracted_attributes": extracted,
+            "last_seen_run_id": self.run_id,
+        }
+
+    def save_attr_share(
+        self,
+        supplier_id: int,
+        normalized_label: str,
+        product_id: int,
+        extracted: Dict[str, Any],
+    ) -> None:
+        """Save an entry directly matched via attribute-based cross-supplier sharing.
+
+        The extracted attributes matched an already-validated entry from another
+        supplier, so product_id is assigned immediately without Phase 2 scoring.
+        """
+        key = (supplier_id, normalized_label)
+        self._extracted.pop(key, None)
+        self._attr_share[key] = {
+            "supplier_id": supplier_id,
+            "normalized_label": normalized_label,
+            "product_id": product_id,
+            "match_score": None,
+            "match_source": "attr_share",
+            "extracted_attributes": extracted,
+            "last_seen_run_id": self.run_id,
+        }
+
+    def save_supplier_ref(self, ti: CatalogLine, product_id: int) -> None:
+        """Queue the SupplierProductRef of a catalog entry (see _upsert_supplier_refs)."""
+        row = _supplier_ref_row(ti, product_id)
+        self._refs[(row["supplier_id"], row["normalized_label"])] = row
+
+    def flush(self) -> None:
+        """Send the collected writes to the database (current transaction)."""
+        now = datetime.now(timezone.utc)
+        db_bulk.update_by_ids(LabelCache, self._seen_ids, {"last_seen_run_id": self.run_id})
+        db_bulk.upsert(
+            LabelCache,
+            [{**row, "last_used_at": now} for row in self._extracted.values()],
+            conflict_columns=("supplier_id", "normalized_label"),
+            constraint="uix_label_cache",
+            update_columns=("extracted_attributes", "last_used_at", "last_seen_run_id"),
         )
-        db.session.add(cache)
+        db_bulk.upsert(
+            LabelCache,
+            [{**row, "last_used_at": now} for row in self._attr_share.values()],
+            conflict_columns=("supplier_id", "normalized_label"),
+            constraint="uix_label_cache",
+            update_columns=(
+                "product_id", "match_source", "extracted_attributes",
+                "last_used_at", "last_seen_run_id",
+            ),
+        )
+        _upsert_supplier_refs(self._refs.values(), now)
+        self._seen_ids.clear()
+        self._extracted.clear()
+        self._attr_share.clear()
+        self._refs.clear()
 
 
-def _save_extraction_cache(
-    supplier_id: int,
-    normalized_label: str,
-    extracted: Dict[str, Any],
-    run_id: int | None = None,
+def _supplier_ref_row(ti: CatalogLine, product_id: int) -> Dict[str, Any]:
+    return {
+        "supplier_id": ti.supplier_id,
+        "product_id": product_id,
+        "normalized_label": normalize_label(ti.description or ti.model or ""),
+        "ean": ti.ean,
+        "part_number": ti.part_number,
+        "supplier_sku": ti.supplier_sku,
+    }
+
+
+def _upsert_supplier_refs(
+    rows: Iterable[Dict[str, Any]], now: datetime, chunk_size: int = db_bulk.DEFAULT_CHUNK_SIZE
 ) -> None:
-    """Save extracted attributes without product_id (pre-matching phase)."""
-    existing = LabelCache.query.filter_by(
-        supplier_id=supplier_id, normalized_label=normalized_label
-    ).first()
-    if existing:
-        existing.extracted_attributes = extracted
-        existing.last_used_at = datetime.now(timezone.utc)
-        existing.last_seen_run_id = run_id
-    else:
-        cache = LabelCache(
-            supplier_id=supplier_id,
-            normalized_label=normalized_label,
-            product_id=None,
-            match_score=None,
-            match_source="extracted",
-            extracted_attributes=extracted,
-            last_seen_run_id=run_id,
+    """Upsert SupplierProductRef rows keyed by (supplier_id, normalized_label).
+
+    An existing ref gets the new product_id, ean, supplier_sku and
+    last_seen_at; part_number is only set when the ref is created.
+    """
+    db_bulk.upsert(
+        SupplierProductRef,
+        [{**row, "last_seen_at": now} for row in rows],
+        conflict_columns=("supplier_id", "normalized_label"),
+        constraint="uix_supplier_ref_label",
+        update_columns=("product_id", "ean", "supplier_sku", "last_seen_at"),
+        chunk_size=chunk_size,
+    )
+
+
+class MatchOutcomeWriter:
+    """Phase 2 outcome buffer, applied with set-based bulk statements.
+
+    PendingMatch inserts/updates/deletes, auto-matched LabelCache updates,
+    SupplierProductRef upserts and ProductEanHistory inserts are collected
+    in memory; ``flush`` sends them as executemany / ``IN`` statements of at
+    most ``chunk_size`` rows. Loaded PendingMatch objects are updated with
+    ``set_committed_value`` so later reads in the same run see the new
+    values without the ORM flushing them row by row; candidate labels are
+    not ORM instances (see CandidateStore) and are updated by id.
+    """
+
+    def __init__(self, run_id: int | None, chunk_size: int = db_bulk.DEFAULT_CHUNK_SIZE) -> None:
+        self.run_id = run_id
+        self.chunk_size = chunk_size
+        self._pm_inserts: List[Dict[str, Any]] = []
+        self._pm_updates: Dict[int, Dict[str, Any]] = {}
+        self._pm_deletes: Dict[int, PendingMatch] = {}
+        # Ids deleted in any earlier flush of the run stay ignored
+        self._deleted_ids: Set[int] = set()
+        self._cache_updates: Dict[int, Dict[str, Any]] = {}
+        self._refs: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._eans: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _set(instance: Any, values: Dict[str, Any]) -> None:
+        for key, value in values.items():
+            set_committed_value(instance, key, value)
+
+    def add_pending(self, **values: Any) -> None:
+        self._pm_inserts.append(values)
+
+    def update_pending(self, pm: PendingMatch, **values: Any) -> None:
+        if pm.id in self._deleted_ids:
+            return
+        self._set(pm, values)
+        self._pm_updates.setdefault(pm.id, {"id": pm.id}).update(values)
+
+    def delete_pending(self, pm: PendingMatch) -> None:
+        if pm.id in self._deleted_ids:
+            return
+        self._pm_updates.pop(pm.id, None)
+        self._pm_deletes[pm.id] = pm
+        self._deleted_ids.add(pm.id)
+
+    def match_label(self, label_id: int, **values: Any) -> None:
+        self._cache_updates.setdefault(label_id, {"id": label_id}).update(values)
+
+    def save_supplier_ref(self, ti: CatalogLine, product_id: int) -> None:
+        row = _supplier_ref_row(ti, product_id)
+        self._refs[(row["supplier_id"], row["normalized_label"])] = row
+
+    def log_ean(self, product_id: int, ean: str | None, supplier_id: int, source: str) -> None:
+        """Same as _log_ean_history: skipped when the EAN is missing."""
+        if not ean:
+            return
+        self._eans.append({
+            "product_id": product_id,
+            "ean": ean,
+            "supplier_id": supplier_id,
+            "matching_run_id": self.run_id,
+            "source": source,
+        })
+
+    def flush(self) -> None:
+        """Send the buffered outcomes to the database (current transaction)."""
+        now = datetime.now(timezone.utc)
+        chunk = self.chunk_size
+        db_bulk.delete_ids(PendingMatch, self._pm_deletes, chunk)
+        db_bulk.update_rows(PendingMatch, list(self._pm_updates.values()), chunk)
+        db_bulk.insert_rows(
+            PendingMatch, [{**row, "created_at": now} for row in self._pm_inserts], chunk
+        )
+        db_bulk.update_rows(LabelCache, list(self._cache_updates.values()), chunk)
+        _upsert_supplier_refs(self._refs.values(), now, chunk)
+        db_bulk.insert_rows(
+            ProductEanHistory, [{**row, "seen_at": now} for row in self._eans], chunk
         )
-        db.session.add(cache)
+        # Deleted rows must not be flushed or refreshed through the ORM later
+        for pm in self._pm_deletes.values():
+            if pm in db.session:
+                db.session.expunge(pm)
+        self._pm_inserts.clear()
+        self._pm_updates.clear()
+        self._pm_deletes.clear()
+        self._cache_updates.clear()
+        self._refs.clear()
+        self._eans.clear()
 
 
 def _cleanup_orphaned_labels(run_id: int, supplier_id: int | None) -> None:
@@ -1766,34 +3005,6 @@ def _log_ean_history(
     ))
 
 
-def _create_supplier_ref(
-    supplier_id: int, ti: SupplierCatalog, product_id: int
-) -> None:
-    """Create or update a SupplierProductRef keyed by normalized_label."""
-    label = ti.description or ti.model or ""
-    normalized = normalize_label(label)
-    existing = SupplierProductRef.query.filter_by(
-        supplier_id=supplier_id,
-        normalized_label=normalized,
-    ).first()
-    if existing:
-        existing.product_id = product_id
-        existing.ean = ti.ean
-        existing.supplier_sku = ti.supplier_sku
-        existing.last_seen_at = datetime.now(timezone.utc)
-    else:
-        ref = SupplierProductRef(
-            supplier_id=supplier_id,
-            product_id=product_id,
-            normalized_label=normalized,
-            ean=ti.ean,
-            part_number=ti.part_number,
-            supplier_sku=ti.supplier_sku,
-            last_seen_at=datetime.now(timezone.utc),
-        )
-        db.session.add(ref)
-
-
 def _save_cache(
     supplier_id: int,
     normalized_label: str,
@@ -1,21 +1,16 @@
 """BM25 blocking for candidate pre-selection.
 
-Builds a TF-IDF/BM25 index over LabelCache entries and retrieves the
-top-k most relevant candidates for each product query. This replaces
-the linear scan over all entries of a brand.
+Builds a BM25 index over LabelCache entries and retrieves the top-k most
+relevant candidates for each product query. This replaces the linear scan
+over all entries of a brand. The index itself (utils/matching/bm25_index.py)
+can be persisted and updated incrementally between runs.
 """
 
 from __future__ import annotations
 
-import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional
 
-from rank_bm25 import BM25Plus
-
-
-def _tokenize(text: str) -> List[str]:
-    """Lowercase, strip accents-insensitive, split on non-alphanumeric."""
-    return re.findall(r"[a-z0-9]+", text.lower())
+from utils.matching.bm25_index import BM25Index
 
 
 def _label_cache_to_doc(attrs: Dict) -> str:
@@ -53,20 +48,33 @@ class BM25Blocker:
     Usage:
         blocker = BM25Blocker(cache_entries)
         candidates = blocker.get_candidates(product, top_k=50)
+
+    ``cache_entries`` may be LabelCache entries or CandidateStore rows; only
+    ``id`` and ``extracted_attributes`` are read. Pass ``index`` to reuse an
+    existing BM25Index: it is synced to ``cache_entries`` (only new or
+    changed labels are tokenized). ``persistent`` loads and saves it.
     """
 
-    def __init__(self, cache_entries: list) -> None:
+    def __init__(self, cache_entries: list, index: Optional[BM25Index] = None) -> None:
         self._entries = cache_entries
-        self._entry_ids = [e.id for e in cache_entries]
-
-        corpus = []
-        for entry in cache_entries:
-            attrs = entry.extracted_attributes or {}
-            doc = _label_cache_to_doc(attrs)
-            corpus.append(_tokenize(doc))
-
-        self._bm25 = BM25Plus(corpus) if corpus else None
         self._id_to_entry = {e.id: e for e in cache_entries}
+        self._index = index if index is not None else BM25Index()
+        self.added, self.removed = self._index.sync(
+            (e.id, _label_cache_to_doc(e.extracted_attributes or {})) for e in cache_entries
+        )
+
+    @classmethod
+    def persistent(cls, cache_entries: list, name: str = "label_index") -> "BM25Blocker":
+        """Blocker over the index persisted as ``name``, saved back if it changed."""
+        index = BM25Index.load(name)
+        blocker = cls(cache_entries, index)
+        if index is None or blocker.added or blocker.removed:
+            try:
+                blocker._index.save(name)
+            except OSError:
+                # Read-only or missing data volume: the in-memory index still works
+                pass
+        return blocker
 
     @property
     def size(self) -> int:
@@ -74,22 +82,11 @@ class BM25Blocker:
 
     def get_candidates(self, product, top_k: int = 50) -> List:
         """Return the top-k LabelCache entries most relevant to the product."""
-        if not self._bm25 or not self._entries:
+        if not self._entries:
             return []
 
         query_text = _product_to_query(product)
-        query_tokens = _tokenize(query_text)
-        if not query_tokens:
-            return []
-
-        scores = self._bm25.get_scores(query_tokens)
-
-        scored_indices: List[Tuple[float, int]] = []
-        for idx, score in enumerate(scores):
-            if score > 0:
-                scored_indices.append((score, idx))
-
-        scored_indices.sort(key=lambda x: x[0], reverse=True)
-        top_indices = scored_indices[:top_k]
-
-        return [self._entries[idx] for _, idx in top_indices]
+        return [
+            self._id_to_entry[doc_id]
+            for doc_id, _ in self._index.search(query_text, top_k=top_k)
+        ]
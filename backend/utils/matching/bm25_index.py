@@ -0,0 +1,336 @@
+"""Sparse BM25+ inverted index with incremental updates and persistence.
+
+Replaces ``rank_bm25.BM25Plus`` for the BM25 blocker. Scores are the same
+BM25+ scores (k1=1.5, b=0.75, delta=1, idf = log((N + 1) / df)), but:
+
+- postings are stored as CSR arrays (``indptr`` per term, then document
+  slots and term frequencies), so a query only reads the postings of its
+  own terms and keeps the top-k with ``argpartition``;
+- documents can be added and removed one by one. Removed documents are
+  tombstoned, added ones go to a small delta segment; both are merged into
+  the CSR arrays by ``compact()`` (when the delta grows, and before saving);
+- ``save`` / ``load`` persist the index under ``BM25_INDEX_DIR``. Each
+  document keeps a fingerprint of its text, so ``sync`` only re-tokenizes
+  the documents that were added or changed since the index was saved.
+
+BM25+ gives every document ``idf * delta`` for each query term it does not
+contain, so every document scores above zero as soon as one query term is
+known. As with ``rank_bm25``, documents without any query term therefore
+fill the remaining top-k slots (lowest document ids first, the order of
+the candidate store); ties are broken by document id.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_BM25_DIR = os.environ.get("BM25_INDEX_DIR", "/app/data/bm25")
+
+# Bump when the tokenizer or the stored layout changes: older files are ignored
+INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumeric."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def text_fingerprint(text: str) -> int:
+    """64-bit fingerprint of a document text (change detection in ``sync``)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class BM25Index:
+    """Incremental BM25+ index over documents identified by integer ids."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, delta: float = 1.0) -> None:
+        self.k1 = k1
+        self.b = b
+        self.delta = delta
+        self._vocab: Dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        # Per slot (dead slots stay until compaction); the NumPy arrays have
+        # spare capacity, only their first ``len(_doc_ids)`` items are used
+        self._doc_ids: List[int] = []
+        self._fingerprints: List[int] = []
+        self._doc_terms: List[np.ndarray] = []
+        self._doc_tfs: List[np.ndarray] = []
+        self._doc_len = np.zeros(0, dtype=np.float64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._slot_by_id: Dict[int, int] = {}
+        self._total_len = 0
+        # CSR postings of the slots indexed at the last compaction
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._post_slots = np.zeros(0, dtype=np.int64)
+        self._post_tfs = np.zeros(0, dtype=np.float64)
+        # Postings of the slots added since the last compaction: term -> [(slot, tf)]
+        self._delta: Dict[int, List[Tuple[int, int]]] = {}
+        self._delta_postings = 0
+        self._id_order: Optional[np.ndarray] = None
+
+    # ------------------------------------------------------------------
+    # Documents
+    # ------------------------------------------------------------------
+
+    @property
+    def size(self) -> int:
+        return len(self._slot_by_id)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._slot_by_id
+
+    def fingerprint(self, doc_id: int) -> Optional[int]:
+        slot = self._slot_by_id.get(doc_id)
+        return None if slot is None else self._fingerprints[slot]
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Index ``text`` under ``doc_id`` (replacing a previous version)."""
+        if doc_id in self._slot_by_id:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        term_ids = np.array(
+            [self._vocab.setdefault(term, len(self._vocab)) for term in counts], dtype=np.int64
+        )
+        tfs = np.array(list(counts.values()), dtype=np.int64)
+        if len(self._vocab) > len(self._df):
+            self._df = np.concatenate(
+                [self._df, np.zeros(len(self._vocab) - len(self._df), dtype=np.int64)]
+            )
+        self._df[term_ids] += 1
+
+        slot = len(self._doc_ids)
+        if slot == len(self._doc_len):
+            capacity = max(2 * slot, 64)
+            self._doc_len = np.resize(self._doc_len, capacity)
+            self._alive = np.resize(self._alive, capacity)
+        self._doc_ids.append(doc_id)
+        self._fingerprints.append(text_fingerprint(text))
+        self._doc_terms.append(term_ids)
+        self._doc_tfs.append(tfs)
+        length = int(tfs.sum())
+        self._doc_len[slot] = length
+        self._alive[slot] = True
+        self._slot_by_id[doc_id] = slot
+        self._total_len += length
+        for term, tf in zip(term_ids.tolist(), tfs.tolist()):
+            self._delta.setdefault(term, []).append((slot, tf))
+        self._delta_postings += len(term_ids)
+        self._id_order = None
+
+    def remove(self, doc_id: int) -> bool:
+        """Drop ``doc_id`` from the index. Returns False if it was not indexed."""
+        slot = self._slot_by_id.pop(doc_id, None)
+        if slot is None:
+            return False
+        self._alive[slot] = False
+        self._df[self._doc_terms[slot]] -= 1
+        self._total_len -= int(self._doc_len[slot])
+        self._id_order = None
+        return True
+
+    def sync(self, documents: Iterable[Tuple[int, str]]) -> Tuple[int, int]:
+        """Make the index hold exactly ``documents`` ((id, text) pairs).
+
+        Unchanged documents (same text fingerprint) are kept as they are.
+        Returns (added or changed, removed).
+        """
+        seen = set()
+        added = 0
+        for doc_id, text in documents:
+            seen.add(doc_id)
+            if self.fingerprint(doc_id) != text_fingerprint(text):
+                self.add(doc_id, text)
+                added += 1
+        gone = [doc_id for doc_id in self._slot_by_id if doc_id not in seen]
+        for doc_id in gone:
+            self.remove(doc_id)
+        if self._delta_postings > max(1000, len(self._post_slots) // 10):
+            self.compact()
+        return added, len(gone)
+
+    def compact(self) -> None:
+        """Merge the delta segment and drop removed documents from the CSR arrays."""
+        live = np.flatnonzero(self._alive[:len(self._doc_ids)]).tolist()
+        self._doc_ids = [self._doc_ids[slot] for slot in live]
+        self._fingerprints = [self._fingerprints[slot] for slot in live]
+        self._doc_terms = [self._doc_terms[slot] for slot in live]
+        self._doc_tfs = [self._doc_tfs[slot] for slot in live]
+        self._doc_len = self._doc_len[live] if live else np.zeros(0, dtype=np.float64)
+        self._alive = np.ones(len(live), dtype=bool)
+        self._slot_by_id = {doc_id: slot for slot, doc_id in enumerate(self._doc_ids)}
+        self._build_postings()
+
+    def _build_postings(self) -> None:
+        lengths = np.array([len(terms) for terms in self._doc_terms], dtype=np.int64)
+        if len(lengths):
+            terms = np.concatenate(self._doc_terms)
+            tfs = np.concatenate(self._doc_tfs)
+        else:
+            terms = np.zeros(0, dtype=np.int64)
+            tfs = np.zeros(0, dtype=np.int64)
+        slots = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        order = np.argsort(terms, kind="stable")
+        self._post_slots = slots[order]
+        self._post_tfs = tfs[order].astype(np.float64)
+        self._indptr = np.zeros(len(self._vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self._vocab)), out=self._indptr[1:])
+        self._delta = {}
+        self._delta_postings = 0
+        self._id_order = None
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term + 1 < len(self._indptr):
+            start, end = self._indptr[term], self._indptr[term + 1]
+            slots, tfs = self._post_slots[start:end], self._post_tfs[start:end]
+        else:
+            slots, tfs = self._post_slots[:0], self._post_tfs[:0]
+        extra = self._delta.get(term)
+        if extra:
+            slots = np.concatenate([slots, np.array([s for s, _ in extra], dtype=np.int64)])
+            tfs = np.concatenate([tfs, np.array([tf for _, tf in extra], dtype=np.float64)])
+        return slots, tfs
+
+    def _slots_by_id(self) -> np.ndarray:
+        """Live slots in increasing document id order."""
+        if self._id_order is None:
+            live = np.flatnonzero(self._alive[:len(self._doc_ids)])
+            ids = np.array(self._doc_ids, dtype=np.int64)[live]
+            self._id_order = live[np.argsort(ids, kind="stable")]
+        return self._id_order
+
+    def search(self, query: str, top_k: int = 50) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, BM25+ score) for ``query``, best first."""
+        n_docs = self.size
+        if not n_docs or top_k <= 0:
+            return []
+        weights = Counter(
+            self._vocab[term] for term in tokenize(query)
+            if term in self._vocab and self._df[self._vocab[term]] > 0
+        )
+        if not weights:
+            return []
+
+        avgdl = self._total_len / n_docs
+        floor = 0.0
+        slot_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for term, count in weights.items():
+            idf = np.log((n_docs + 1) / self._df[term])
+            floor += count * idf * self.delta
+            slots, tfs = self._postings(term)
+            live = self._alive[slots]
+            slots, tfs = slots[live], tfs[live]
+            norm = self.k1 * (1 - self.b + self.b * self._doc_len[slots] / avgdl)
+            slot_parts.append(slots)
+            score_parts.append(count * idf * (tfs * (self.k1 + 1)) / (norm + tfs))
+
+        slots, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts), minlength=len(slots))
+        doc_ids = np.array(self._doc_ids, dtype=np.int64)
+
+        if len(slots) > top_k:
+            # Everything scoring at least the k-th best (ties included), then exact order
+            kth = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+            keep = scores >= kth
+            slots, scores = slots[keep], scores[keep]
+        order = np.lexsort((doc_ids[slots], -scores))[:top_k]
+        results = [(int(doc_ids[s]), float(floor + sc)) for s, sc in zip(slots[order], scores[order])]
+
+        missing = top_k - len(results)
+        if missing > 0:
+            # Documents without any query term: delta floor only
+            matched = set(slots.tolist())
+            head = self._slots_by_id()[: missing + len(matched)]
+            fill = [int(s) for s in head if int(s) not in matched][:missing]
+            results.extend((int(doc_ids[s]), floor) for s in fill)
+        return results
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, name: str = "label_index") -> str:
+        """Compact and persist the index (atomic replace). Returns the path."""
+        self.compact()
+        os.makedirs(_BM25_DIR, exist_ok=True)
+        path = os.path.join(_BM25_DIR, f"{name}.npz")
+        terms = [""] * len(self._vocab)
+        for term, term_id in self._vocab.items():
+            terms[term_id] = term
+        lengths = np.array([len(t) for t in self._doc_terms], dtype=np.int64)
+        doc_indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=doc_indptr[1:])
+        fd, tmp_path = tempfile.mkstemp(dir=_BM25_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(
+                    fh,
+                    version=np.array(INDEX_VERSION),
+                    params=np.array([self.k1, self.b, self.delta]),
+                    vocab=np.array(terms, dtype=str),
+                    doc_ids=np.array(self._doc_ids, dtype=np.int64),
+                    fingerprints=np.array(self._fingerprints, dtype=np.uint64),
+                    doc_indptr=doc_indptr,
+                    doc_terms=(
+                        np.concatenate(self._doc_terms) if len(lengths) else np.zeros(0, np.int64)
+                    ),
+                    doc_tfs=(
+                        np.concatenate(self._doc_tfs) if len(lengths) else np.zeros(0, np.int64)
+                    ),
+                    indptr=self._indptr,
+                    post_slots=self._post_slots,
+                    post_tfs=self._post_tfs,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, name: str = "label_index") -> Optional["BM25Index"]:
+        """Load a persisted index, or None if missing, unreadable or outdated."""
+        path = os.path.join(_BM25_DIR, f"{name}.npz")
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return None
+                k1, b, delta = data["params"].tolist()
+                index = cls(k1=k1, b=b, delta=delta)
+                index._vocab = {str(term): i for i, term in enumerate(data["vocab"].tolist())}
+                doc_indptr = data["doc_indptr"]
+                doc_terms = data["doc_terms"]
+                doc_tfs = data["doc_tfs"]
+                index._doc_ids = data["doc_ids"].tolist()
+                index._fingerprints = data["fingerprints"].tolist()
+                index._doc_terms = np.split(doc_terms, doc_indptr[1:-1])
+                index._doc_tfs = np.split(doc_tfs, doc_indptr[1:-1])
+                index._indptr = data["indptr"]
+                index._post_slots = data["post_slots"]
+                index._post_tfs = data["post_tfs"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        n_docs = len(index._doc_ids)
+        if n_docs == 0:
+            index._doc_terms, index._doc_tfs = [], []
+        index._doc_len = np.array([float(tfs.sum()) for tfs in index._doc_tfs], dtype=np.float64)
+        index._alive = np.ones(n_docs, dtype=bool)
+        index._slot_by_id = {doc_id: slot for slot, doc_id in enumerate(index._doc_ids)}
+        index._total_len = int(index._doc_len.sum())
+        index._df = np.diff(index._indptr)
+        return index
@@ -1,13 +1,16 @@
 """Bi-encoder embeddings for semantic product matching.
 
 Uses sentence-transformers to encode product descriptions and supplier
-labels into dense vectors for similarity search.
+labels into dense vectors for similarity search. ``compute_*_embeddings``
+go through the on-disk EmbeddingStore of the current model, so only texts
+never embedded by that model are encoded.
 """
 
 from __future__ import annotations
 
+import hashlib
 import os
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 import numpy as np
 
@@ -17,16 +20,41 @@ _FINETUNED_PATH = os.environ.get(
 )
 
 _model = None
+_model_fingerprint: Optional[str] = None
+_store = None
+
+
+def _disk_fingerprint() -> str:
+    """Fingerprint of the model that _get_model() would load now.
+
+    The fine-tuned model is rewritten in place by the weekly fine-tuning,
+    so its files' sizes and modification times are part of it.
+    """
+    parts = [get_model_name()]
+    if os.path.isdir(_FINETUNED_PATH):
+        for root, _, files in sorted(os.walk(_FINETUNED_PATH)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                relative = os.path.relpath(path, _FINETUNED_PATH)
+                parts.append(f"{relative}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def model_fingerprint() -> str:
+    """Fingerprint of the loaded model (of the model on disk if not loaded yet)."""
+    return _model_fingerprint or _disk_fingerprint()
 
 
 def _get_model():
     """Lazy-load the sentence-transformer model (singleton)."""
-    global _model
+    global _model, _model_fingerprint
     if _model is not None:
         return _model
 
     from sentence_transformers import SentenceTransformer
 
+    _model_fingerprint = _disk_fingerprint()
     if os.path.isdir(_FINETUNED_PATH):
         _model = SentenceTransformer(_FINETUNED_PATH)
     else:
@@ -34,6 +62,47 @@ def _get_model():
     return _model
 
 
+def get_embedding_store():
+    """EmbeddingStore of the current model (None if the cache dir is unusable)."""
+    global _store
+    from utils.matching.embedding_store import EmbeddingStore
+
+    fingerprint = model_fingerprint()
+    if _store is None or _store.fingerprint != fingerprint:
+        try:
+            _store = EmbeddingStore(fingerprint)
+        except OSError:
+            _store = None
+    return _store
+
+
+def embed_texts_cached(texts: List[str]) -> np.ndarray:
+    """embed_texts() through the embedding store: only unseen texts are encoded."""
+    store = get_embedding_store()
+    if store is None:
+        return embed_texts(texts)
+    try:
+        return store.embed(texts, embed_texts)
+    except OSError:
+        return embed_texts(texts)
+
+
+def compact_embedding_store(keep_keys: Iterable[str] = ()) -> bool:
+    """Drop the cached embeddings not used since the last compaction.
+
+    ``keep_keys`` (hex text keys, see label_text_keys) are kept even if
+    unused: the labels of the FAISS index, whose vectors an incremental
+    sync does not read again.
+    """
+    store = get_embedding_store()
+    if store is None:
+        return False
+    try:
+        return store.compact(keep_keys=[bytes.fromhex(key) for key in keep_keys])
+    except OSError:
+        return False
+
+
 def embed_text(text: str) -> np.ndarray:
     """Encode a single text into a normalized embedding vector."""
     model = _get_model()
@@ -87,7 +156,7 @@ def compute_product_embeddings(products: list) -> dict:
     """
     texts = [product_to_text(p) for p in products]
     ids = [p.id for p in products]
-    embeddings = embed_texts(texts)
+    embeddings = embed_texts_cached(texts)
     return {pid: emb for pid, emb in zip(ids, embeddings)}
 
 
@@ -98,10 +167,20 @@ def compute_label_embeddings(cache_entries: list) -> dict:
     """
     texts = [label_cache_to_text(e.extracted_attributes or {}) for e in cache_entries]
     ids = [e.id for e in cache_entries]
-    embeddings = embed_texts(texts)
+    embeddings = embed_texts_cached(texts)
     return {lid: emb for lid, emb in zip(ids, embeddings)}
 
 
+def label_text_keys(cache_entries: list) -> dict:
+    """Map label_cache_id -> hex key of the text its embedding is computed from."""
+    from utils.matching.embedding_store import text_key
+
+    return {
+        e.id: text_key(label_cache_to_text(e.extracted_attributes or {})).hex()
+        for e in cache_entries
+    }
+
+
 def get_model_name() -> str:
     """Return the name of the currently loaded model."""
     if os.path.isdir(_FINETUNED_PATH):
@@ -0,0 +1,210 @@
+"""Persistent embedding cache keyed by (model fingerprint, text hash).
+
+Products and labels rarely change between two nightly runs, so their
+embeddings are kept on disk and only new or changed texts are encoded.
+Each model fingerprint has its own directory under ``EMBEDDING_CACHE_DIR``
+holding two append-only files per generation:
+
+- ``keys.<gen>.bin``: the SHA-1 digest (20 bytes) of each embedded text;
+- ``vectors.<gen>.f32``: the float32 vectors, one row per key, read
+  through a memory map.
+
+Rows are only ever appended (under an exclusive ``flock``), so concurrent
+runs and crashes cannot corrupt existing rows: the key file is written
+last and defines how many rows are valid. ``compact`` writes the rows used
+recently, plus the rows a caller still needs (the labels of the FAISS
+index, which an incremental sync never embeds again), to the next
+generation once most of the file is stale, then switches ``meta.json`` to
+it; it also removes the directories of other fingerprints (previous
+models).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+import numpy as np
+
+_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", "/app/data/embeddings")
+
+_KEY_SIZE = 20
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """Append-only embedding cache of one model (see module docstring)."""
+
+    def __init__(self, fingerprint: str, directory: Optional[str] = None) -> None:
+        self.fingerprint = fingerprint
+        self.root = directory or _CACHE_DIR
+        self.path = os.path.join(self.root, fingerprint[:32])
+        self.dim: Optional[int] = None
+        self._generation = 0
+        self._rows: Dict[bytes, int] = {}
+        self._count = 0  # rows of the key file already read
+        self._vectors: Optional[np.ndarray] = None
+        # Keys read or written since the last compaction
+        self.touched: Set[bytes] = set()
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked():
+            self._refresh()
+
+    @property
+    def size(self) -> int:
+        return len(self._rows)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _keys_file(self, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return self._file(f"keys.{generation}.bin")
+
+    def _vectors_file(self, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return self._file(f"vectors.{generation}.f32")
+
+    def _write_meta(self, generation: int) -> None:
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w") as fh:
+            json.dump(
+                {"dim": self.dim, "generation": generation, "fingerprint": self.fingerprint}, fh
+            )
+        os.replace(tmp_path, self._file("meta.json"))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._file("lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Read the rows appended since the last read (call under the lock)."""
+        meta_path = self._file("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        self.dim = int(meta["dim"])
+        if int(meta["generation"]) != self._generation:
+            # Compacted by another process: row numbers changed
+            self._generation = int(meta["generation"])
+            self._rows, self._count, self._vectors = {}, 0, None
+        count = self._stored_rows()
+        if count > self._count:
+            with open(self._keys_file(), "rb") as fh:
+                fh.seek(self._count * _KEY_SIZE)
+                data = fh.read((count - self._count) * _KEY_SIZE)
+            for row in range(self._count, count):
+                offset = (row - self._count) * _KEY_SIZE
+                self._rows.setdefault(data[offset:offset + _KEY_SIZE], row)
+            self._count = count
+            self._vectors = np.memmap(
+                self._vectors_file(), dtype=np.float32, mode="r", shape=(count, self.dim)
+            )
+
+    def get(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        """Cached vector of each key (None when missing)."""
+        out: List[Optional[np.ndarray]] = []
+        for key in keys:
+            row = self._rows.get(key)
+            out.append(None if row is None else np.array(self._vectors[row]))
+            self.touched.add(key)
+        return out
+
+    def put(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        """Append the vectors of keys that are not stored yet."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        with self._locked():
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._write_meta(self._generation)
+            new_rows = []
+            seen: Set[bytes] = set()
+            for i, key in enumerate(keys):
+                if key not in self._rows and key not in seen:
+                    seen.add(key)
+                    new_rows.append(i)
+            if new_rows:
+                start = self._stored_rows()
+                # Vectors first: rows only become valid once their key is written
+                with open(self._vectors_file(), "r+b" if start else "wb") as fh:
+                    fh.seek(start * self.dim * 4)
+                    fh.write(np.ascontiguousarray(vectors[new_rows]).tobytes())
+                with open(self._keys_file(), "ab") as fh:
+                    fh.write(b"".join(keys[i] for i in new_rows))
+                self._refresh()
+        self.touched.update(keys)
+
+    def _stored_rows(self) -> int:
+        keys_path = self._keys_file()
+        return os.path.getsize(keys_path) // _KEY_SIZE if os.path.exists(keys_path) else 0
+
+    def embed(self, texts: Sequence[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Vectors of ``texts``, encoding (and storing) only the missing ones."""
+        with self._locked():
+            self._refresh()
+        keys = [text_key(text) for text in texts]
+        cached = self.get(keys)
+        missing: Dict[bytes, str] = {}
+        for key, text, vector in zip(keys, texts, cached):
+            if vector is None:
+                missing.setdefault(key, text)
+        if missing:
+            encoded = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            self.put(list(missing), encoded)
+            by_key = dict(zip(missing, encoded))
+            cached = [by_key[key] if vector is None else vector for key, vector in zip(keys, cached)]
+        if not cached:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.vstack(cached).astype(np.float32, copy=False)
+
+    def compact(self, min_stale_ratio: float = 0.5, keep_keys: Iterable[bytes] = ()) -> bool:
+        """Keep only the touched rows and ``keep_keys`` once more than
+        ``min_stale_ratio`` of the rows are stale.
+
+        Also removes the cache directories of other model fingerprints.
+        Returns True if the files were rewritten.
+        """
+        needed = self.touched.union(keep_keys)
+        for name in os.listdir(self.root):
+            other = os.path.join(self.root, name)
+            if other != self.path and os.path.isdir(other):
+                shutil.rmtree(other, ignore_errors=True)
+        with self._locked():
+            self._refresh()
+            total = self._stored_rows()
+            keep = [(key, row) for key, row in self._rows.items() if key in needed]
+            if not total or (total - len(keep)) <= total * min_stale_ratio:
+                return False
+            keep.sort(key=lambda item: item[1])
+            rows = [row for _, row in keep]
+            vectors = np.array(self._vectors[rows]) if rows else np.zeros((0, self.dim))
+            old, new = self._generation, self._generation + 1
+            with open(self._vectors_file(new), "wb") as fh:
+                fh.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(self._keys_file(new), "wb") as fh:
+                fh.write(b"".join(key for key, _ in keep))
+            # Switching meta.json is the commit point
+            self._write_meta(new)
+            for path in (self._keys_file(old), self._vectors_file(old)):
+                if os.path.exists(path):
+                    os.unlink(path)
+            self._refresh()
+        self.touched = set()
+        return True
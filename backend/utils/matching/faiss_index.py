@@ -1,55 +1,207 @@
 """FAISS index for approximate nearest neighbor search on embeddings.
 
-Builds an in-memory FAISS index over label embeddings and provides
-sub-millisecond candidate retrieval for product matching.
+Builds a FAISS index over label embeddings and provides sub-millisecond
+candidate retrieval for product matching. The index is ID-mapped (label
+ids are the FAISS ids), so labels can be added and removed without a
+rebuild, and it is persisted under ``FAISS_INDEX_DIR`` together with the
+embedding model fingerprint and a text key per label (see ``sync``).
+
+Up to ``FAISS_IVF_THRESHOLD`` entries the index is exact (IndexFlatIP).
+Above, it is an IVF index (IndexIVFFlat, which supports ``remove_ids``
+unlike HNSW) whose ``nprobe`` is raised until its recall@k against the
+exact index reaches ``FAISS_MIN_RECALL`` on a sample of stored vectors.
 """
 
 from __future__ import annotations
 
+import json
+import math
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
 _FAISS_DIR = os.environ.get("FAISS_INDEX_DIR", "/app/data/faiss")
 
+# Bump when the stored layout changes: older files are ignored
+INDEX_VERSION = 2
+
+RECALL_K = 50
+RECALL_QUERIES = 256
+
+# Queries per faiss search call in search_batch (bounds the distance buffers)
+QUERY_BATCH = 1024
+
+
+def _get_env_int(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_env_float(key: str, default: float) -> float:
+    try:
+        return float(os.environ.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
 
 class FAISSIndex:
     """FAISS-backed ANN index for matching embeddings.
 
-    Uses IndexFlatIP (inner product = cosine similarity on normalized vectors).
-    For the expected volume (<10K entries), flat index is optimal.
+    Inner product = cosine similarity on normalized vectors. ``kind`` is
+    "flat" (exact) or "ivf" (approximate, see module docstring).
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        ivf_threshold: Optional[int] = None,
+        min_recall: Optional[float] = None,
+    ) -> None:
         self._index = None
-        self._id_map: List[int] = []
         self._dim: int = 0
+        self.kind = "flat"
+        self.fingerprint = ""
+        self.nprobe = 0
+        self.recall: Optional[float] = None
+        self.trained_size = 0
+        # label id -> key of the text its vector was computed from
+        self._keys: Dict[int, str] = {}
+        self.ivf_threshold = (
+            ivf_threshold if ivf_threshold is not None
+            else _get_env_int("FAISS_IVF_THRESHOLD", 10_000)
+        )
+        self.min_recall = (
+            min_recall if min_recall is not None else _get_env_float("FAISS_MIN_RECALL", 0.95)
+        )
 
     @property
     def size(self) -> int:
-        return len(self._id_map)
+        return 0 if self._index is None else int(self._index.ntotal)
 
-    def build(self, embeddings: Dict[int, np.ndarray]) -> None:
+    @property
+    def text_keys(self) -> List[str]:
+        """Keys of the texts the indexed vectors were computed from."""
+        return list(self._keys.values())
+
+    def build(
+        self,
+        embeddings: Dict[int, np.ndarray],
+        fingerprint: str = "",
+        keys: Optional[Dict[int, str]] = None,
+    ) -> None:
         """Build the index from a dict of {id: embedding_vector}.
 
         Args:
             embeddings: mapping from entity ID to normalized float32 vector.
+            fingerprint: embedding model fingerprint the vectors come from.
+            keys: {id: text key} used by ``sync`` to detect changed texts.
         """
         import faiss
 
+        self.fingerprint = fingerprint
+        self._keys = dict(keys or {})
+        self.recall = None
+        self.nprobe = 0
         if not embeddings:
             self._index = None
-            self._id_map = []
+            self.kind = "flat"
+            self.trained_size = 0
             return
 
-        ids = list(embeddings.keys())
-        vectors = np.array([embeddings[i] for i in ids], dtype=np.float32)
+        ids = np.array(list(embeddings.keys()), dtype=np.int64)
+        vectors = np.array([embeddings[i] for i in embeddings], dtype=np.float32)
         self._dim = vectors.shape[1]
-        self._id_map = ids
+        self.trained_size = len(ids)
+
+        if len(ids) > self.ivf_threshold:
+            self.kind = "ivf"
+            nlist = max(1, min(int(4 * math.sqrt(len(ids))), len(ids) // 39))
+            quantizer = faiss.IndexFlatIP(self._dim)
+            index = faiss.IndexIVFFlat(quantizer, self._dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.add_with_ids(vectors, ids)
+            self._index = index
+            self._tune_nprobe(ids, vectors)
+        else:
+            self.kind = "flat"
+            self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(self._dim))
+            self._index.add_with_ids(vectors, ids)
+
+    def _tune_nprobe(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Raise nprobe until recall@k against an exact search reaches min_recall."""
+        import faiss
+
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(vectors), min(RECALL_QUERIES, len(vectors)), replace=False)]
+        exact = faiss.IndexFlatIP(self._dim)
+        exact.add(vectors)
+        _, positions = exact.search(sample, min(RECALL_K, len(vectors)))
+        truth = ids[positions]
+
+        nlist = self._index.nlist
+        nprobe = min(8, nlist)
+        while True:
+            self._index.nprobe = nprobe
+            self.recall = self.measure_recall(sample, truth)
+            if self.recall >= self.min_recall or nprobe >= nlist:
+                break
+            nprobe = min(nprobe * 2, nlist)
+        self.nprobe = nprobe
 
-        self._index = faiss.IndexFlatIP(self._dim)
-        self._index.add(vectors)
+    def measure_recall(self, queries: np.ndarray, truth: np.ndarray) -> float:
+        """Mean recall@k of the index, ``truth`` holding the exact top-k ids per query."""
+        if not truth.size:
+            return 1.0
+        _, found = self._index.search(queries.astype(np.float32), truth.shape[1])
+        hits = sum(
+            len(set(expected.tolist()) & set(row.tolist()))
+            for expected, row in zip(truth, found)
+        )
+        return hits / float(truth.size)
+
+    def needs_rebuild(self) -> bool:
+        """True when the index kind no longer suits its size (or IVF drifted)."""
+        if self._index is None:
+            return False
+        if self.kind == "flat":
+            return self.size > self.ivf_threshold
+        # IVF centroids were trained on a corpus half the current size
+        return self.size <= self.ivf_threshold // 2 or self.size > 2 * self.trained_size
+
+    def sync(
+        self,
+        keys: Dict[int, str],
+        embed: Callable[[List[int]], Dict[int, np.ndarray]],
+    ) -> Tuple[int, int]:
+        """Make the index hold exactly the ids of ``keys``.
+
+        Ids whose text key changed are removed and added again with the
+        vectors returned by ``embed(ids)``. Returns (added, removed).
+        """
+        removed = [
+            label_id for label_id, key in self._keys.items() if keys.get(label_id) != key
+        ]
+        added = [label_id for label_id, key in keys.items() if self._keys.get(label_id) != key]
+        if removed and self._index is not None:
+            self._index.remove_ids(np.array(removed, dtype=np.int64))
+        for label_id in removed:
+            del self._keys[label_id]
+        if added:
+            embeddings = embed(added)
+            ids = [label_id for label_id in added if label_id in embeddings]
+            if ids:
+                vectors = np.array([embeddings[i] for i in ids], dtype=np.float32)
+                if self._index is None:
+                    import faiss
+
+                    self._dim = vectors.shape[1]
+                    self.kind = "flat"
+                    self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(self._dim))
+                self._index.add_with_ids(vectors, np.array(ids, dtype=np.int64))
+                self._keys.update((label_id, keys[label_id]) for label_id in ids)
+        return len(added), len(removed)
 
     def search(
         self, query_embedding: np.ndarray, top_k: int = 100
@@ -68,38 +220,94 @@ class FAISSIndex:
 
         query = query_embedding.reshape(1, -1).astype(np.float32)
         k = min(top_k, self._index.ntotal)
-        scores, indices = self._index.search(query, k)
+        scores, ids = self._index.search(query, k)
+
+        return [
+            (int(label_id), float(score))
+            for score, label_id in zip(scores[0], ids[0])
+            if label_id >= 0
+        ]
 
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0 and idx < len(self._id_map):
-                results.append((self._id_map[idx], float(score)))
-        return results
+    def search_batch(self, queries: np.ndarray, top_k: int = 100) -> np.ndarray:
+        """Search many queries at once (BLAS-batched, ``QUERY_BATCH`` rows per call).
+
+        Returns an (n_queries, k) array of entity ids ordered by score desc,
+        padded with -1; int32 when every id fits, to keep it compact.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if self._index is None or self._index.ntotal == 0 or not len(queries):
+            return np.full((len(queries), 0), -1, dtype=np.int32)
+
+        k = min(top_k, self._index.ntotal)
+        ids = np.empty((len(queries), k), dtype=np.int64)
+        for start in range(0, len(queries), QUERY_BATCH):
+            _, ids[start:start + QUERY_BATCH] = self._index.search(
+                queries[start:start + QUERY_BATCH], k
+            )
+        if ids.size and ids.max() < np.iinfo(np.int32).max:
+            return ids.astype(np.int32)
+        return ids
 
     def save(self, name: str = "label_index") -> str:
-        """Persist the index to disk."""
+        """Persist the index, its label keys and metadata to disk."""
         import faiss
 
         if self._index is None:
             return ""
         os.makedirs(_FAISS_DIR, exist_ok=True)
         path = os.path.join(_FAISS_DIR, f"{name}.faiss")
-        faiss.write_index(self._index, path)
+        faiss.write_index(self._index, path + ".tmp")
 
-        ids_path = os.path.join(_FAISS_DIR, f"{name}_ids.npy")
-        np.save(ids_path, np.array(self._id_map))
+        ids = np.array(list(self._keys), dtype=np.int64)
+        keys_path = os.path.join(_FAISS_DIR, f"{name}_keys.npz")
+        with open(keys_path + ".tmp", "wb") as fh:
+            np.savez(fh, ids=ids, keys=np.array([self._keys[i] for i in ids.tolist()], dtype=str))
+
+        meta = {
+            "version": INDEX_VERSION,
+            "fingerprint": self.fingerprint,
+            "kind": self.kind,
+            "nprobe": self.nprobe,
+            "recall": self.recall,
+            "trained_size": self.trained_size,
+        }
+        meta_path = os.path.join(_FAISS_DIR, f"{name}_meta.json")
+        with open(meta_path + ".tmp", "w") as fh:
+            json.dump(meta, fh)
+        for target in (path, keys_path, meta_path):
+            os.replace(target + ".tmp", target)
         return path
 
-    def load(self, name: str = "label_index") -> bool:
-        """Load a persisted index from disk. Returns True if successful."""
+    @classmethod
+    def load(cls, name: str = "label_index") -> Optional["FAISSIndex"]:
+        """Load a persisted index, or None if missing, unreadable or outdated."""
         import faiss
 
         path = os.path.join(_FAISS_DIR, f"{name}.faiss")
-        ids_path = os.path.join(_FAISS_DIR, f"{name}_ids.npy")
-        if not os.path.exists(path) or not os.path.exists(ids_path):
-            return False
-
-        self._index = faiss.read_index(path)
-        self._id_map = np.load(ids_path).tolist()
-        self._dim = self._index.d
-        return True
+        keys_path = os.path.join(_FAISS_DIR, f"{name}_keys.npz")
+        meta_path = os.path.join(_FAISS_DIR, f"{name}_meta.json")
+        if not all(os.path.exists(p) for p in (path, keys_path, meta_path)):
+            return None
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            if meta.get("version") != INDEX_VERSION:
+                return None
+            index = cls()
+            index._index = faiss.read_index(path)
+            with np.load(keys_path, allow_pickle=False) as data:
+                index._keys = dict(zip(data["ids"].tolist(), data["keys"].tolist()))
+        except (OSError, ValueError, KeyError, RuntimeError):
+            return None
+        if index._index.ntotal != len(index._keys):
+            # Files from two different saves
+            return None
+        index._dim = index._index.d
+        index.fingerprint = meta["fingerprint"]
+        index.kind = meta["kind"]
+        index.nprobe = meta["nprobe"]
+        index.recall = meta["recall"]
+        index.trained_size = meta["trained_size"]
+        if index.kind == "ivf":
+            index._index.nprobe = index.nprobe
+        return index
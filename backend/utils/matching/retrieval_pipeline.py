@@ -30,7 +30,8 @@ class RetrievalPipeline:
     """Multi-stage candidate retrieval for product matching.
 
     Combines BM25 sparse retrieval with optional FAISS dense retrieval
-    and cross-encoder reranking.
+    and cross-encoder reranking. ``cache_entries`` are LabelCache entries or
+    the LabelCandidate rows of a CandidateStore (what run_matching_job uses).
     """
 
     def __init__(
@@ -45,6 +46,8 @@ class RetrievalPipeline:
         threshold_review: int = 70,
         bm25_top_k: int = 200,
         faiss_top_k: int = 200,
+        feature_cache=None,
+        candidate_matrix=None,
     ) -> None:
         self._cache_entries = cache_entries
         self._score_match = score_match_fn
@@ -56,12 +59,17 @@ class RetrievalPipeline:
         self._threshold_review = threshold_review
         self._bm25_top_k = bm25_top_k
         self._faiss_top_k = faiss_top_k
+        self._features = feature_cache
+        self._candidate_matrix = candidate_matrix
 
         self._id_to_entry = {e.id: e for e in cache_entries}
         self._bm25_blocker = None
         self._faiss_index = None
         self._product_embeddings: Dict[int, Any] = {}
-        self._label_embeddings: Dict[int, Any] = {}
+        # FAISS neighbours of every product, searched in one batch:
+        # row _faiss_rows[product_id] of _faiss_neighbours (-1 padded)
+        self._faiss_rows: Dict[int, int] = {}
+        self._faiss_neighbours = None
         self._stats = {
             "bm25_candidates_avg": 0.0,
             "faiss_candidates_avg": 0.0,
@@ -76,41 +84,100 @@ class RetrievalPipeline:
     def _init_bm25(self) -> None:
         from utils.matching.bm25_blocker import BM25Blocker
 
-        self._bm25_blocker = BM25Blocker(self._cache_entries)
+        self._bm25_blocker = BM25Blocker.persistent(self._cache_entries)
         current_app.logger.info(
-            "BM25 blocker initialized with %d entries", self._bm25_blocker.size
+            "BM25 blocker initialized with %d entries (%d indexed, %d removed)",
+            self._bm25_blocker.size,
+            self._bm25_blocker.added,
+            self._bm25_blocker.removed,
         )
 
     def _init_faiss(self) -> None:
         try:
-            from utils.matching.embedder import compute_label_embeddings
-            from utils.matching.faiss_index import FAISSIndex
-
-            self._label_embeddings = compute_label_embeddings(self._cache_entries)
-            self._faiss_index = FAISSIndex()
-            self._faiss_index.build(self._label_embeddings)
-            current_app.logger.info(
-                "FAISS index built with %d entries", self._faiss_index.size
+            from utils.matching.embedder import (
+                compute_label_embeddings,
+                label_text_keys,
+                model_fingerprint,
             )
+            from utils.matching.faiss_index import RECALL_K, FAISSIndex
+
+            fingerprint = model_fingerprint()
+            keys = label_text_keys(self._cache_entries)
+            index = FAISSIndex.load()
+            changed = True
+            if index is None or index.fingerprint != fingerprint or index.needs_rebuild():
+                # New embedding model (or index kind outgrown): full rebuild
+                index = FAISSIndex()
+                index.build(
+                    compute_label_embeddings(self._cache_entries), fingerprint, keys
+                )
+                current_app.logger.info(
+                    "FAISS %s index built with %d entries", index.kind, index.size
+                )
+            else:
+                added, removed = index.sync(
+                    keys,
+                    lambda ids: compute_label_embeddings(
+                        [self._id_to_entry[label_id] for label_id in ids]
+                    ),
+                )
+                changed = bool(added or removed)
+                current_app.logger.info(
+                    "FAISS %s index loaded with %d entries (%d added, %d removed)",
+                    index.kind, index.size, added, removed,
+                )
+            if index.recall is not None:
+                current_app.logger.info(
+                    "FAISS nprobe=%d, recall@%d=%.3f", index.nprobe, RECALL_K, index.recall
+                )
+            self._faiss_index = index
         except (ImportError, OSError) as exc:
             current_app.logger.warning(
                 "FAISS/sentence-transformers not available, skipping dense retrieval: %s", exc
             )
             self._faiss_index = None
+            return
+        if not changed:
+            return
+        try:
+            self._faiss_index.save()
+        except (OSError, RuntimeError) as exc:
+            current_app.logger.warning("Could not persist the FAISS index: %s", exc)
 
     def compute_product_embeddings(self, products: list) -> None:
         """Pre-compute embeddings for all products (call once before scoring)."""
         if self._faiss_index is None:
             return
         try:
-            from utils.matching.embedder import compute_product_embeddings
+            from utils.matching.embedder import (
+                compact_embedding_store,
+                compute_product_embeddings,
+            )
 
             self._product_embeddings = compute_product_embeddings(products)
             current_app.logger.info(
                 "Computed embeddings for %d products", len(self._product_embeddings)
             )
+            # Products of this run are now touched and the indexed labels are
+            # kept: drop the rest of the embedding cache once it is mostly stale
+            if compact_embedding_store(self._faiss_index.text_keys):
+                current_app.logger.info("Embedding cache compacted")
         except (ImportError, OSError):
-            pass
+            return
+        self._search_products()
+
+    def _search_products(self) -> None:
+        """Run the FAISS search of every product embedding in one batch."""
+        import numpy as np
+
+        if not self._product_embeddings:
+            return
+        product_ids = list(self._product_embeddings)
+        queries = np.vstack([self._product_embeddings[pid] for pid in product_ids])
+        self._faiss_neighbours = self._faiss_index.search_batch(
+            queries, top_k=self._faiss_top_k
+        )
+        self._faiss_rows = {pid: row for row, pid in enumerate(product_ids)}
 
     def get_candidates(self, product) -> List:
         """Retrieve candidates using BM25 + optional FAISS, then merge."""
@@ -124,10 +191,12 @@ class RetrievalPipeline:
             )
             bm25_candidates = {e.id for e in bm25_results}
 
-        # Stage 2: FAISS ANN search
-        if self._faiss_index and product.id in self._product_embeddings:
-            from utils.matching.faiss_index import FAISSIndex
-
+        # Stage 2: FAISS ANN search (looked up in the batch results)
+        row = self._faiss_rows.get(product.id)
+        if row is not None:
+            neighbours = self._faiss_neighbours[row]
+            faiss_candidates = set(neighbours[neighbours >= 0].tolist())
+        elif self._faiss_index and product.id in self._product_embeddings:
             query_emb = self._product_embeddings[product.id]
             faiss_results = self._faiss_index.search(
                 query_emb, top_k=self._faiss_top_k
@@ -148,37 +217,20 @@ class RetrievalPipeline:
         return [self._id_to_entry[lid] for lid in merged_ids if lid in self._id_to_entry]
 
     def score_product(
-        self, product, candidates: List
+        self, product, candidates: List, reasons: Optional[Dict[str, int]] = None
     ) -> Tuple[List[Tuple[int, Dict, Any]], Optional[Tuple[Dict, Any]]]:
         """Score candidates against a product, with optional cross-encoder reranking.
 
         Returns (scored, best_disqualified) where:
         - scored: list of (score, details, cache_entry) sorted by score desc
         - best_disqualified: (details, cache_entry) for the first disqualified candidate, or None
-        """
-        scored: List[Tuple[int, Dict, Any]] = []
-        best_disqualified: Optional[Tuple[Dict, Any]] = None
 
-        for cache_entry in candidates:
-            attrs = dict(cache_entry.extracted_attributes or {})
-            score, details = self._score_match(attrs, product, self._mappings)
-
-            # EAN bonus
-            if score > 0:
-                entry_eans = self._label_eans.get(
-                    (cache_entry.supplier_id, cache_entry.normalized_label), set()
-                )
-                if entry_eans:
-                    for ean in entry_eans:
-                        if product.id in self._ean_to_product_ids.get(ean, set()):
-                            details["ean_bonus"] = 20
-                            score = min(score + 20, 100)
-                            break
-
-            if score > 0:
-                scored.append((score, details, cache_entry))
-            elif best_disqualified is None and details.get("disqualified"):
-                best_disqualified = (details, cache_entry)
+        ``reasons``, if given, counts the disqualified candidates per reason.
+        """
+        if self._candidate_matrix is not None and self._features is not None:
+            scored, best_disqualified = self._score_batch(product, candidates, reasons)
+        else:
+            scored, best_disqualified = self._score_each(product, candidates, reasons)
 
         if not scored:
             return scored, best_disqualified
@@ -192,6 +244,72 @@ class RetrievalPipeline:
 
         return scored, best_disqualified
 
+    def _score_batch(self, product, candidates: List, reasons: Optional[Dict[str, int]] = None):
+        """Score all candidates in one score_matches_batch call."""
+        import numpy as np
+
+        from utils.llm_matching import score_matches_batch
+
+        matrix = self._candidate_matrix
+        rows = np.array(
+            [matrix.row_by_id[e.id] for e in candidates if e.id in matrix.row_by_id],
+            dtype=np.int64,
+        )
+        batch_scored, first_disqualified = score_matches_batch(
+            self._features.product(product), matrix, rows, reasons
+        )
+
+        scored: List[Tuple[int, Dict, Any]] = []
+        for score, details, row in batch_scored:
+            cache_entry = matrix.entries[row]
+            score = self._apply_ean_bonus(product, cache_entry, score, details)
+            scored.append((score, details, cache_entry))
+
+        best_disqualified: Optional[Tuple[Dict, Any]] = None
+        if first_disqualified is not None:
+            details, row = first_disqualified
+            best_disqualified = (details, matrix.entries[row])
+        return scored, best_disqualified
+
+    def _score_each(self, product, candidates: List, reasons: Optional[Dict[str, int]] = None):
+        """Score candidates one by one with the injected score_match function."""
+        scored: List[Tuple[int, Dict, Any]] = []
+        best_disqualified: Optional[Tuple[Dict, Any]] = None
+
+        product_features = (
+            self._features.product(product) if self._features is not None else product
+        )
+
+        for cache_entry in candidates:
+            if self._features is not None:
+                attrs = self._features.label(cache_entry)
+            else:
+                attrs = cache_entry.extracted_attributes or {}
+            score, details = self._score_match(attrs, product_features, self._mappings)
+            if score > 0:
+                score = self._apply_ean_bonus(product, cache_entry, score, details)
+
+            if score > 0:
+                scored.append((score, details, cache_entry))
+                continue
+            reason = details.get("disqualified")
+            if reason and reasons is not None:
+                reasons[reason] = reasons.get(reason, 0) + 1
+            if best_disqualified is None and reason:
+                best_disqualified = (details, cache_entry)
+        return scored, best_disqualified
+
+    def _apply_ean_bonus(self, product, cache_entry, score: int, details: Dict) -> int:
+        """Add the +20 EAN bonus when a catalog EAN of the label is known for the product."""
+        entry_eans = self._label_eans.get(
+            (cache_entry.supplier_id, cache_entry.normalized_label), set()
+        )
+        for ean in entry_eans:
+            if product.id in self._ean_to_product_ids.get(ean, set()):
+                details["ean_bonus"] = 20
+                return min(score + 20, 100)
+        return score
+
     def _apply_cross_encoder(
         self, product, scored: List[Tuple[int, Dict, Any]]
     ) -> List[Tuple[int, Dict, Any]]:
@@ -273,39 +273,24 @@ def _run_matching_step() -> Dict[str, Any]:
     - Existing matches (auto-matched, pending, rejected) are preserved.
     - Phase 1 marks every label still present in the supplier catalog (last_seen_run_id).
     - Labels no longer in the catalog are cleaned up (product_id reset, PendingMatch deleted).
-    - Phase 2 only scores products not yet matched/pending against the candidate pool.
+    - Phase 2 only scores products not yet matched against the labels whose
+      features changed since the product was last scored (scoring ledger).
     - Result: only genuinely new supplier labels trigger scoring work.
 
-    Weekly full rescore (Sunday): all auto-matched and pending/rejected results are
-    reset so Phase 2 re-evaluates the entire product catalog from scratch. Manual
-    validations (status='validated'/'created') are preserved.
+    Weekly full rescore (Sunday): the Phase 2 scoring ledger is emptied, so
+    every unmatched product is scored again against every candidate label
+    (weekdays only score the product x label pairs whose features changed,
+    see utils/scoring_ledger.py). Existing matches are kept.
     """
-    from models import LabelCache, PendingMatch, db
-    from utils import llm_matching
+    from models import PendingMatch, db
+    from utils import llm_matching, scoring_ledger
 
     is_sunday = datetime.now(timezone.utc).weekday() == 6  # 0=Monday, 6=Sunday
 
     if is_sunday:
-        # Reset auto-matched LabelCache entries (preserve manual validations via SupplierProductRef)
-        reset_count = LabelCache.query.filter(
-            LabelCache.product_id.isnot(None),
-            LabelCache.match_source.in_(["auto", "attr_share"]),
-        ).update(
-            {"product_id": None, "match_score": None, "match_reasoning": None,
-             "match_source": "extracted"},
-            synchronize_session="fetch",
-        )
-
-        # Delete pending/rejected PendingMatches (manual validations are preserved)
-        deleted_pm = PendingMatch.query.filter(
-            PendingMatch.status.in_(["pending", "rejected"])
-        ).delete(synchronize_session="fetch")
-
+        dropped = scoring_ledger.invalidate()
         db.session.flush()
-        logger.info(
-            "Sunday full rescore: %d LabelCache matches reset, %d PendingMatches deleted",
-            reset_count, deleted_pm,
-        )
+        logger.info("Sunday full rescore: scoring ledger cleared (%d scored pairs)", dropped)
 
     # Build validation history from previously validated PendingMatches.
     # Key = (source_label, supplier_id), value = resolved_product_id.
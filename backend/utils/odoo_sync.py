@@ -8,11 +8,11 @@ import xmlrpc.client
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+from utils import reference_data
 from utils.normalize import normalize_description_units, normalize_ram, normalize_storage
 from models import (
     Brand,
     Color,
-    ColorTranslation,
     DeviceType,
     InternalProduct,
     MemoryOption,
@@ -167,15 +167,6 @@ class OdooClient:
 # ---------------------------------------------------------------------------
 # Reference lookup helpers
 # ---------------------------------------------------------------------------
-def _build_lookup(model_cls, attr: str) -> Dict[str, int]:
-    """Build a {lowercase_value: id} dict for a reference table."""
-    return {
-        getattr(row, attr).lower(): row.id
-        for row in model_cls.query.all()
-        if getattr(row, attr, None)
-    }
-
-
 def _find_or_create(
     model_cls, attr: str, value: str, lookup: Dict[str, int], **extra_kwargs
 ) -> int:
@@ -669,17 +660,18 @@ def run_odoo_sync(job_id: int) -> None:
                     attr_values_cache[av["id"]] = av
                 av_offset += len(batch_ids)
 
-        # Pre-load reference lookups
-        brand_lookup = _build_lookup(Brand, "brand")
-        color_lookup = _build_lookup(Color, "color")
-        memory_lookup = _build_lookup(MemoryOption, "memory")
-        ram_lookup = _build_lookup(RAMOption, "ram")
-        norme_lookup = _build_lookup(NormeOption, "norme")
-        type_lookup = _build_lookup(DeviceType, "type")
+        # Pre-load reference lookups (fresh dicts: _find_or_create extends them)
+        refs = reference_data.get_snapshot()
+        brand_lookup = refs.lookup("brands")
+        color_lookup = refs.lookup("colors")
+        memory_lookup = refs.lookup("memory_options")
+        ram_lookup = refs.lookup("ram_options")
+        norme_lookup = refs.lookup("norme_options")
+        type_lookup = refs.lookup("device_types")
         color_translation_lookup: Dict[str, int] = {
-            t.color_source.lower(): t.color_target_id
-            for t in ColorTranslation.query.all()
-            if t.color_source
+            t.source.lower(): t.target_id
+            for t in refs.color_translations
+            if t.source
         }
 
         # Pre-load internal products and product lookups
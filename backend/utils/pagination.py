@@ -0,0 +1,225 @@
+"""Pagination of supplier API endpoints (``ApiEndpoint.pagination_type``).
+
+``iter_pages`` requests the pages of an endpoint one at a time and yields
+each one as soon as it is received, so the ETL can parse and persist a
+page before fetching the next instead of holding the whole catalogue in
+memory. Options come from ``ApiEndpoint.pagination_config`` (all optional):
+
+- ``page``: ``page_param`` ("page"), ``start_page`` (1), ``size_param`` and
+  ``page_size`` (sent when both are set);
+- ``offset``: ``offset_param`` ("offset"), ``limit_param`` ("limit"),
+  ``limit`` (100), ``start`` (0);
+- ``cursor``: ``cursor_param`` ("cursor"), ``cursor_path`` (JMESPath of the
+  next cursor in the response, "next_cursor");
+- ``link``: the ``Link: <...>; rel="next"`` header, or ``next_path`` (JMESPath
+  of the next URL in the response);
+- every mode: ``max_pages`` (1000) and ``in`` ("query", or "body" to send
+  the page parameters in the request body).
+
+Iteration stops on an empty page, on a page shorter than the page size
+(when known), when there is no next cursor/link, or after ``max_pages``.
+
+In ``page`` and ``offset`` modes the parameters of the next pages are known
+in advance, so with ``concurrency`` > 1 up to that many requests are kept in
+flight (``concurrency`` option, or the caller's default). Pages are still
+yielded in order; the requests already sent past the last page are wasted.
+Offsets then advance by ``limit`` rather than by the items received.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+import jmespath
+import requests
+
+from models import PaginationType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 1000
+
+# fetch(url, query, body): url is None for the endpoint URL itself
+FetchFn = Callable[[Optional[str], Dict[str, Any], Dict[str, Any]], requests.Response]
+
+
+class Page(NamedTuple):
+    index: int
+    response: requests.Response
+    payload: Any
+    items: List[Dict[str, Any]]
+    # Page number, offset, cursor or URL the page was requested with
+    cursor: Optional[str]
+
+
+def _coerce_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _next_link(response: requests.Response, payload: Any, next_path: Optional[str]) -> Optional[str]:
+    if next_path:
+        url = jmespath.search(next_path, payload)
+    else:
+        url = (response.links or {}).get("next", {}).get("url")
+    if not url or not isinstance(url, str):
+        return None
+    return urljoin(response.url or "", url)
+
+
+def iter_pages(
+    pagination_type: Optional[PaginationType],
+    config: Optional[Dict[str, Any]],
+    fetch: FetchFn,
+    query: Dict[str, Any],
+    body: Dict[str, Any],
+    extract_items: Callable[[Any], List[Dict[str, Any]]],
+    concurrency: int = 1,
+) -> Iterator[Page]:
+    """Yield the pages of an endpoint (see module docstring).
+
+    ``fetch`` is called from worker threads when pages are prefetched.
+    """
+    config = dict(config or {})
+    mode = pagination_type or PaginationType.NONE
+    max_pages = max(_coerce_int(config.get("max_pages"), DEFAULT_MAX_PAGES), 1)
+    in_body = config.get("in") == "body"
+    concurrency = max(_coerce_int(config.get("concurrency"), concurrency), 1)
+
+    page_size: Optional[int] = None
+    params: Dict[str, Any] = {}
+    if mode == PaginationType.PAGE:
+        number = _coerce_int(config.get("start_page"), 1)
+        page_param = config.get("page_param") or "page"
+        params[page_param] = number
+        if config.get("size_param") and config.get("page_size"):
+            page_size = _coerce_int(config.get("page_size"), 0) or None
+            params[config["size_param"]] = page_size
+    elif mode == PaginationType.OFFSET_LIMIT:
+        offset = _coerce_int(config.get("start"), 0)
+        offset_param = config.get("offset_param") or "offset"
+        page_size = max(_coerce_int(config.get("limit"), 100), 1)
+        params[offset_param] = offset
+        params[config.get("limit_param") or "limit"] = page_size
+    cursor_param = config.get("cursor_param") or "cursor"
+    cursor_path = config.get("cursor_path") or "next_cursor"
+
+    def request(page_params: Dict[str, Any], url: Optional[str] = None) -> Tuple[Any, Any]:
+        if url is not None:
+            # The next link carries its own query string
+            response = fetch(url, {}, body)
+        elif in_body:
+            response = fetch(None, query, {**body, **page_params})
+        else:
+            response = fetch(None, {**query, **page_params}, body)
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            raise RuntimeError("Réponse JSON invalide reçue depuis l'API fournisseur") from exc
+        return response, payload
+
+    def is_last(index: int, items: List[Dict[str, Any]], response: Any) -> bool:
+        if mode == PaginationType.NONE or not items:
+            return True
+        if page_size and len(items) < page_size:
+            return True
+        if index + 1 >= max_pages:
+            logger.warning(
+                "Pagination stopped after max_pages=%d pages (%s)", max_pages, response.url
+            )
+            return True
+        return False
+
+    if concurrency > 1 and mode in (PaginationType.PAGE, PaginationType.OFFSET_LIMIT):
+        key = page_param if mode == PaginationType.PAGE else offset_param
+        step = 1 if mode == PaginationType.PAGE else page_size
+
+        def page_params(index: int) -> Dict[str, Any]:
+            return {**params, key: params[key] + index * step}
+
+        yield from _iter_prefetched(
+            request, page_params, key, extract_items, is_last, concurrency, max_pages
+        )
+        return
+
+    url: Optional[str] = None
+    cursor: Optional[str] = None
+    seen_links = set()
+    index = 0
+    while True:
+        response, payload = request(params, url)
+        items = extract_items(payload)
+
+        if mode == PaginationType.PAGE:
+            cursor = str(params[page_param])
+        elif mode == PaginationType.OFFSET_LIMIT:
+            cursor = str(params[offset_param])
+        elif mode == PaginationType.LINK_HEADER:
+            cursor = url
+            seen_links.add(url or response.url)
+        yield Page(index, response, payload, items, cursor)
+
+        if is_last(index, items, response):
+            return
+        index += 1
+
+        if mode == PaginationType.PAGE:
+            params[page_param] += 1
+        elif mode == PaginationType.OFFSET_LIMIT:
+            params[offset_param] += len(items)
+        elif mode == PaginationType.CURSOR:
+            next_cursor = jmespath.search(cursor_path, payload)
+            if next_cursor in (None, "") or str(next_cursor) == cursor:
+                return
+            cursor = str(next_cursor)
+            params[cursor_param] = next_cursor
+        elif mode == PaginationType.LINK_HEADER:
+            url = _next_link(response, payload, config.get("next_path"))
+            if url is None or url in seen_links:
+                return
+
+
+def _iter_prefetched(
+    request: Callable[[Dict[str, Any]], Tuple[Any, Any]],
+    page_params: Callable[[int], Dict[str, Any]],
+    key: str,
+    extract_items: Callable[[Any], List[Dict[str, Any]]],
+    is_last: Callable[[int, List[Dict[str, Any]], Any], bool],
+    concurrency: int,
+    max_pages: int,
+) -> Iterator[Page]:
+    """Keep ``concurrency`` page requests in flight, yielding pages in order."""
+    in_flight: deque = deque()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="etl-fetch"
+    ) as executor:
+        submitted = 0
+
+        def submit_next() -> None:
+            nonlocal submitted
+            if submitted < max_pages:
+                sent = page_params(submitted)
+                in_flight.append((submitted, sent, executor.submit(request, sent)))
+                submitted += 1
+
+        try:
+            for _ in range(concurrency):
+                submit_next()
+            while in_flight:
+                index, sent, future = in_flight.popleft()
+                response, payload = future.result()
+                items = extract_items(payload)
+                yield Page(index, response, payload, items, str(sent[key]))
+                if is_last(index, items, response):
+                    return
+                submit_next()
+        finally:
+            # Last page reached (or consumer stopped): drop requests not started yet
+            for _, _, future in in_flight:
+                future.cancel()
@@ -0,0 +1,75 @@
+"""Thread-safe token bucket used to respect external API rate limits.
+
+Shared by the callers that fan requests out over several threads
+(LLM extraction batches) so the aggregate request rate stays under the
+provider's per-minute limit whatever the concurrency.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate_per_min`` tokens per minute.
+
+    ``capacity`` is the largest burst allowed after an idle period
+    (default 1: requests are evenly spaced). A rate <= 0 disables limiting.
+    """
+
+    def __init__(
+        self,
+        rate_per_min: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate_per_sec = max(float(rate_per_min or 0), 0.0) / 60.0
+        self.capacity = max(float(capacity or 1), 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_sec > 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_sec)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` if available right now, without waiting."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available and take them.
+
+        Returns the number of seconds spent waiting.
+        """
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate_per_sec
+            self._sleep(delay)
+            waited += delay
@@ -0,0 +1,169 @@
+"""Process-wide snapshot of the reference tables.
+
+Brands, colors, color translations, memory/RAM/norme options, device types
+and model references are read on every matching run, calculation and sync.
+They change rarely, so each process keeps one immutable snapshot and reloads
+it only when the ``reference_data_version`` counter moved.
+
+The counter is bumped in the same transaction as any ORM write to a
+reference table (``after_flush`` listener): the ``routes/references`` write
+endpoints, Odoo sync, product creation from LLM extractions, ... Every
+gunicorn worker therefore sees changes made by the others on its next
+``get_snapshot()``. Bulk ``Query.update()/delete()`` on these tables bypass
+the listener and must call ``bump_version()`` themselves.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import (
+    Brand,
+    Color,
+    ColorTranslation,
+    DeviceType,
+    MemoryOption,
+    ModelReference,
+    NormeOption,
+    RAMOption,
+    ReferenceDataVersion,
+    db,
+)
+
+REFERENCE_MODELS = (
+    Brand,
+    Color,
+    ColorTranslation,
+    DeviceType,
+    MemoryOption,
+    ModelReference,
+    NormeOption,
+    RAMOption,
+)
+
+
+class Option(NamedTuple):
+    id: int
+    value: str
+
+
+class Translation(NamedTuple):
+    source: str
+    target: str
+    target_id: int
+
+
+class ModelRef(NamedTuple):
+    manufacturer_code: str
+    commercial_name: str
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Reference rows at one version, in table order. Never mutate."""
+
+    version: int
+    brands: Tuple[Option, ...]
+    colors: Tuple[Option, ...]
+    color_translations: Tuple[Translation, ...]
+    memory_options: Tuple[Option, ...]
+    ram_options: Tuple[Option, ...]
+    norme_options: Tuple[Option, ...]
+    device_types: Tuple[Option, ...]
+    model_references: Tuple[ModelRef, ...]
+
+    def lookup(self, table: str) -> Dict[str, int]:
+        """Fresh {lowercase value: id} dict for one option table."""
+        return {
+            option.value.lower(): option.id
+            for option in getattr(self, table)
+            if option.value
+        }
+
+
+_snapshot: Optional[ReferenceSnapshot] = None
+_lock = threading.Lock()
+
+
+def current_version() -> int:
+    """Reference data version as stored in the database (0 if never bumped)."""
+    version = (
+        db.session.query(ReferenceDataVersion.version)
+        .filter(ReferenceDataVersion.id == 1)
+        .scalar()
+    )
+    return version or 0
+
+
+def _load(version: int) -> ReferenceSnapshot:
+    return ReferenceSnapshot(
+        version=version,
+        brands=tuple(Option(b.id, b.brand) for b in Brand.query.all()),
+        colors=tuple(Option(c.id, c.color) for c in Color.query.all()),
+        color_translations=tuple(
+            Translation(t.color_source, t.color_target, t.color_target_id)
+            for t in ColorTranslation.query.all()
+        ),
+        memory_options=tuple(Option(m.id, m.memory) for m in MemoryOption.query.all()),
+        ram_options=tuple(Option(r.id, r.ram) for r in RAMOption.query.all()),
+        norme_options=tuple(Option(n.id, n.norme) for n in NormeOption.query.all()),
+        device_types=tuple(Option(d.id, d.type) for d in DeviceType.query.all()),
+        model_references=tuple(
+            ModelRef(r.manufacturer_code, r.commercial_name)
+            for r in ModelReference.query.all()
+        ),
+    )
+
+
+def get_snapshot() -> ReferenceSnapshot:
+    """Return the reference snapshot, reloading it if the version changed."""
+    global _snapshot
+    version = current_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _load(version)
+        return _snapshot
+
+
+def invalidate() -> None:
+    """Drop this process's snapshot (the next get_snapshot() reloads)."""
+    global _snapshot
+    _snapshot = None
+
+
+def bump_version(connection=None) -> None:
+    """Increment the version counter in the current transaction."""
+    connection = connection if connection is not None else db.session.connection()
+    table = ReferenceDataVersion.__table__
+    now = datetime.now(timezone.utc)
+    result = connection.execute(
+        table.update()
+        .where(table.c.id == 1)
+        .values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(id=1, version=1, updated_at=now))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_reference_write(session, flush_context) -> None:
+    changed = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(obj, REFERENCE_MODELS) for obj in changed):
+        bump_version(session.connection())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_on_rollback(session, previous_transaction) -> None:
+    # A snapshot read inside the rolled back transaction may contain writes
+    # that never happened under a version number that will be reused.
+    invalidate()
@@ -0,0 +1,125 @@
+"""Per-phase instrumentation of a matching run (stored in MatchingRun.profile).
+
+``RunProfiler.phase(name)`` measures wall time, CPU time of the job thread
+and the number of SQL statements it issued. Phases may nest and may be
+entered many times (their figures add up); each phase reports its
+*exclusive* figures, nested phases being subtracted from their parent, so
+the phases of a run add up to its total. ``timed`` does the same for the
+time spent pulling items out of an iterator (lazy scoring generators).
+
+Counters and histograms record sizes (labels, pairs scored, ...) and
+outcome distributions (disqualifier reasons).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from sqlalchemy import event
+
+PROFILE_VERSION = 1
+
+T = TypeVar("T")
+
+
+class RunProfiler:
+    """Collects the profile of one run. ``close()`` detaches the SQL listener."""
+
+    def __init__(self, engine: Any = None) -> None:
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Dict[str, int]] = {}
+        self.queries = 0
+        self._thread = threading.get_ident()
+        # [name, wall start, cpu start, queries start, child wall, child cpu, child queries]
+        self._stack: List[List[Any]] = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._engine = engine
+        if engine is not None:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: Any) -> None:
+        # Only statements of the job thread (not concurrent web requests)
+        if threading.get_ident() == self._thread:
+            self.queries += 1
+
+    def close(self) -> None:
+        if self._engine is not None:
+            event.remove(self._engine, "before_cursor_execute", self._on_execute)
+            self._engine = None
+
+    def _enter(self, name: str) -> None:
+        self._stack.append(
+            [name, time.perf_counter(), time.thread_time(), self.queries, 0.0, 0.0, 0]
+        )
+
+    def _exit(self) -> None:
+        name, wall, cpu, queries, child_wall, child_cpu, child_queries = self._stack.pop()
+        wall = time.perf_counter() - wall
+        cpu = time.thread_time() - cpu
+        queries = self.queries - queries
+        stats = self.phases.setdefault(
+            name, {"wall_s": 0.0, "cpu_s": 0.0, "queries": 0, "calls": 0}
+        )
+        stats["wall_s"] += wall - child_wall
+        stats["cpu_s"] += cpu - child_cpu
+        stats["queries"] += queries - child_queries
+        stats["calls"] += 1
+        if self._stack:
+            parent = self._stack[-1]
+            parent[4] += wall
+            parent[5] += cpu
+            parent[6] += queries
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from ``items``, charging the time spent in ``next()`` to ``name``."""
+        iterator = iter(items)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def observe(self, histogram: str, key: Optional[str], count: int = 1) -> None:
+        bucket = self.histograms.setdefault(histogram, {})
+        key = key or "unknown"
+        bucket[key] = bucket.get(key, 0) + int(count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable profile (times in seconds, rounded to 0.1 ms)."""
+        return {
+            "version": PROFILE_VERSION,
+            "wall_s": round(time.perf_counter() - self._wall_start, 4),
+            "cpu_s": round(time.thread_time() - self._cpu_start, 4),
+            "queries": self.queries,
+            "phases": {
+                name: {
+                    "wall_s": round(stats["wall_s"], 4),
+                    "cpu_s": round(stats["cpu_s"], 4),
+                    "queries": int(stats["queries"]),
+                    "calls": int(stats["calls"]),
+                }
+                for name, stats in self.phases.items()
+            },
+            "counters": dict(self.counters),
+            "histograms": {name: dict(bucket) for name, bucket in self.histograms.items()},
+        }
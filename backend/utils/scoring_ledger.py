@@ -0,0 +1,273 @@
+"""Phase 2 scoring ledger: incremental product x label scoring.
+
+Each full (unscoped, V1) matching run records, per product and per label,
+a hash of the scoring features (``scoring_states``), and the raw score of
+the pairs that can drive an outcome (``scored_pairs``): the
+``SCORING_LEDGER_TOP_PAIRS`` best pairs of each product plus its first
+disqualified pair. Only the winning and the disqualified pair keep their
+score details. The next run only scores a product against the labels whose
+features changed since that product was last scored (and the labels that
+may earn it the EAN bonus), and reuses the stored scores for the others.
+A product whose own features changed is scored against every candidate
+again.
+
+When a product has more positive pairs than it keeps, the pairs not kept
+are only known to rank below the kept ones. That holds as long as every
+kept pair is unchanged: if one of them changes or leaves the pool, the
+product is scored against every candidate again.
+
+Hashes include ``SCORING_VERSION``: bump it whenever ``_score_features`` or
+the feature derivation changes so every pair is scored again. Reference
+data (color translations, color words) is covered because it feeds the
+features themselves. ``invalidate()`` empties the ledger.
+
+Labels leaving the candidate pool (matched, deleted) lose their state and
+pairs, so a label coming back is scored again like a new one.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import ScoredPair, ScoringState, db
+from utils import db_bulk
+
+SCORING_VERSION = "1"
+
+_CHUNK = 500
+
+# (score, details, candidate row): same layout as score_matches_batch
+# results; details is None for the pairs stored without them
+ScoredRow = Tuple[int, Optional[Dict[str, Any]], int]
+
+
+def _get_env_int(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def features_hash(features: Any) -> str:
+    """Stable SHA-1 of a ProductFeatures / LabelFeatures and SCORING_VERSION."""
+    values = []
+    for field in dataclasses.fields(features):
+        value = getattr(features, field.name)
+        if isinstance(value, frozenset):
+            value = sorted(value)
+        values.append(value)
+    payload = json.dumps(
+        [SCORING_VERSION, type(features).__name__, values], default=str, ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def pair_hash(product_hash: str, label_hash: str) -> str:
+    return hashlib.sha1(f"{product_hash}:{label_hash}".encode("ascii")).hexdigest()
+
+
+def _chunks(values: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(values), _CHUNK):
+        yield values[start:start + _CHUNK]
+
+
+def invalidate() -> int:
+    """Drop every stored score and state (next run scores every pair)."""
+    removed = ScoredPair.query.delete(synchronize_session=False)
+    ScoringState.query.delete(synchronize_session=False)
+    return removed
+
+
+class ScoringLedger:
+    """Ledger view for one run over the current candidate pool.
+
+    ``label_ids`` / ``label_hashes`` describe the candidate rows (row ``i``
+    of the CandidateMatrix). ``label_runs[i]`` is the run in which the
+    features of row ``i`` last changed (this run for new or changed labels).
+    ``top_pairs`` (SCORING_LEDGER_TOP_PAIRS, 20) positive pairs are kept per
+    product. Writes are buffered until ``flush``.
+    """
+
+    def __init__(
+        self,
+        run_id: int,
+        label_ids: Sequence[int],
+        label_hashes: Sequence[str],
+        top_pairs: Optional[int] = None,
+    ) -> None:
+        self.run_id = run_id
+        self.top_pairs = max(
+            top_pairs if top_pairs is not None
+            else _get_env_int("SCORING_LEDGER_TOP_PAIRS", 20),
+            1,
+        )
+        self.label_ids = list(label_ids)
+        self.label_hashes = list(label_hashes)
+        self.row_by_label = {label_id: row for row, label_id in enumerate(self.label_ids)}
+        self.label_runs = np.empty(len(self.label_ids), dtype=np.int64)
+        self.changed_labels = 0
+
+        states = {
+            entity_id: (feature_hash, run)
+            for entity_id, feature_hash, run in db.session.query(
+                ScoringState.entity_id, ScoringState.feature_hash, ScoringState.run_id
+            ).filter(ScoringState.entity == "label")
+        }
+        self._label_states: List[Dict[str, Any]] = []
+        for row, (label_id, digest) in enumerate(zip(self.label_ids, self.label_hashes)):
+            state = states.pop(label_id, None)
+            if state is not None and state[0] == digest:
+                self.label_runs[row] = state[1]
+            else:
+                self.label_runs[row] = run_id
+                self.changed_labels += 1
+                self._label_states.append(self._state_row("label", label_id, digest))
+        # Labels that left the pool since the previous run
+        self._gone_labels = list(states)
+
+        self._product_states: Dict[int, Tuple[str, int]] = {}
+        self._pairs: Dict[int, List[Tuple[int, int, int, Optional[Dict[str, Any]], str]]] = {}
+        self._pair_deletes: List[int] = []
+        self._pair_rows: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._product_rows: List[Dict[str, Any]] = []
+
+    def _state_row(self, entity: str, entity_id: int, digest: str) -> Dict[str, Any]:
+        return {"entity": entity, "entity_id": entity_id, "feature_hash": digest, "run_id": self.run_id}
+
+    def _product_state_hash(self, product_hash: str) -> str:
+        # Pairs kept under another top_pairs cannot be read the same way
+        return hashlib.sha1(f"{product_hash}:{self.top_pairs}".encode("ascii")).hexdigest()
+
+    def load_products(self, product_ids: Iterable[int]) -> None:
+        """Load the states and stored pairs of the products about to be scored."""
+        product_ids = list(product_ids)
+        for chunk in _chunks(product_ids):
+            for entity_id, digest, run in db.session.query(
+                ScoringState.entity_id, ScoringState.feature_hash, ScoringState.run_id
+            ).filter(ScoringState.entity == "product", ScoringState.entity_id.in_(chunk)):
+                self._product_states[entity_id] = (digest, run)
+            for pair in db.session.query(
+                ScoredPair.id, ScoredPair.product_id, ScoredPair.label_cache_id,
+                ScoredPair.score, ScoredPair.details, ScoredPair.feature_hash,
+            ).filter(ScoredPair.product_id.in_(chunk)):
+                pair_id, product_id, label_id, score, details, digest = pair
+                self._pairs.setdefault(product_id, []).append(
+                    (pair_id, label_id, score, details, digest)
+                )
+
+    def plan(self, product_id: int, product_hash: str) -> Tuple[int, List[ScoredRow]]:
+        """Return (since, stored) for a product.
+
+        Rows whose ``label_runs`` is above ``since`` must be scored; the
+        others are covered by ``stored``. ``since`` is -1 when every row
+        must be scored (product new or changed, lost disqualified pair, or
+        a changed pair among a truncated top list).
+        """
+        state = self._product_states.get(product_id)
+        if state is None or state[0] != self._product_state_hash(product_hash):
+            return -1, []
+        since = state[1]
+        pairs = self._pairs.get(product_id, ())
+        # A full top list hides lower pairs that are only bounded by it
+        truncated = sum(1 for pair in pairs if pair[2] > 0) >= self.top_pairs
+        stored: List[ScoredRow] = []
+        for _, label_id, score, details, digest in pairs:
+            row = self.row_by_label.get(label_id)
+            valid = row is not None and digest == pair_hash(product_hash, self.label_hashes[row])
+            if not valid:
+                if score == 0 or truncated:
+                    # Its disqualified pair (or a bounding pair) is gone:
+                    # others may exist unrecorded
+                    return -1, []
+                continue
+            if self.label_runs[row] <= since:
+                stored.append((score, details, row))
+        return since, stored
+
+    def record(
+        self,
+        product_id: int,
+        product_hash: str,
+        ranked: Sequence[Tuple[int, int]],
+        top: Optional[ScoredRow],
+        disqualified: Optional[Tuple[Dict[str, Any], int]],
+    ) -> None:
+        """Buffer the ledger update of a scored product.
+
+        ``ranked`` holds the (raw score, row) of its best pairs, ``top`` and
+        ``disqualified`` the winning (score, details, row) and the kept
+        (details, row) disqualified pair, as returned by score_product_v1.
+        Pairs already stored unchanged are not written again.
+        """
+        keep: Dict[int, Tuple[int, Optional[Dict[str, Any]]]] = {}
+        top_row = top[2] if top is not None else None
+        for score, row in ranked[:self.top_pairs]:
+            details = None
+            if row == top_row:
+                # Raw details: the EAN bonus is applied again on each run
+                details = {key: value for key, value in top[1].items() if key != "ean_bonus"}
+            keep[row] = (score, details)
+        if disqualified is not None:
+            keep[disqualified[1]] = (0, disqualified[0])
+
+        previous = {
+            label_id: (pair_id, score, details is not None, digest)
+            for pair_id, label_id, score, details, digest in self._pairs.pop(product_id, ())
+        }
+        kept_labels = set()
+        for row, (score, details) in keep.items():
+            label_id = self.label_ids[row]
+            kept_labels.add(label_id)
+            digest = pair_hash(product_hash, self.label_hashes[row])
+            if previous.get(label_id, (None,))[1:] == (score, details is not None, digest):
+                continue
+            self._pair_rows[(product_id, label_id)] = {
+                "product_id": product_id,
+                "label_cache_id": label_id,
+                "feature_hash": digest,
+                "score": score,
+                "details": details,
+            }
+        self._pair_deletes.extend(
+            pair_id for label_id, (pair_id, *_) in previous.items() if label_id not in kept_labels
+        )
+        self._product_rows.append(
+            self._state_row("product", product_id, self._product_state_hash(product_hash))
+        )
+
+    def flush(self) -> None:
+        """Write the buffered changes in the current transaction."""
+        db_bulk.delete_ids(ScoredPair, self._pair_deletes)
+        if self._gone_labels:
+            for chunk in _chunks(self._gone_labels):
+                ScoredPair.query.filter(ScoredPair.label_cache_id.in_(chunk)).delete(
+                    synchronize_session=False
+                )
+                ScoringState.query.filter(
+                    ScoringState.entity == "label", ScoringState.entity_id.in_(chunk)
+                ).delete(synchronize_session=False)
+        db_bulk.upsert(
+            ScoredPair,
+            list(self._pair_rows.values()),
+            conflict_columns=("product_id", "label_cache_id"),
+            constraint="uix_scored_pair",
+            update_columns=("feature_hash", "score", "details"),
+        )
+        db_bulk.upsert(
+            ScoringState,
+            self._label_states + self._product_rows,
+            conflict_columns=("entity", "entity_id"),
+            constraint="uix_scoring_state",
+            update_columns=("feature_hash", "run_id"),
+        )
+        self._gone_labels = []
+        self._label_states = []
+        self._pair_deletes = []
+        self._pair_rows = {}
+        self._product_rows = []
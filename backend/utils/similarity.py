@@ -0,0 +1,262 @@
+"""String similarity engine for label and model matching.
+
+Ratios are Ratcliff/Obershelp similarities, identical to
+``difflib.SequenceMatcher(None, a, b).ratio()``. Two interchangeable
+backends are available:
+
+- ``cydifflib``: C implementation of difflib, used when installed
+- ``difflib``: standard library, pure-Python fallback
+
+``extract_best`` ranks many choices against one query and skips most of
+them using difflib's cheap upper bounds (``real_quick_ratio`` /
+``quick_ratio``) before computing the exact ratio. ``QGramIndex`` adds a
+trigram inverted index that prunes choices before any ratio is computed.
+"""
+
+from __future__ import annotations
+
+import difflib
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import cydifflib
+except ImportError:  # pragma: no cover - optional C backend
+    cydifflib = None
+
+_BACKENDS: Dict[str, type] = {"difflib": difflib.SequenceMatcher}
+if cydifflib is not None:
+    _BACKENDS["cydifflib"] = cydifflib.SequenceMatcher
+
+_backend_name = "cydifflib" if "cydifflib" in _BACKENDS else "difflib"
+_SequenceMatcher = _BACKENDS[_backend_name]
+
+
+def available_backends() -> List[str]:
+    """Return the names of the backends that can be selected."""
+    return sorted(_BACKENDS)
+
+
+def get_backend() -> str:
+    """Return the name of the active backend."""
+    return _backend_name
+
+
+def set_backend(name: str) -> None:
+    """Select the similarity backend ("cydifflib" or "difflib")."""
+    global _backend_name, _SequenceMatcher
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown or unavailable similarity backend: {name}")
+    _backend_name = name
+    _SequenceMatcher = _BACKENDS[name]
+
+
+def ratio(a: str, b: str) -> float:
+    """Return the similarity ratio between two strings (0.0 to 1.0)."""
+    return _SequenceMatcher(None, a, b).ratio()
+
+
+def extract_best(
+    query: str,
+    choices: Sequence[str],
+    limit: int = 1,
+    score_cutoff: float = 0.0,
+) -> List[Tuple[int, float]]:
+    """Return the ``limit`` choices most similar to ``query``.
+
+    Each result is (index into ``choices``, ratio), sorted by ratio
+    descending; equal ratios keep the order of ``choices``. Only choices
+    with ratio >= ``score_cutoff`` are returned. Ratios are computed as
+    ``ratio(query, choice)``, so results match an exhaustive scan.
+    """
+    if limit <= 0 or not choices:
+        return []
+    matcher = _SequenceMatcher(None, query, "")
+    heap: List[Tuple[float, int]] = []  # min-heap of (ratio, -index)
+    for index, choice in enumerate(choices):
+        matcher.set_seq2(choice)
+        _consider(heap, matcher, index, limit, score_cutoff)
+    return _sorted(heap)
+
+
+class ChoiceMatcher:
+    """Reusable matcher for one fixed set of choices.
+
+    Keeps one SequenceMatcher per choice with the choice as second sequence,
+    so difflib's per-sequence index is built once and reused for every
+    query instead of being rebuilt on each comparison.
+    """
+
+    def __init__(self, choices: Iterable[str]) -> None:
+        self.choices: List[str] = list(choices)
+        self._matchers: List[Optional[object]] = [None] * len(self.choices)
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
+    def _matcher(self, index: int):
+        matcher = self._matchers[index]
+        if matcher is None:
+            matcher = _SequenceMatcher(None, "", self.choices[index])
+            self._matchers[index] = matcher
+        return matcher
+
+    def extract_best(
+        self,
+        query: str,
+        limit: int = 1,
+        score_cutoff: float = 0.0,
+        indices: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Same contract as the module-level extract_best.
+
+        ``indices`` restricts the scan to a subset of choices (in the given
+        order), e.g. the candidates returned by a pre-filter.
+        """
+        if limit <= 0 or not self.choices:
+            return []
+        if indices is None:
+            indices = range(len(self.choices))
+        heap: List[Tuple[float, int]] = []  # min-heap of (ratio, -index)
+        for index in indices:
+            matcher = self._matcher(index)
+            matcher.set_seq1(query)
+            _consider(heap, matcher, index, limit, score_cutoff)
+        return _sorted(heap)
+
+
+def _upper_bound_reaches(matcher, floor: float, strict: bool) -> bool:
+    """True when difflib's cheap upper bounds do not rule out ``floor``."""
+    if strict:
+        return matcher.real_quick_ratio() > floor and matcher.quick_ratio() > floor
+    return matcher.real_quick_ratio() >= floor and matcher.quick_ratio() >= floor
+
+
+def _consider(heap, matcher, index: int, limit: int, score_cutoff: float) -> None:
+    # Once the heap is full a choice must strictly beat the current worst,
+    # because earlier choices win ties.
+    full = len(heap) >= limit
+    floor = heap[0][0] if full else score_cutoff
+    if not _upper_bound_reaches(matcher, floor, strict=full):
+        return
+    value = matcher.ratio()
+    if value < score_cutoff:
+        return
+    if full:
+        if value <= heap[0][0]:
+            return
+        heapq.heapreplace(heap, (value, -index))
+    else:
+        heapq.heappush(heap, (value, -index))
+
+
+def _sorted(heap: List[Tuple[float, int]]) -> List[Tuple[int, float]]:
+    ranked = sorted(heap, key=lambda item: (-item[0], -item[1]))
+    return [(-neg_index, value) for value, neg_index in ranked]
+
+
+class QGramIndex(ChoiceMatcher):
+    """ChoiceMatcher with a character q-gram inverted index in front.
+
+    With a ``score_cutoff``, ``extract_best`` first discards choices that
+    provably cannot reach the cutoff (length filter + shared q-gram count
+    filter), then computes exact ratios on the survivors only. Results are
+    identical to scanning every choice.
+
+    The count filter uses the q-gram lemma on difflib's matching blocks:
+    with M matched characters, every q-gram of ``a`` that lies inside one
+    matching block also occurs in ``b``. Each unmatched character of ``a``
+    breaks at most q of them and each gap in ``b`` at most q - 1, so
+    ``shared >= len(a) - q + 1 - q * (len(a) - M) - (q - 1) * (len(b) - M)``
+    (and symmetrically), where ratio >= cutoff implies a minimum M.
+    """
+
+    def __init__(self, choices: Iterable[str], q: int = 3) -> None:
+        super().__init__(choices)
+        self.q = q
+        self._lengths = np.array([len(c) for c in self.choices], dtype=np.int64)
+        self._by_length: Dict[int, List[int]] = {}
+        # Postings are split by choice length so only lengths that can reach
+        # the cutoff are visited: (gram, length) -> (choice indices, counts)
+        postings: Dict[Tuple[str, int], Tuple[List[int], List[int]]] = {}
+        for index, choice in enumerate(self.choices):
+            self._by_length.setdefault(len(choice), []).append(index)
+            for gram, count in _qgram_counts(choice, q).items():
+                indices, counts = postings.setdefault((gram, len(choice)), ([], []))
+                indices.append(index)
+                counts.append(count)
+        self._postings: Dict[Tuple[str, int], Tuple[np.ndarray, np.ndarray]] = {
+            key: (np.array(indices, dtype=np.int64), np.array(counts, dtype=np.int64))
+            for key, (indices, counts) in postings.items()
+        }
+
+    def candidates(self, query: str, score_cutoff: float) -> List[int]:
+        """Indices (ascending) of the choices that may reach ``score_cutoff``."""
+        q = self.q
+        la = len(query)
+        if not self.choices:
+            return []
+
+        # Minimum shared q-grams per candidate length; lengths that cannot
+        # reach the cutoff are absent, lengths with no usable bound map to 0.
+        required: Dict[int, int] = {}
+        for lb in self._by_length:
+            min_matches = math.ceil(score_cutoff * (la + lb) / 2 - 1e-9)
+            if min_matches > min(la, lb):
+                continue
+            ua, ub = la - min_matches, lb - min_matches
+            required[lb] = max(
+                la - q + 1 - q * ua - (q - 1) * ub,
+                lb - q + 1 - q * ub - (q - 1) * ua,
+                0,
+            )
+        if not required:
+            return []
+
+        indexed = [lb for lb, bound in required.items() if bound > 0]
+        index_parts: List[np.ndarray] = []
+        weight_parts: List[np.ndarray] = []
+        for gram, query_count in _qgram_counts(query, q).items():
+            for lb in indexed:
+                posting = self._postings.get((gram, lb))
+                if posting is not None:
+                    index_parts.append(posting[0])
+                    weight_parts.append(np.minimum(posting[1], query_count))
+        if index_parts:
+            shared = np.bincount(
+                np.concatenate(index_parts),
+                weights=np.concatenate(weight_parts),
+                minlength=len(self.choices),
+            )
+        else:
+            shared = np.zeros(len(self.choices))
+
+        # Per-choice bound; -1 marks lengths that cannot reach the cutoff
+        bound_by_length = np.full(int(self._lengths.max()) + 1, -1, dtype=np.int64)
+        for lb, bound in required.items():
+            bound_by_length[lb] = bound
+        bounds = bound_by_length[self._lengths]
+        selected = (bounds >= 0) & (shared >= bounds)
+        return np.flatnonzero(selected).tolist()
+
+    def extract_best(
+        self,
+        query: str,
+        limit: int = 1,
+        score_cutoff: float = 0.0,
+        indices: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        if indices is None and score_cutoff > 0.0:
+            indices = self.candidates(query, score_cutoff)
+        return super().extract_best(query, limit, score_cutoff, indices)
+
+
+def _qgram_counts(text: str, q: int) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for i in range(len(text) - q + 1):
+        gram = text[i:i + q]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
@@ -0,0 +1,185 @@
+"""HTTP plumbing shared by the supplier API fetches (utils/etl.py).
+
+- ``get_session``: one pooled keep-alive ``requests.Session`` per SupplierAPI,
+  kept for the life of the worker process so TCP/TLS connections are
+  reused across pages, endpoints and runs. It is replaced when the API's
+  URL, auth or headers change, so no connection or cookie outlives them;
+- ``request_timeout``: (connect, read) timeout of a SupplierAPI;
+- ``get_rate_limiter``: one TokenBucket per SupplierAPI enforcing its
+  ``rate_limit_per_min``, shared by every fetch thread and job of the
+  process so concurrent page requests stay under the supplier's limit;
+- ``send_with_retry``: retries a request on 429, 5xx and connection
+  errors with exponential backoff, honouring a numeric ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_DELAY = 60.0
+
+
+def _get_env_int(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_env_float(key: str, default: float) -> float:
+    try:
+        return float(os.environ.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def fetch_concurrency() -> int:
+    """Page requests in flight per fetch job (ETL_FETCH_CONCURRENCY)."""
+    return max(_get_env_int("ETL_FETCH_CONCURRENCY", 4), 1)
+
+
+def request_timeout(supplier_api) -> Tuple[float, float]:
+    """(connect, read) timeouts: ETL_CONNECT_TIMEOUT (10 s), then the API's
+    ``timeout_seconds`` or ETL_REQUEST_TIMEOUT (30 s)."""
+    read = getattr(supplier_api, "timeout_seconds", None)
+    if not read or read <= 0:
+        read = _get_env_float("ETL_REQUEST_TIMEOUT", 30.0)
+    connect = min(_get_env_float("ETL_CONNECT_TIMEOUT", 10.0), read)
+    return connect, float(read)
+
+
+def _session_key(supplier_api) -> str:
+    """Fingerprint of what a session's connections and cookies depend on."""
+    auth_type = getattr(supplier_api.auth_type, "value", supplier_api.auth_type)
+    config = [
+        supplier_api.base_url,
+        auth_type,
+        supplier_api.auth_config or {},
+        supplier_api.default_headers or {},
+    ]
+    encoded = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+# SupplierAPI id -> (config key, session)
+_sessions: Dict[int, Tuple[str, requests.Session]] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(supplier_api) -> requests.Session:
+    """Pooled session of a SupplierAPI (ORM row or a plain copy with its id).
+
+    Its pools hold as many connections per host as pages fetched in
+    parallel (a few hosts: next links may point to a CDN). Retries are
+    done by ``send_with_retry``, not by the adapter.
+    """
+    key = _session_key(supplier_api)
+    with _sessions_lock:
+        current = _sessions.get(supplier_api.id)
+        if current is not None and current[0] == key:
+            return current[1]
+        session = requests.Session()
+        pool_size = max(fetch_concurrency(), 1)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _sessions[supplier_api.id] = (key, session)
+    if current is not None:
+        current[1].close()
+    return session
+
+
+def close_session(supplier_api_id: int) -> None:
+    """Drop the pooled session of a SupplierAPI (deleted or reconfigured)."""
+    with _sessions_lock:
+        current = _sessions.pop(supplier_api_id, None)
+    if current is not None:
+        current[1].close()
+
+
+# SupplierAPI id -> (rate_per_min, limiter)
+_limiters: Dict[int, Tuple[Optional[int], TokenBucket]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    supplier_api_id: int, rate_per_min: Optional[int], burst: int = 1
+) -> TokenBucket:
+    """Shared limiter of a SupplierAPI, recreated when its rate changes.
+
+    A missing or non-positive rate gives a disabled limiter.
+    """
+    with _limiters_lock:
+        current = _limiters.get(supplier_api_id)
+        if current is None or current[0] != rate_per_min:
+            current = (rate_per_min, TokenBucket(rate_per_min or 0, capacity=burst))
+            _limiters[supplier_api_id] = current
+        return current[1]
+
+
+def _retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    if response is None:
+        return None
+    try:
+        return max(float(response.headers.get("Retry-After")), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def send_with_retry(
+    send: Callable[[], requests.Response],
+    limiter: Optional[TokenBucket] = None,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> requests.Response:
+    """Call ``send()`` (which raises on HTTP errors), retrying transient failures.
+
+    ``limiter`` is acquired before every attempt. Defaults come from
+    ETL_FETCH_RETRIES (3) and ETL_FETCH_BACKOFF (1.0 s, doubled each retry).
+    """
+    retries = _get_env_int("ETL_FETCH_RETRIES", 3) if retries is None else retries
+    backoff = _get_env_float("ETL_FETCH_BACKOFF", 1.0) if backoff is None else backoff
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return send()
+        except requests.HTTPError as exc:
+            response = exc.response
+            status = response.status_code if response is not None else None
+            if status not in RETRY_STATUSES or attempt >= retries:
+                raise
+            delay = _retry_after(response)
+            reason = f"HTTP {status}"
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if attempt >= retries:
+                raise
+            delay = None
+            reason = type(exc).__name__
+        if delay is None:
+            # Exponential backoff with jitter so parallel requests spread out
+            delay = backoff * (2 ** attempt) * (1 + random.random() / 2)
+        delay = min(delay, MAX_RETRY_DELAY)
+        attempt += 1
+        logger.warning(
+            "Supplier API request failed (%s), retry %d/%d in %.1fs",
+            reason, attempt, retries, delay,
+        )
+        sleep(delay)
@@ -224,6 +224,7 @@ export interface SupplierApiSyncResponse {
   report?: SupplierApiReportData;
   api_raw_items?: unknown[];
   mapping?: SupplierApiMappingSummary | null;
+  unchanged?: boolean;
 }
 
 export interface SupplierApiReportEntry extends SupplierApiReportData {
@@ -263,6 +264,7 @@ export interface SupplierApiConfigApi {
   base_url: string;
   auth_type?: string | null;
   rate_limit_per_min?: number | null;
+  timeout_seconds?: number | null;
   endpoints: SupplierApiConfigEndpoint[];
   mapping: SupplierApiConfigMapping | null;
 }
@@ -277,6 +279,7 @@ export interface SupplierApiPayload {
   base_url: string;
   auth_type?: string | null;
   rate_limit_per_min?: number | null;
+  timeout_seconds?: number | null;
   auth_config?: Record<string, unknown> | null;
   default_headers?: Record<string, string> | null;
 }
@@ -885,6 +888,23 @@ export interface CacheList {
   per_page: number;
 }
 
+export interface MatchingRunPhase {
+  wall_s: number;
+  cpu_s: number;
+  queries: number;
+  calls: number;
+}
+
+export interface MatchingRunProfile {
+  version: number;
+  wall_s: number;
+  cpu_s: number;
+  queries: number;
+  phases: Record<string, MatchingRunPhase>;
+  counters: Record<string, number>;
+  histograms: Record<string, Record<string, number>>;
+}
+
 export interface MatchingRunItem {
   id: number;
   ran_at: string | null;
@@ -904,6 +924,7 @@ export interface MatchingRunItem {
   attr_share_hits: number | null;
   total_odoo_products: number | null;
   matched_products: number | null;
+  profile: MatchingRunProfile | null;
   nightly_job_id: number | null;
 }
 
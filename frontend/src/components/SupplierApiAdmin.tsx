@@ -199,6 +199,7 @@ function SupplierApiAdmin({ isVisible, onClose }: SupplierApiAdminProps) {
       base_url: '',
       auth_type: 'none',
       rate_limit_per_min: null,
+      timeout_seconds: null,
       endpoints: [],
       mapping: null,
     };
@@ -215,7 +216,7 @@ function SupplierApiAdmin({ isVisible, onClose }: SupplierApiAdminProps) {
   const handleApiChange = (
     supplierId: number,
     apiId: number,
-    field: 'base_url' | 'auth_type' | 'rate_limit_per_min',
+    field: 'base_url' | 'auth_type' | 'rate_limit_per_min' | 'timeout_seconds',
     value: string
   ) => {
     setConfigs((prev) =>
@@ -232,12 +233,12 @@ function SupplierApiAdmin({ isVisible, onClose }: SupplierApiAdminProps) {
               return { ...api, auth_type: value };
             }
             if (value === '') {
-              return { ...api, rate_limit_per_min: null };
+              return { ...api, [field]: null };
             }
             const numeric = Number(value);
             return {
               ...api,
-              rate_limit_per_min: Number.isNaN(numeric) ? api.rate_limit_per_min ?? null : numeric,
+              [field]: Number.isNaN(numeric) ? api[field] ?? null : numeric,
             };
           }),
         };
@@ -257,6 +258,8 @@ function SupplierApiAdmin({ isVisible, onClose }: SupplierApiAdminProps) {
       auth_type: api.auth_type ?? 'none',
       rate_limit_per_min:
         typeof api.rate_limit_per_min === 'number' ? api.rate_limit_per_min : null,
+      timeout_seconds:
+        typeof api.timeout_seconds === 'number' ? api.timeout_seconds : null,
     };
 
     try {
@@ -673,7 +676,7 @@ function SupplierApiAdmin({ isVisible, onClose }: SupplierApiAdminProps) {
                   return (
                     <div key={api.id} className="bg-[var(--color-bg-subtle)] border border-[#B8860B]/20 rounded-lg">
                       <div className="px-5 py-4 flex flex-col gap-4 border-b border-[var(--color-border-subtle)]">
-                        <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
+                        <div className="grid grid-cols-1 md:grid-cols-4 gap-4">
                           <div className="flex flex-col gap-2">
                             <label className="text-xs uppercase tracking-wide text-[var(--color-text-muted)]">
                               Base URL
@@ -725,6 +728,26 @@ function SupplierApiAdmin({ isVisible, onClose }: SupplierApiAdminProps) {
                               className="px-3 py-2 rounded-md bg-[var(--color-bg-surface)] border border-[var(--color-border-default)] text-[var(--color-text-primary)] placeholder:text-[var(--color-text-muted)]"
                             />
                           </div>
+                          <div className="flex flex-col gap-2">
+                            <label className="text-xs uppercase tracking-wide text-[var(--color-text-muted)]">
+                              Timeout (s)
+                            </label>
+                            <input
+                              type="number"
+                              min={1}
+                              value={api.timeout_seconds ?? ''}
+                              onChange={(e) =>
+                                handleApiChange(
+                                  supplier.id,
+                                  api.id,
+                                  'timeout_seconds',
+                                  e.target.value
+                                )
+                              }
+                              placeholder="30"
+                              className="px-3 py-2 rounded-md bg-[var(--color-bg-surface)] border border-[var(--color-border-default)] text-[var(--color-text-primary)] placeholder:text-[var(--color-text-muted)]"
+                            />
+                          </div>
                         </div>
                         <div className="flex items-center justify-end gap-2">
                           <button